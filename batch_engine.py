@@ -0,0 +1,512 @@
+import random
+from collections import deque
+from itertools import chain
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from game_state import BOARD_SIZE, GameState, PlayerTable
+from occupancy import FreeCells, OccupancyGrid
+from snake_body import SnakeBody
+
+CELLS = BOARD_SIZE * BOARD_SIZE
+MAX_CHARGES = 5
+STUN_TICKS = 30
+
+# Winner codes stored per room
+WINNERS = ("", "Game Over!", "Player 2", "Player 1")
+NO_WINNER, GAME_OVER, PLAYER2_WINS, PLAYER1_WINS = range(4)
+
+# What compare() checks besides the bodies
+COMPARED_FIELDS = ("food_pos", "projectiles", "game_over", "winner", "tick", "seed")
+COMPARED_COLUMNS = ("directions", "scores", "stunned", "charges", "alive", "moves")
+
+
+class BatchEngine:
+    """Simulate many rooms at once with NumPy, following LobbyServer.update_game_state.
+
+    Every room owns a slot in struct-of-arrays storage. Snake bodies are ring
+    buffers indexed by a head pointer, so a move writes one segment instead of
+    shifting the list. Each snake also has an occupancy grid counting its
+    segments per board cell, updated as heads advance and tails retire, so
+    collision and projectile checks are one lookup whatever the length.
+    The cells free for food are kept per room the way occupancy.FreeCells
+    keeps them, in the same order, so respawns pick the same cells as the
+    per-room engine.
+    Projectiles of all rooms share flat arrays tagged with their slot, kept
+    in per-room firing order. Chat is not simulated and stays on the room's
+    GameState. Every room plays on a BOARD_SIZE x BOARD_SIZE board with one
+    snake (single player) or two; see supports().
+    """
+
+    board_size = (BOARD_SIZE, BOARD_SIZE)
+
+    def __init__(self, rooms: int = 64, body_capacity: int = 32):
+        self.slots: Dict[str, int] = {}
+        self.free: List[int] = []
+        self.body_capacity = 1 << (body_capacity - 1).bit_length()  # Power of two for masking
+        self._allocate(rooms)
+        self.projectile_slot = np.zeros(0, dtype=np.int32)
+        self.projectiles = np.zeros((0, 4), dtype=np.int16)  # x, y, dx, dy
+        self.new_projectiles = []
+
+    def _allocate(self, rooms: int):
+        start = len(self.free) + len(self.slots)
+        grow = rooms - start
+        capacity = self.body_capacity
+
+        def extend(array, shape, dtype):
+            added = np.zeros((grow,) + shape, dtype=dtype)
+            return added if array is None else np.concatenate([array, added])
+
+        self.active = extend(getattr(self, 'active', None), (), bool)
+        self.single = extend(getattr(self, 'single', None), (), bool)
+        self.game_over = extend(getattr(self, 'game_over', None), (), bool)
+        self.winner = extend(getattr(self, 'winner', None), (), np.int8)
+        self.tick = extend(getattr(self, 'tick', None), (), np.int64)
+        self.seed = extend(getattr(self, 'seed', None), (), np.int64)
+        self.body = extend(getattr(self, 'body', None), (2, capacity, 2), np.int16)
+        self.head = extend(getattr(self, 'head', None), (2,), np.int32)
+        self.length = extend(getattr(self, 'length', None), (2,), np.int32)
+        self.moves = extend(getattr(self, 'moves', None), (2,), np.int64)
+        self.direction = extend(getattr(self, 'direction', None), (2, 2), np.int16)
+        self.stunned = extend(getattr(self, 'stunned', None), (2,), np.int32)
+        self.charges = extend(getattr(self, 'charges', None), (2,), np.int32)
+        self.score = extend(getattr(self, 'score', None), (2,), np.int32)
+        self.alive = extend(getattr(self, 'alive', None), (2,), bool)
+        self.food = extend(getattr(self, 'food', None), (2,), np.int16)
+        self.occupancy = extend(getattr(self, 'occupancy', None), (2, CELLS), np.uint8)
+        # Free cells for food: FreeCells.cells, .index and the number of free cells
+        self.free_cells = extend(getattr(self, 'free_cells', None), (CELLS,), np.int16)
+        self.free_index = extend(getattr(self, 'free_index', None), (CELLS,), np.int16)
+        self.free_count = extend(getattr(self, 'free_count', None), (), np.int32)
+        self.free.extend(range(rooms - 1, start - 1, -1))
+
+    def _grow_bodies(self, needed: int):
+        """Re-lay every ring buffer into a larger one, heads at index 0."""
+        capacity = self.body_capacity
+        while capacity < needed:
+            capacity *= 2
+        order = (self.head[:, :, None] + np.arange(self.body_capacity)) % self.body_capacity
+        body = np.zeros(self.body.shape[:2] + (capacity, 2), dtype=np.int16)
+        body[:, :, :self.body_capacity] = np.take_along_axis(self.body, order[..., None], axis=2)
+        self.body = body
+        self.head[:] = 0
+        self.body_capacity = capacity
+
+    def supports(self, state: GameState) -> bool:
+        """Whether a room's state fits the engine: its board size and at most two snakes."""
+        return state.board_size == self.board_size and len(state.players) <= 2
+
+    def add_room(self, room_id: str, state: GameState, single_player: bool) -> int:
+        """Copy a room's state into a free slot and return the slot."""
+        if not self.free:
+            self._allocate(2 * (len(self.slots) or 1))
+        players = state.players
+        longest = max(map(len, players.positions))
+        if longest > self.body_capacity:
+            self._grow_bodies(longest)
+        slot = self.free.pop()
+        self.slots[room_id] = slot
+        self.active[slot] = True
+        self.single[slot] = single_player
+        self.game_over[slot] = state.game_over
+        self.winner[slot] = WINNERS.index(state.winner) if state.winner in WINNERS else NO_WINNER
+        self.tick[slot] = state.tick
+        self.seed[slot] = state.seed
+        # A single player room leaves the second snake's row empty
+        self.length[slot] = 0
+        self.occupancy[slot] = 0
+        for column in (self.head, self.direction, self.moves, self.stunned, self.charges, self.score, self.alive):
+            column[slot] = 0
+        for s, pos in enumerate(players.positions):
+            self.length[slot, s] = len(pos)
+            self.direction[slot, s] = players.directions[s]
+            if len(pos):
+                self.body[slot, s, :len(pos)] = list(pos)
+                index, on_board = self._cells(np.full(len(pos), slot * 2 + s), self.body[slot, s, :len(pos)])
+                np.add.at(self.occupancy.reshape(-1), index[on_board], 1)
+        rows = len(players)
+        self.moves[slot, :rows] = players.moves
+        self.stunned[slot, :rows] = players.stunned
+        self.charges[slot, :rows] = players.charges
+        self.score[slot, :rows] = players.scores
+        self.alive[slot, :rows] = players.alive
+        self.food[slot] = state.food_pos
+        # Build the free cells as LobbyServer.occupancy does, so they come out in the same order
+        free = FreeCells(BOARD_SIZE, BOARD_SIZE)
+        for pos in players.positions:
+            OccupancyGrid(pos, free)
+        self.free_count[slot] = len(free)
+        self.free_cells[slot, :len(free)] = np.frombuffer(free.cells, dtype=np.int32)
+        self.free_index[slot] = np.frombuffer(free.index, dtype=np.int32)
+        self.new_projectiles.extend((slot, p) for p in state.projectiles)
+        return slot
+
+    def remove_room(self, room_id: str):
+        slot = self.slots.pop(room_id)
+        self.active[slot] = False
+        self._flush_projectiles()
+        keep = self.projectile_slot != slot
+        self.projectile_slot = self.projectile_slot[keep]
+        self.projectiles = self.projectiles[keep]
+        self.free.append(slot)
+
+    def apply_input(self, slot: int, player: int, data: Dict):
+        """Apply a direction change and shot, as LobbyServer.apply_input does."""
+        s = player
+        if "direction" in data:
+            self.direction[slot, s] = data["direction"]
+        if data.get("shoot") and self.charges[slot, s] > 0 and self.alive[slot, s]:
+            x, y = self.body[slot, s, self.head[slot, s]]
+            dx, dy = self.direction[slot, s]
+            self.new_projectiles.append((slot, (x, y, dx, dy)))
+            self.charges[slot, s] -= 1
+
+    def _flush_projectiles(self):
+        if self.new_projectiles:
+            slots, projectiles = zip(*self.new_projectiles)
+            self.projectile_slot = np.concatenate([self.projectile_slot, np.array(slots, dtype=np.int32)])
+            self.projectiles = np.concatenate([self.projectiles, np.array(projectiles, dtype=np.int16)])
+            self.new_projectiles = []
+
+    def _heads(self, snakes):
+        """Head positions of the given snakes (snake id = slot * 2 + snake index)."""
+        index = snakes * self.body_capacity + self.head.reshape(-1)[snakes]
+        return np.take(self.body.reshape(-1, 2), index, axis=0)
+
+    def _cells(self, snakes, positions):
+        """Flat occupancy index of each position on its snake's grid, and whether it is on the board."""
+        x, y = positions[:, 0].astype(np.int64), positions[:, 1].astype(np.int64)
+        on_board = (x >= 0) & (x < BOARD_SIZE) & (y >= 0) & (y < BOARD_SIZE)
+        return snakes * CELLS + np.where(on_board, y * BOARD_SIZE + x, 0), on_board
+
+    def _occupied(self, snakes, positions):
+        """Whether each position lies on the matching snake.
+
+        Only the head can be off the board (the move that put it there ends
+        the game), so off-board positions are compared with the head alone.
+        """
+        index, on_board = self._cells(snakes, positions)
+        hit = on_board & (self.occupancy.reshape(-1)[index] > 0)
+        off_board = ~on_board
+        if off_board.any():
+            heads = self._heads(snakes[off_board]).view(np.int32).reshape(-1)
+            targets = np.ascontiguousarray(positions[off_board], dtype=np.int16).view(np.int32).reshape(-1)
+            hit[off_board] = heads == targets
+        return hit
+
+    def _take(self, slots, cells):
+        """FreeCells.take for one cell in each of the given (distinct) slots."""
+        free_cells, free_index = self.free_cells.reshape(-1), self.free_index.reshape(-1)
+        base = slots * CELLS
+        count = self.free_count[slots] - 1
+        position = free_index[base + cells]
+        last = free_cells[base + count]
+        free_cells[base + position] = last
+        free_index[base + last] = position
+        self.free_count[slots] = count
+
+    def _release(self, slots, cells):
+        """FreeCells.release for one cell in each of the given (distinct) slots."""
+        base = slots * CELLS
+        count = self.free_count[slots]
+        self.free_cells.reshape(-1)[base + count] = cells
+        self.free_index.reshape(-1)[base + cells] = count
+        self.free_count[slots] = count + 1
+
+    def _grow(self, slot: int, s: int):
+        """Duplicate the tail segment, like list.append(pos[-1])."""
+        if self.length[slot, s] == self.body_capacity:
+            self._grow_bodies(self.body_capacity + 1)
+        tail = (self.head[slot, s] + self.length[slot, s] - 1) % self.body_capacity
+        self.body[slot, s, (tail + 1) % self.body_capacity] = self.body[slot, s, tail]
+        self.length[slot, s] += 1
+        x, y = self.body[slot, s, tail]
+        if 0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE:
+            self.occupancy[slot, s, y * BOARD_SIZE + x] += 1
+
+    def step(self):
+        """Advance every active room that is not over by one tick."""
+        self._flush_projectiles()
+        live = self.active & ~self.game_over
+        multi = live & ~self.single
+        self.tick[live] += 1
+
+        # Snake ids are slot * 2 + snake index; the second snake only plays in multiplayer rooms
+        playing = np.flatnonzero(np.stack([live, multi], axis=1))
+        head, stunned = self.head.reshape(-1), self.stunned.reshape(-1)
+
+        # Snakes move unless stunned; a stunned snake counts down instead
+        is_moving = stunned[playing] <= 0
+        stunned[playing[~is_moving]] -= 1
+        moving = playing[is_moving]
+        base = moving * self.body_capacity
+        mask = self.body_capacity - 1
+        tails = np.take(self.body.reshape(-1, 2), base + ((head[moving] + self.length.reshape(-1)[moving] - 1) & mask),
+                        axis=0)
+        new_heads = (np.take(self.body.reshape(-1, 2), base + head[moving], axis=0) +
+                     np.take(self.direction.reshape(-1, 2), moving, axis=0))
+        head[moving] = (head[moving] - 1) & mask
+        self.body.view(np.int32).reshape(-1)[base + head[moving]] = new_heads.view(np.int32).reshape(-1)
+        self.moves.reshape(-1)[moving] += 1
+        # Grids and free cells change in the per-room order: first snake's head
+        # then tail, then the second snake's. Each pass touches one cell per
+        # room, so the indexes within a pass are unique.
+        occupancy = self.occupancy.reshape(-1)
+        head_index, head_on_board = self._cells(moving, new_heads)
+        tail_index, tail_on_board = self._cells(moving, tails)
+        first = moving % 2 == 0
+        for s, mine in ((0, first), (1, ~first)):
+            for index, adding in ((head_index[mine & head_on_board], True),
+                                  (tail_index[mine & tail_on_board], False)):
+                slots = index // (2 * CELLS)
+                if adding:
+                    occupancy[index] += 1
+                else:
+                    occupancy[index] -= 1
+                # A cell changes hands when this grid's count leaves or reaches zero
+                # and the other snake, if it shares the free cells, does not cover it
+                crossed = occupancy[index] == (1 if adding else 0)
+                other = occupancy[index + (CELLS if s == 0 else -CELLS)] > 0
+                crossed &= ~(other & multi[slots])
+                cells = index[crossed] % CELLS
+                if adding:
+                    self._take(slots[crossed], cells)
+                else:
+                    self._release(slots[crossed], cells)
+
+        # Projectiles advance, stun the first snake they land on or leave the board
+        if len(self.projectiles):
+            owner = self.projectile_slot
+            flying = live[owner]
+            moved = self.projectiles[:, :2] + self.projectiles[:, 2:]
+            hit1 = flying & self._occupied(owner * 2, moved)
+            hit2 = flying & ~hit1 & multi[owner] & self._occupied(owner * 2 + 1, moved)
+            self.stunned[owner[hit1], 0] = STUN_TICKS
+            self.stunned[owner[hit2], 1] = STUN_TICKS
+            on_board = ((moved >= 0) & (moved < BOARD_SIZE)).all(axis=1)
+            keep = ~flying | (~hit1 & ~hit2 & on_board)
+            self.projectiles[flying, :2] = moved[flying]
+            self.projectile_slot = owner[keep]
+            self.projectiles = self.projectiles[keep]
+
+        charges = self.charges.reshape(-1)
+        charges[playing[charges[playing] < MAX_CHARGES]] += 1
+
+        # Food: few rooms eat on any tick, so the order-dependent part runs per room
+        heads = self._heads(playing)
+        on_food = heads.view(np.int32).reshape(-1) == self.food.view(np.int32).reshape(-1)[playing // 2]
+        eating = np.unique(playing[on_food] // 2)
+        for slot in eating:
+            rng = None
+            for s in (0, 1):
+                if s == 1 and self.single[slot]:
+                    break
+                if (self.body[slot, s, self.head[slot, s]] == self.food[slot]).all():
+                    self.score[slot, s] += 1
+                    count = int(self.free_count[slot])
+                    if count:  # A full board leaves the food where it was
+                        if rng is None:
+                            # The draws simulation.step makes for the room on this tick
+                            rng = random.Random((int(self.seed[slot]) << 32) | int(self.tick[slot]))
+                        y, x = divmod(int(self.free_cells[slot, rng.randrange(count)]), BOARD_SIZE)
+                        self.food[slot] = (x, y)
+                    self._grow(slot, s)
+
+        # Wall and self collisions end the game
+        # (growth only duplicates the tail, so the heads gathered above still hold)
+        crashed = playing[self._crashed(playing, heads)]
+        self.alive.reshape(-1)[crashed] = False
+        dead1 = crashed[crashed % 2 == 0] // 2
+        self.game_over[dead1] = True
+        self.winner[dead1] = np.where(self.single[dead1], GAME_OVER, PLAYER2_WINS)
+        dead2 = crashed[crashed % 2 == 1] // 2
+        self.game_over[dead2] = True
+        self.winner[dead2] = PLAYER1_WINS
+
+    def _crashed(self, snakes, heads):
+        """Whether each head left the board or ran into its own body."""
+        index, on_board = self._cells(snakes, heads)
+        # The head's own cell counts once, so a second segment there is a collision
+        return ~on_board | (self.occupancy.reshape(-1)[index] > 1)
+
+    def export(self, room_id: str, state: GameState, projectiles=None):
+        """Write a room's simulated fields back into its GameState.
+
+        `projectiles` is the room's entry from projectiles_by_slot(); without
+        it every projectile is scanned.
+        """
+        slot = self.slots[room_id]
+        rows = 1 if self.single[slot] else 2
+        bodies = []
+        for s in range(rows):
+            order = (self.head[slot, s] + np.arange(self.length[slot, s])) % self.body_capacity
+            bodies.append(SnakeBody(self.body[slot, s, order].tolist()))
+        state.players.positions = bodies
+        return self._export_fields(slot, state, projectiles)
+
+    def _export_fields(self, slot: int, state: GameState, projectiles=None):
+        """export() for everything but the bodies."""
+        if projectiles is None:
+            self._flush_projectiles()
+            projectiles = self.projectiles[self.projectile_slot == slot]
+        rows = 1 if self.single[slot] else 2
+        players = state.players
+        players.directions = list(map(tuple, self.direction[slot, :rows].tolist()))
+        players.scores = self.score[slot, :rows].tolist()
+        players.stunned = self.stunned[slot, :rows].tolist()
+        players.charges = self.charges[slot, :rows].tolist()
+        players.alive = self.alive[slot, :rows].tolist()
+        players.moves = self.moves[slot, :rows].tolist()
+        state.food_pos = tuple(self.food[slot].tolist())
+        state.projectiles = list(map(tuple, np.asarray(projectiles).tolist()))
+        state.game_over = bool(self.game_over[slot])
+        state.winner = WINNERS[self.winner[slot]]
+        state.tick = int(self.tick[slot])
+        state.seed = int(self.seed[slot])
+        return state
+
+    def compare(self, room_id: str, state: GameState):
+        """The first simulated field where a room differs from `state`, as
+        (name, state's value, engine's value), or None if they match.
+
+        Bodies are compared as arrays, so a check costs little more than the
+        copy of the expected segments.
+        """
+        slot = self.slots[room_id]
+        players = state.players
+        rows = 1 if self.single[slot] else 2
+        if len(players) != rows:
+            return "players", len(players), rows
+        for s, body in enumerate(players.positions):
+            order = (self.head[slot, s] + np.arange(self.length[slot, s])) % self.body_capacity
+            expected = np.fromiter(chain.from_iterable(body), dtype=np.int16, count=2 * len(body))
+            if not np.array_equal(self.body[slot, s, order].reshape(-1), expected):
+                return "positions", players.positions, self.to_state(room_id).players.positions
+        actual = self._export_fields(slot, GameState(PlayerTable(), (0, 0), [], False, "", deque()))
+        for name in COMPARED_FIELDS:
+            if getattr(state, name) != getattr(actual, name):
+                return name, getattr(state, name), getattr(actual, name)
+        for name in COMPARED_COLUMNS:
+            if getattr(players, name) != getattr(actual.players, name):
+                return name, getattr(players, name), getattr(actual.players, name)
+        return None
+
+    def projectiles_by_slot(self) -> Dict[int, np.ndarray]:
+        """Group the flying projectiles by slot, for exporting many rooms."""
+        self._flush_projectiles()
+        order = np.argsort(self.projectile_slot, kind='stable')
+        slots, starts = np.unique(self.projectile_slot[order], return_index=True)
+        return dict(zip(slots.tolist(), np.split(self.projectiles[order], starts[1:])))
+
+    def to_state(self, room_id: str) -> GameState:
+        """Build a standalone GameState for a room (chat is not tracked here)."""
+        state = GameState(PlayerTable(), (0, 0), [], False, "", deque(maxlen=5))
+        return self.export(room_id, state)
+
+
+def board_cycle(size: int = BOARD_SIZE) -> List[tuple]:
+    """A closed path through the cells of a size x size board, each visited once.
+
+    Row 0 runs right, the rows below snake back and forth over columns 1 and
+    up, and column 0 leads back up to the start. An odd board has no cycle
+    through every cell, so there the bottom right corner is left out and
+    the last two rows are covered column by column instead.
+    """
+    zigzag_rows = size - 1 if size % 2 == 0 else size - 3
+    cells = [(x, 0) for x in range(size)]
+    for y in range(1, zigzag_rows + 1):
+        columns = range(size - 1, 0, -1) if y % 2 else range(1, size)
+        cells.extend((x, y) for x in columns)
+    if size % 2:
+        cells.append((size - 1, size - 2))
+        for x in range(size - 2, 0, -1):
+            rows = (size - 2, size - 1) if x % 2 == (size - 2) % 2 else (size - 1, size - 2)
+            cells.extend((x, y) for y in rows)
+    cells.extend((0, y) for y in range(size - 1, 0, -1))
+    return cells
+
+
+def parity_game(rng: random.Random, single_player: bool, cycle: List[tuple]) -> GameState:
+    """A game whose snakes lie along `cycle` and cover most of the board."""
+    from simulation import create_game_state
+
+    state = create_game_state(players=1 if single_player else 2, seed=rng.getrandbits(32))
+    start = rng.randrange(len(cycle))
+    # The second snake follows the first's tail, leaving a short gap between them
+    lengths = [rng.randrange(len(cycle) // 2, len(cycle) - 4)]
+    if not single_player:
+        lengths = [rng.randrange(len(cycle) // 4, len(cycle) * 3 // 4)]
+        lengths.append(len(cycle) - lengths[0] - rng.randrange(2, 12))
+    players = state.players
+    for player, length in enumerate(lengths):
+        players.positions[player] = SnakeBody(cycle[(start - i) % len(cycle)] for i in range(length))
+        head, ahead = cycle[start], cycle[(start + 1) % len(cycle)]
+        players.directions[player] = (ahead[0] - head[0], ahead[1] - head[1])
+        start -= length + rng.randrange(2, 12)
+    covered = {cell for body in players.positions for cell in body}
+    free = [(x, y) for y in range(BOARD_SIZE) for x in range(BOARD_SIZE) if (x, y) not in covered]
+    state.food_pos = rng.choice(free)
+    return state
+
+
+def parity_inputs(rng: random.Random, state: GameState, cycle: List[tuple], index: Dict,
+                  crash_ticks: List[int]) -> List[tuple]:
+    """Each snake's next step along `cycle`, so it never meets a wall, and now and then a shot.
+
+    `index` maps each cell of the cycle to its position in it. From its
+    entry in `crash_ticks` on, a snake turns back into its own neck instead.
+    """
+    inputs = []
+    for player, body in enumerate(state.players.positions):
+        x, y = body[0]
+        ahead = body[1] if state.tick >= crash_ticks[player] else cycle[(index[body[0]] + 1) % len(cycle)]
+        data = {"direction": (ahead[0] - x, ahead[1] - y)}
+        if rng.random() < 0.05:
+            data["shoot"] = True
+        inputs.append((player, data))
+    return inputs
+
+
+def check_parity(rooms: int = 16, ticks: int = 400, seed: int = 0) -> Optional[str]:
+    """Play seeded games through BatchEngine and simulation.step side by side.
+
+    The snakes start long enough to cover most of the board and follow a
+    cycle through it, so food respawns draw from few free cells and a game
+    lasts until a snake turns into itself at a seeded tick, in two-snake
+    rooms sometimes both on the same tick. Shots stun now and then. Every
+    room's state is compared after every tick; returns a description of
+    the first difference, or None.
+    """
+    from simulation import apply_input, build_occupancy, step
+
+    rng = random.Random(seed)
+    cycles = [board_cycle()]
+    cycles.append(cycles[0][::-1])
+    indexes = [{cell: i for i, cell in enumerate(cycle)} for cycle in cycles]
+    engine = BatchEngine(rooms)
+    games = []
+    for room in range(rooms):
+        single_player = room % 4 == 0
+        way = rng.randrange(2)
+        state = parity_game(rng, single_player, cycles[way])
+        crash_ticks = [rng.randrange(ticks // 4, ticks * 2) for _ in range(len(state.players))]
+        if len(crash_ticks) == 2 and rng.random() < 0.25:
+            crash_ticks[1] = crash_ticks[0]
+        engine.add_room(str(room), state, single_player)
+        games.append((str(room), state, build_occupancy(state), single_player, way, crash_ticks))
+    for tick in range(ticks):
+        for room_id, state, grids, single_player, way, crash_ticks in games:
+            if state.game_over:
+                continue
+            for player, data in parity_inputs(rng, state, cycles[way], indexes[way], crash_ticks):
+                apply_input(state, player, data)
+                engine.apply_input(engine.slots[room_id], player, data)
+            step(state, grids, single_player)
+        engine.step()
+        for room_id, expected, *_ in games:
+            difference = engine.compare(room_id, expected)
+            if difference:
+                return f"tick {tick + 1} room {room_id} %s: %r != %r" % difference
+    return None
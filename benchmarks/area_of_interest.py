@@ -0,0 +1,139 @@
+"""Area states vs whole-state deltas, per client, as the board grows.
+
+Snakes of a fixed length start at random on boards of each size and wander,
+turning now and then and steering away from the walls, while the server
+ticks. Every tick each client gets both an area_state (send_area_states)
+and a delta from its own SnapshotTracker, acked at once. Both are timed
+and sized per client.
+"B/client" includes the first keyframe. Every MINIMAP_INTERVAL ticks the
+area states add the minimap's chunks and every head.
+
+Along the way every area state's bodies are checked against filtering the
+snakes' bodies by the same rectangle.
+
+Run from the repository root:
+    python -m benchmarks.area_of_interest --boards 100 300 1000 --players 16 64
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import make_room, make_server
+from game_state import AREA_MARGIN, VIEW_SIZE, view_origin
+from protocol import MessageDecoder, encode_message
+from snake_body import SnakeBody
+from snapshots import SnapshotTracker
+
+
+class Sink:
+    """Stands in for a client socket and its outbox, keeping the frames sent to it."""
+
+    def __init__(self):
+        self.frames = []
+
+    def put(self, frame):
+        self.frames.append(frame)
+        return True
+
+
+def spread(rng, state, length):
+    """Lay each snake along a random row, clear of the walls and of each other."""
+    width, height = state.board_size
+    table = state.players
+    rows = rng.sample(range(2, height - 2), len(table))
+    for player, y in enumerate(rows):
+        x = rng.randrange(length + 1, width - 2)
+        table.positions[player] = SnakeBody((x - i, y) for i in range(length))
+        table.directions[player] = (1, 0)
+
+
+def steer(rng, state, player):
+    (x, y), (dx, dy) = state.players.positions[player][0], state.players.directions[player]
+    width, height = state.board_size
+    if dx:
+        return (0, 1) if y < height // 2 else (0, -1)
+    return (1, 0) if x < width // 2 else (-1, 0)
+
+
+def expected_bodies(state, player):
+    """Every body filtered by the player's area, one entry per cell, head first."""
+    left, top = view_origin(state.board_size, state.players.positions[player][0])
+    left, top = left - AREA_MARGIN, top - AREA_MARGIN
+    right, bottom = left + VIEW_SIZE + 2 * AREA_MARGIN, top + VIEW_SIZE + 2 * AREA_MARGIN
+    bodies = []
+    for body in state.players.positions:
+        cells = [(x, y) for x, y in body if left <= x < right and top <= y < bottom]
+        bodies.append(list(dict.fromkeys(cells)))
+    return bodies
+
+
+def run(server, board, players, length, ticks, seed):
+    rng = random.Random(seed)
+    room = make_room(server, players=players)
+    room.clients = [Sink() for _ in range(players)]
+    server.outboxes.update((sink, sink) for sink in room.clients)
+    state = room.game_state = server.create_game_state((board, board), players)
+    spread(rng, state, length)
+    trackers = [SnapshotTracker() for _ in range(players)]
+    decoder = MessageDecoder()
+    area_time = delta_time = 0.0
+    delta_bytes = 0
+    for tick in range(ticks):
+        for player in range(players):
+            if rng.random() < 0.05 or not _clear_ahead(state, player):
+                room.pending_inputs[player].append({"direction": steer(rng, state, player)})
+        server.apply_pending_inputs(room)
+        server.update_game_state(room)
+
+        start = time.perf_counter()
+        server.send_area_states(room)
+        area_time += time.perf_counter() - start
+        start = time.perf_counter()
+        for tracker in trackers:
+            msg = tracker.build_message(state)
+            delta_bytes += len(encode_message(msg))
+            tracker.acknowledge(msg["seq"])
+        delta_time += time.perf_counter() - start
+
+        checked = rng.randrange(players)
+        (msg,) = decoder.feed(room.clients[checked].frames[-1])
+        bodies = [[] for _ in range(players)]
+        for player, body in zip(msg["players"], msg["bodies"]):
+            bodies[player] = body
+        assert bodies == expected_bodies(state, checked), f"area state of player {checked + 1} at tick {tick}"
+        if state.game_over:
+            break
+    area_bytes = sum(len(frame) for sink in room.clients for frame in sink.frames)
+    sent = (tick + 1) * players
+    return area_bytes / sent, area_time / sent, delta_bytes / sent, delta_time / sent
+
+
+def _clear_ahead(state, player):
+    """Whether the next few cells ahead are on the board."""
+    (x, y), (dx, dy) = state.players.positions[player][0], state.players.directions[player]
+    width, height = state.board_size
+    return 0 <= x + 3 * dx < width and 0 <= y + 3 * dy < height
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--boards', type=int, nargs='+', default=[100, 300, 1000])
+    parser.add_argument('--players', type=int, nargs='+', default=[16, 64])
+    parser.add_argument('--length', type=int, default=60)
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    server = make_server()
+    print(f"{'board':>6}{'players':>8}{'area B/client':>15}{'area us/client':>16}"
+          f"{'delta B/client':>16}{'delta us/client':>17}")
+    for board in args.boards:
+        for players in args.players:
+            area_bytes, area_time, delta_bytes, delta_time = run(
+                server, board, players, args.length, args.ticks, args.seed)
+            print(f"{board:>6}{players:>8}{area_bytes:>15.0f}{area_time * 1e6:>16.1f}"
+                  f"{delta_bytes:>16.0f}{delta_time * 1e6:>17.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Room-ticks per second: per-room update_game_state vs the NumPy BatchEngine.
+
+Before timing, a parity check plays random inputs (turns, shots) through
+both engines from the same starting rooms and compares every room's state
+after every tick. Both draw food respawns from the room's seed and tick.
+Random inputs end most games at a wall within a few dozen ticks, so
+batch_engine.check_parity, which the server runs before using the engine,
+then plays long games on nearly full boards the same way.
+
+Run from the repository root:
+    python -m benchmarks.batch_engine --rooms 10 1000 100000
+"""
+import argparse
+import random
+import time
+
+import batch_engine
+from batch_engine import BatchEngine
+from benchmarks.common import make_room, make_server
+
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+def make_rooms(server, count, rng):
+    rooms = []
+    for i in range(count):
+        room = make_room(server, str(i), single_player=(i % 4 == 0))
+        room.game_state.food_pos = (rng.randrange(25), rng.randrange(25))
+        rooms.append(room)
+    return rooms
+
+
+def check_parity(room_count, ticks, seed):
+    rng = random.Random(seed)
+    server = make_server()
+    rooms = make_rooms(server, room_count, rng)
+    engine = BatchEngine()
+    for room in rooms:
+        engine.add_room(room.id, room.game_state, room.single_player)
+    for tick in range(ticks):
+        for room in rooms:
+            if room.game_state.game_over:
+                continue
+            for player in range(len(room.game_state.players)):
+                if rng.random() < 0.3:
+                    data = {"direction": rng.choice(DIRECTIONS), "shoot": rng.random() < 0.3}
+                    server.apply_input(room, player, data)
+                    engine.apply_input(engine.slots[room.id], player, data)
+        for room in rooms:
+            if not room.game_state.game_over:
+                server.update_game_state(room)
+        engine.step()
+        for room in rooms:
+            difference = engine.compare(room.id, room.game_state)
+            if difference:
+                raise AssertionError(f"tick {tick} room {room.id} %s: %r != %r" % difference)
+    finished = sum(room.game_state.game_over for room in rooms)
+    print(f"parity ok: {room_count} rooms x {ticks} ticks ({finished} games finished)")
+
+
+def bench(room_count, ticks):
+    server = make_server()
+    rooms = make_rooms(server, room_count, random.Random(0))
+    engine = BatchEngine(room_count)
+    for room in rooms:
+        engine.add_room(room.id, room.game_state, room.single_player)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for room in rooms:
+            if not room.game_state.game_over:
+                server.update_game_state(room)
+    reference = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        engine.step()
+    batched = time.perf_counter() - start
+    return room_count * ticks / reference, room_count * ticks / batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--ticks', type=int, default=15,
+                        help='ticks per run; fresh snakes reach a wall after about 20')
+    parser.add_argument('--parity-rooms', type=int, default=300)
+    parser.add_argument('--parity-ticks', type=int, default=200)
+    args = parser.parse_args()
+
+    check_parity(args.parity_rooms, args.parity_ticks, seed=1)
+    difference = batch_engine.check_parity()
+    assert difference is None, difference
+    print("long-game parity ok")
+    print(f"{'rooms':>8}{'per-room/s':>14}{'batch/s':>14}{'speedup':>9}")
+    for room_count in args.rooms:
+        reference, batched = bench(room_count, args.ticks)
+        print(f"{room_count:>8}{reference:>14.0f}{batched:>14.0f}{batched / reference:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Room cost by board size, with the two starting snakes on every board.
+
+For each board: the time to set a room up (fresh GameState, occupancy
+grids and free cells, as the first tick builds them), one update_game_state
+tick, one food respawn, and the memory the room's state and grids hold.
+None of these should grow with the board.
+
+Run from the repository root:
+    python -m benchmarks.board_size --sizes 25 100 250 500 1000
+"""
+import argparse
+import timeit
+import tracemalloc
+
+from benchmarks.common import make_room, make_server
+
+
+def per_call_us(function):
+    number, _ = timeit.Timer(function).autorange()
+    return min(timeit.repeat(function, number=number, repeat=3)) / number * 1e6
+
+
+def measure(server, size):
+    room = make_room(server)
+
+    def set_up():
+        room.game_state = server.create_game_state((size, size))
+        server.occupancy(room)
+
+    setup_us = per_call_us(set_up)
+
+    tracemalloc.start()
+    set_up()
+    state_kb = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+
+    state = room.game_state
+
+    def tick():
+        # Heads run on past the walls; only the cost of the tick is of interest
+        state.game_over = False
+        state.players.alive = [True] * len(state.players)
+        server.update_game_state(room)
+
+    tick_us = per_call_us(tick)
+    spawn_us = per_call_us(room.occupancy[0].free.sample)
+    return setup_us, tick_us, spawn_us, state_kb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[25, 100, 250, 500, 1000])
+    args = parser.parse_args()
+
+    server = make_server()
+    print(f"{'board':>11}{'setup us':>10}{'tick us':>9}{'spawn us':>10}{'state KB':>10}")
+    for size in args.sizes:
+        setup_us, tick_us, spawn_us, state_kb = measure(server, size)
+        print(f"{f'{size}x{size}':>11}{setup_us:>10.1f}{tick_us:>9.2f}{spawn_us:>10.2f}{state_kb:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Client frame times while the link to the server is slow or stalls.
+
+A server runs behind a proxy that delays everything by half the round trip
+each way and, with a stall set, holds the link for that long every
+STALL_EVERY seconds. A headless single-player client then plays for a few
+seconds, pressing a turn key twice a second, in one of two loops:
+
+    blocking  waits on the socket for the next message before each frame,
+              as the game loop used to
+    threaded  Client.frame, with the receive thread applying states
+
+"fps" counts frames drawn; the frame times are between successive frames
+(60 fps is 16.7 ms).
+
+Run from the repository root:
+    python -m benchmarks.client_frames --rtt 0 100 250 --stalls 0 500
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import contextlib
+import io
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import pygame
+
+from benchmarks.common import percentile, start_server
+from client import SNAKE_COLORS, Client
+
+STALL_EVERY = 2.0  # Seconds between stalls
+TURNS = [pygame.K_DOWN, pygame.K_RIGHT]
+
+
+class LatencyProxy:
+    """Forwards one connection to the server, delaying and stalling it both ways."""
+
+    def __init__(self, server_port, rtt, stall):
+        self.server_port = server_port
+        self.delay = rtt / 2
+        self.stall = stall
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        client, _ = self.listener.accept()
+        server = socket.create_connection(('127.0.0.1', self.server_port))
+        for source, destination in ((client, server), (server, client)):
+            chunks = queue.Queue()
+            threading.Thread(target=self.read, args=(source, chunks), daemon=True).start()
+            threading.Thread(target=self.write, args=(destination, chunks), daemon=True).start()
+
+    def due(self, now):
+        """When bytes read now leave the proxy: a stall holds them to its end."""
+        due = now + self.delay
+        phase = due % STALL_EVERY
+        if phase < self.stall:
+            due += self.stall - phase
+        return due
+
+    def read(self, source, chunks):
+        try:
+            while True:
+                data = source.recv(65536)
+                chunks.put((self.due(time.monotonic()), data))
+                if not data:
+                    return
+        except OSError:
+            chunks.put((0, b''))
+
+    def write(self, destination, chunks):
+        while True:
+            due, data = chunks.get()
+            wait = due - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                if not data:
+                    destination.close()
+                    return
+                destination.sendall(data)
+            except OSError:
+                return
+
+
+class HeadlessClient(Client):
+    """A client that picks its color without asking."""
+
+    def color_selection_screen(self):
+        return SNAKE_COLORS["Green"]
+
+
+def connect(port):
+    """A single-player client on a 1000-cell board, long enough not to crash."""
+    argv = sys.argv
+    sys.argv = [argv[0], '--single-player', '--board', '1000']  # Client reads its flags here
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            with open(os.path.join(workdir, 'server_port.txt'), 'w') as f:
+                f.write(str(port))
+            os.chdir(workdir)
+            with contextlib.redirect_stdout(io.StringIO()):
+                return HeadlessClient()
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv
+
+
+def press(key):
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, unicode='', mod=0))
+
+
+def blocking_frame(client):
+    """One frame of the old loop: send, wait for the server, then draw."""
+    for event in pygame.event.get():
+        if event.type == pygame.KEYDOWN:
+            change = client.game_controls(event.key)
+            if change:
+                client.send_input(change)
+    for msg in client.pending_messages + client.receive_messages():
+        client.handle_server_message(msg)
+    client.send_replies()
+    client.pending_messages = []
+    if client.game_state:
+        client.draw_game_state(client.game_state)
+
+
+def play(server_port, mode, rtt, stall, seconds):
+    proxy = LatencyProxy(server_port, rtt, stall)
+    client = connect(proxy.port)
+    frames = []
+    start = last = time.monotonic()
+    next_turn = start + 0.5
+    turn = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "threaded":
+            client.start_receiving()
+        while last - start < seconds:
+            if last >= next_turn:
+                press(TURNS[turn % 2])
+                turn += 1
+                next_turn += 0.5
+            if mode == "threaded":
+                client.frame(pygame.event.get())
+            else:
+                blocking_frame(client)
+            client.clock.tick(60)
+            now = time.monotonic()
+            frames.append(now - last)
+            last = now
+    client.client.close()
+    proxy.listener.close()
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt', type=float, nargs='+', default=[0, 100, 250], help="round trip in ms")
+    parser.add_argument('--stalls', type=float, nargs='+', default=[0, 500], help="ms the link holds every 2 s")
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server, port = start_server(workdir)
+        try:
+            print(f"{'mode':>9}{'rtt ms':>8}{'stall ms':>9}{'fps':>7}{'mean ms':>9}{'p99 ms':>8}{'max ms':>8}")
+            for rtt in args.rtt:
+                for stall in args.stalls:
+                    for mode in ("blocking", "threaded"):
+                        frames = play(port, mode, rtt / 1000, stall / 1000, args.seconds)
+                        print(f"{mode:>9}{rtt:>8.0f}{stall:>9.0f}{len(frames) / sum(frames):>7.1f}"
+                              f"{sum(frames) / len(frames) * 1000:>9.1f}{percentile(frames, 99) * 1000:>8.1f}"
+                              f"{max(frames) * 1000:>8.1f}")
+        finally:
+            server.kill()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
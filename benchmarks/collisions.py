@@ -0,0 +1,149 @@
+"""Collision checks per tick: scanning the snake body vs the occupancy grid.
+
+For each engine, one tick's worth of collision queries against snakes of
+the given length: self collision for every snake, two projectiles in flight
+that miss, and the engine's other checks (the snake_game head-on-body check
+against the other snake, the single player food respawn check). The scans
+are the checks the engines made before they kept an OccupancyGrid. Snakes
+are laid out in a straight line trailing away from the board, so nothing
+collides and every scan runs to the end. The last table times the server's
+whole update_game_state with the grid.
+
+Run from the repository root:
+    python -m benchmarks.collisions --lengths 10 1000 100000
+"""
+import argparse
+import math
+import os
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # snake_game opens a window on import
+
+from pygame.math import Vector2
+
+import snake_game
+import single_player
+from benchmarks.common import make_room, make_server
+from occupancy import OccupancyGrid
+from snake_body import SnakeBody
+
+PROJECTILES = [(12, 0, 0, 1), (0, 12, 1, 0)]  # x, y, dx, dy
+
+
+def line(head, step, length):
+    return [(head[0] + i * step, head[1]) for i in range(length)]
+
+
+def server_queries(length):
+    body1, body2 = line((5, 5), -1, length), line((20, 20), 1, length)
+    grid1, grid2 = OccupancyGrid(body1), OccupancyGrid(body2)
+
+    def scan():
+        body1[0] in body1[1:]
+        body2[0] in body2[1:]
+        for p in PROJECTILES:
+            new_x, new_y = p[0] + p[2], p[1] + p[3]
+            any(abs(new_x - x) < 1 and abs(new_y - y) < 1 for x, y in body1)
+            any(abs(new_x - x) < 1 and abs(new_y - y) < 1 for x, y in body2)
+
+    def grid():
+        grid1.count(body1[0]) > 1
+        grid2.count(body2[0]) > 1
+        for p in PROJECTILES:
+            new_x, new_y = p[0] + p[2], p[1] + p[3]
+            (new_x, new_y) in grid1
+            (new_x, new_y) in grid2
+
+    return scan, grid
+
+
+def snake_game_queries(length):
+    game = snake_game.Game((255, 0, 0), (0, 0, 255))
+    game.snake1.body = line((5, 5), -1, length)
+    game.snake2.body = line((20, 20), 1, length)
+    projectiles = [snake_game.Projectile((x, y), (dx, dy), game.snake1) for x, y, dx, dy in PROJECTILES]
+    snakes = ((game.snake1, game.snake2), (game.snake2, game.snake1))
+    # The scans run on the list of Vector2 bodies the engine used to keep
+    vectors = {snake: [Vector2(cell) for cell in snake.body] for snake in (game.snake1, game.snake2)}
+
+    def scan():
+        for snake, other in snakes:
+            body = vectors[snake]
+            for block in body[1:]:
+                block == body[0]
+            for block in vectors[other]:
+                block == body[0]
+        for proj in projectiles:
+            for block in vectors[game.snake2]:
+                math.hypot(proj.pos.x - block.x, proj.pos.y - block.y) < 1
+
+    def grid():
+        for snake, other in snakes:
+            head = snake.body[0]
+            snake.occupancy.count(head) > 1
+            head in other.occupancy
+        for proj in projectiles:
+            proj.check_collision(game.snake2)
+
+    return scan, grid
+
+
+def single_player_queries(length):
+    snake = single_player.Snake((5, 5), (255, 0, 0))
+    snake.body = line((5, 5), -1, length)
+    vectors = [Vector2(cell) for cell in snake.body]
+    food = Vector2(12, 12)
+
+    def scan():
+        vectors[0] in vectors[1:]
+        food in vectors
+
+    def grid():
+        snake.occupancy.count(snake.body[0]) > 1
+        (food.x, food.y) in snake.occupancy
+
+    return scan, grid
+
+
+def per_call_us(function):
+    number, _ = timeit.Timer(function).autorange()
+    return min(timeit.repeat(function, number=number, repeat=3)) / number * 1e6
+
+
+def server_tick_us(length):
+    server = make_server()
+    room = make_room(server)
+    state = room.game_state
+    state.players.positions = [SnakeBody(line((5, 5), -1, length)), SnakeBody(line((20, 20), 1, length))]
+    server.occupancy(room)  # Built once per body, not per tick
+
+    def tick():
+        # Heads keep going past the walls; only the checks are of interest here
+        state.game_over = False
+        state.players.alive = [True] * len(state.players)
+        state.projectiles = list(PROJECTILES)
+        server.update_game_state(room)
+
+    return per_call_us(tick)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[10, 1000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'engine':<15}{'length':>8}{'scan us':>12}{'grid us':>10}{'speedup':>10}")
+    for name, queries in (("server", server_queries), ("snake_game", snake_game_queries),
+                          ("single_player", single_player_queries)):
+        for length in args.lengths:
+            scan, grid = queries(length)
+            scan_us, grid_us = per_call_us(scan), per_call_us(grid)
+            print(f"{name:<15}{length:>8}{scan_us:>12.2f}{grid_us:>10.2f}{scan_us / grid_us:>9.0f}x")
+    print()
+    print(f"{'length':>8}{'server update_game_state us':>30}")
+    for length in args.lengths:
+        print(f"{length:>8}{server_tick_us(length):>30.2f}")
+
+
+if __name__ == '__main__':
+    main()
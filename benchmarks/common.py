@@ -0,0 +1,62 @@
+"""Shared helpers for the benchmark scripts."""
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from server import LobbyServer, Room
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server.py')
+
+
+def make_server(server_class=LobbyServer):
+    """Create a server without leaving a server_port.txt in the working tree."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                server = server_class()
+        finally:
+            os.chdir(cwd)
+    server.server.close()
+    return server
+
+
+def make_room(server, room_id="1000", single_player=False, players=2):
+    """Create an in-game room with no connected sockets (one player in single player)."""
+    seats = 1 if single_player else players
+    return Room(
+        id=room_id,
+        name=f"bench-{room_id}",
+        clients=[None] * seats,
+        game_state=server.create_game_state(players=seats),
+        ready=[True] * seats,
+        in_game=True,
+        single_player=single_player
+    )
+
+
+def start_server(workdir, *flags):
+    """Run server.py with `flags` in workdir and return (process, port)."""
+    port_file = os.path.join(workdir, 'server_port.txt')
+    proc = subprocess.Popen([sys.executable, SERVER_SCRIPT, *flags], cwd=workdir,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        if os.path.exists(port_file):
+            with open(port_file) as f:
+                text = f.read().strip()
+            if text:
+                return proc, int(text)
+        time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
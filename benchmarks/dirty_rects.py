@@ -0,0 +1,270 @@
+"""Dirty-rect rendering: pixels repainted per frame, drawing every frame whole vs only what changed.
+
+Each screen plays a scripted game: snakes mostly going straight, turning
+now and then and away from whatever is ahead, shooting once in a while,
+and on the client chat messages coming in. Every frame is drawn three
+times from the same state, each through its own DirtyRenderer onto its
+own surface: "full" as the screens draw by default, the whole frame every
+time; "dirty" as with --dirty-rects; and a check that draws the dirty
+renderer's items whole. A game that ends starts over.
+
+The dirty screen has to come out identical to the check on every frame.
+The single player grid pulses only in "full"; with dirty rects it stays
+still in the background.
+
+Run from the repository root:
+    python -m benchmarks.dirty_rects --frames 300 --draws-per-tick 1
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # The game modules open a window on import
+
+import pygame
+from pygame.math import Vector2
+
+import single_player
+import multiplayer
+import snake_game
+import client
+from dirty_rects import DirtyRenderer
+from simulation import Simulation, create_game_state
+
+TURN_CHANCE = 0.15  # Per snake and tick
+SHOOT_CHANCE = 0.05
+CHAT_CHANCE = 0.02
+
+
+def steer(rng, head, direction, blocked):
+    """The next direction: straight on or, now and then, a turn, avoiding blocked cells ahead if it can."""
+    dx, dy = int(direction[0]), int(direction[1])
+    turns = [(dy, dx), (-dy, -dx)]
+    rng.shuffle(turns)
+    options = turns + [(dx, dy)] if rng.random() < TURN_CHANCE else [(dx, dy)] + turns
+    for option in options:
+        if not blocked((head[0] + option[0], head[1] + option[1])):
+            return option
+    return dx, dy
+
+
+class SinglePlayerScene:
+    """single_player.Game, one snake on the pulsing grid."""
+
+    def __init__(self, seed):
+        single_player.screen = pygame.Surface(self.size())
+        single_player.color_selection_screen = lambda: single_player.SNAKE_COLORS["Cyber Blue"]  # Skip the color screen
+        self.seed = seed
+        self.game = single_player.Game(seed)
+        self.glow_effect = 0.0
+        self.background = pygame.Surface(self.size(), 0, single_player.screen)
+        self.game.grid.draw(self.glow_effect, self.background)
+
+    def size(self):
+        return single_player.SCREEN_SIZE, single_player.SCREEN_SIZE
+
+    def renderer(self, surface, dirty):
+        return DirtyRenderer(surface, self.background if dirty else None, dirty)
+
+    def tick(self, rng):
+        game = self.game
+        if game.game_over:
+            self.seed += 1
+            game = self.game = single_player.Game(self.seed)
+        snake = game.snake
+        wrap = lambda cell: (cell[0] % single_player.CELL_NUMBER, cell[1] % single_player.CELL_NUMBER)
+        snake.direction = Vector2(steer(rng, snake.body[0], snake.direction,
+                                        lambda cell: wrap(cell) in snake.occupancy))
+        if rng.random() < SHOOT_CHANCE:
+            proj = snake.shoot_projectile()
+            if proj:
+                game.projectiles.append(proj)
+        game.update()
+
+    def draw(self, surface, renderer):
+        # Game.draw advances the pulse; each drawing of the frame starts from the same phase
+        self.game.glow_effect = self.glow_effect
+        single_player.screen = surface
+        self.game.renderer = renderer
+        self.game.draw()
+
+    def next_frame(self):
+        self.glow_effect += 0.05
+
+
+class MultiplayerScene:
+    """multiplayer.MultiplayerGame, two snakes on a plain background."""
+
+    def __init__(self, seed):
+        self.game = multiplayer.MultiplayerGame()
+
+    def size(self):
+        return single_player.SCREEN_SIZE, single_player.SCREEN_SIZE
+
+    def renderer(self, surface, dirty):
+        return DirtyRenderer(surface, single_player.BACKGROUND_COLOR, dirty)
+
+    def tick(self, rng):
+        if self.game.game_over:
+            self.game = multiplayer.MultiplayerGame()
+        snakes = (self.game.snake1, self.game.snake2)
+        wrap = lambda cell: (cell[0] % single_player.CELL_NUMBER, cell[1] % single_player.CELL_NUMBER)
+        for snake in snakes:
+            snake.direction = Vector2(steer(rng, snake.body[0], snake.direction,
+                                            lambda cell: any(wrap(cell) in other.occupancy for other in snakes)))
+        self.game.update()
+
+    def draw(self, surface, renderer):
+        single_player.screen = multiplayer.screen = surface
+        self.game.renderer = renderer
+        self.game.draw()
+
+    def next_frame(self):
+        pass
+
+
+class SnakeGameScene:
+    """snake_game.Game, two snakes shooting at each other."""
+
+    def __init__(self, seed):
+        self.colors = snake_game.SNAKE_COLORS["Pink"], snake_game.SNAKE_COLORS["Cyan"]
+        self.new_game()
+
+    def new_game(self):
+        self.game = snake_game.Game(*self.colors)
+        self.game.game_over = self.new_game  # It shows the winner and exits; start over instead
+
+    def size(self):
+        return snake_game.SCREEN_SIZE, snake_game.SCREEN_SIZE
+
+    def renderer(self, surface, dirty):
+        return DirtyRenderer(surface, snake_game.BACKGROUND_COLOR, dirty)
+
+    def tick(self, rng):
+        game = self.game
+        snakes = (game.snake1, game.snake2)
+        size = snake_game.CELL_NUMBER
+        blocked = lambda cell: (not (0 <= cell[0] < size and 0 <= cell[1] < size)
+                                or any(cell in other.occupancy for other in snakes))
+        for snake in snakes:
+            if snake.alive and snake.stunned <= 0:
+                snake.direction = Vector2(steer(rng, snake.body[0], snake.direction, blocked))
+                if rng.random() < SHOOT_CHANCE:
+                    proj = snake.shoot_projectile()
+                    if proj:
+                        game.projectiles.append(proj)
+        game.update()
+
+    def draw(self, surface, renderer):
+        snake_game.screen = surface
+        self.game.renderer = renderer
+        self.game.draw()
+
+    def next_frame(self):
+        pass
+
+
+class ClientScene:
+    """client.Client.draw_game_state over a local simulation of a room."""
+
+    def __init__(self, seed, players=4):
+        self.players = players
+        self.seed = seed
+        self.client = client.Client.__new__(client.Client)  # Drawing needs no connection
+        self.client.player_number = 1
+        self.client.my_color = client.SNAKE_COLORS["Green"]
+        self.client.minimap = {}
+        self.client.chat_input = ""
+        self.new_game()
+
+    def new_game(self):
+        self.simulation = Simulation(create_game_state(players=self.players, seed=self.seed))
+        self.seed += 1
+
+    def size(self):
+        return client.SCREEN_SIZE, client.SCREEN_SIZE + client.CHAT_HEIGHT
+
+    def renderer(self, surface, dirty):
+        return DirtyRenderer(surface, client.BACKGROUND_COLOR, dirty)
+
+    def tick(self, rng):
+        if self.simulation.game_state.game_over:
+            self.new_game()
+        state = self.simulation.game_state
+        players = state.players
+        width, height = state.board_size
+        taken = {tuple(cell) for body in players.positions for cell in body}
+        blocked = lambda cell: not (0 <= cell[0] < width and 0 <= cell[1] < height) or cell in taken
+        inputs = []
+        for player, body in enumerate(players.positions):
+            if not players.alive[player]:
+                continue
+            data = {"direction": steer(rng, body[0], players.directions[player], blocked)}
+            if rng.random() < SHOOT_CHANCE:
+                data["shoot"] = True
+            if rng.random() < CHAT_CHANCE:
+                data["chat"] = rng.choice(("gg", "nice shot", "watch out", "ha"))
+            inputs.append((player, data))
+        self.simulation.tick(inputs)
+
+    def draw(self, surface, renderer):
+        self.client.screen = surface
+        self.client.renderer = renderer
+        self.client.draw_game_state(self.simulation.game_state)
+
+    def next_frame(self):
+        pass
+
+
+SCENES = {
+    "single_player": SinglePlayerScene,
+    "multiplayer": MultiplayerScene,
+    "snake_game": SnakeGameScene,
+    "client": ClientScene,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--draws-per-tick', type=int, default=1,
+                        help="frames drawn per game tick; the games draw faster than they tick")
+    parser.add_argument('--screens', nargs='+', choices=SCENES, default=list(SCENES))
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.frames} frames, {args.draws_per_tick} per tick; dirty screens identical to drawing them whole")
+    print(f"{'screen':>14}{'mode':>7}{'pixels/frame':>14}{'of screen':>11}{'rects/frame':>13}{'ms/frame':>10}")
+    for name in args.screens:
+        rng = random.Random(args.seed)
+        scene = SCENES[name](args.seed)
+        size = scene.size()
+        surfaces = {mode: pygame.Surface(size) for mode in ("full", "dirty", "check")}
+        renderers = {mode: scene.renderer(surfaces[mode], mode != "full") for mode in surfaces}
+        pixels = dict.fromkeys(surfaces, 0)
+        rects = dict.fromkeys(surfaces, 0)
+        times = dict.fromkeys(surfaces, 0.0)
+        for frame in range(args.frames):
+            if frame % args.draws_per_tick == 0:
+                scene.tick(rng)
+            renderers["check"].invalidate()
+            for mode, surface in surfaces.items():
+                start = time.perf_counter()
+                scene.draw(surface, renderers[mode])
+                times[mode] += time.perf_counter() - start
+                pixels[mode] += renderers[mode].pixels
+                rects[mode] += len(renderers[mode].pushed)
+            scene.next_frame()
+            assert pygame.image.tobytes(surfaces["dirty"], "RGB") == pygame.image.tobytes(surfaces["check"], "RGB"), \
+                f"{name}: frame {frame} differs from drawing it whole"
+
+        area = size[0] * size[1]
+        for mode in ("full", "dirty"):
+            per_frame = pixels[mode] / args.frames
+            print(f"{name:>14}{mode:>7}{per_frame:>14.0f}{per_frame / area:>11.1%}"
+                  f"{rects[mode] / args.frames:>13.1f}{times[mode] / args.frames * 1000:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Cost of placing food on a free cell, by board size and how full the board is.
+
+"filter" is what single_player did before: list every board cell and keep
+the ones the snake leaves free. "retry" draws random cells until one is
+free, which is cheap on an empty board and slows down as the snake fills
+it. "FreeCells" samples the maintained free-cell set. The last column is
+what keeping the set costs per snake move.
+
+Run from the repository root:
+    python -m benchmarks.food_spawn --sizes 25 1000 --fill 0.1 0.5 0.95
+"""
+import argparse
+import random
+import timeit
+
+from occupancy import FreeCells, OccupancyGrid
+from snake_body import SnakeBody
+
+
+def serpentine(size, length):
+    """A snake winding row by row over the first `length` cells of the board."""
+    cells = []
+    for y in range(size):
+        row = [(x, y) for x in range(size)]
+        cells.extend(row if y % 2 == 0 else row[::-1])
+        if len(cells) >= length:
+            break
+    return cells[:length]
+
+
+def per_call_us(function):
+    number, _ = timeit.Timer(function).autorange()
+    return min(timeit.repeat(function, number=number, repeat=3)) / number * 1e6
+
+
+def spawners(size, body):
+    free = FreeCells(size, size)
+    grid = OccupancyGrid(body, free)
+
+    def filter_cells():
+        available = [(x, y) for x in range(size) for y in range(size) if (x, y) not in grid]
+        return random.choice(available)
+
+    def retry():
+        while True:
+            cell = (random.randrange(size), random.randrange(size))
+            if cell not in grid:
+                return cell
+
+    return filter_cells, retry, free.sample
+
+
+def move_overhead_us(size, body):
+    """Extra cost of one move when the grid also keeps a FreeCells up to date.
+
+    A one-segment snake steps between the board's last two cells, which the
+    winding snake leaves free, so every move takes one cell and frees one.
+    """
+    costs = []
+    for free in (None, FreeCells(size, size)):
+        if free is not None:
+            OccupancyGrid(body, free)
+        snake = SnakeBody([(size - 1, size - 1)])
+        grid = OccupancyGrid(snake, free)
+
+        def move():
+            x, y = snake[0]
+            new_head = (2 * size - 3 - x, y)  # size - 1 <-> size - 2
+            grid.add(new_head)
+            grid.remove(snake.advance(*new_head))
+
+        costs.append(per_call_us(move))
+    return costs[1] - costs[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[25, 1000])
+    parser.add_argument('--fill', type=float, nargs='+', default=[0.1, 0.5, 0.95])
+    args = parser.parse_args()
+
+    print(f"{'board':>11}{'fill':>6}{'filter us':>13}{'retry us':>11}{'FreeCells us':>14}{'upkeep us':>11}")
+    for size in args.sizes:
+        for fill in args.fill:
+            body = serpentine(size, int(size * size * fill))
+            filter_cells, retry, sample = spawners(size, body)
+            # The filter is linear in the board; time a single call on large boards
+            filter_us = per_call_us(filter_cells) if size <= 100 else timeit.timeit(filter_cells, number=1) * 1e6
+            print(f"{f'{size}x{size}':>11}{fill:>6.2f}{filter_us:>13.1f}{per_call_us(retry):>11.2f}"
+                  f"{per_call_us(sample):>14.2f}{move_overhead_us(size, body):>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
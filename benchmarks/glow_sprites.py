@@ -0,0 +1,97 @@
+"""Single player projectile and charge glows: concentric circles vs baked sprites.
+
+Projectiles sit at random cells of the board while the glow pulses, and
+each frame draws them and a full row of charge pips. "circles" is what
+Game.draw did before the glow sprites: the projectile's circle, then one
+circle per step of the glow, every frame. "sprites" is add_projectiles and
+add_charges, one blit of the GlowSheet sprite for the current pulse each.
+
+The two screens have to come out identical on every frame.
+
+Run from the repository root:
+    python -m benchmarks.glow_sprites --projectiles 500
+"""
+import argparse
+import math
+import os
+import random
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # single_player opens a window on import
+
+import pygame
+
+import single_player
+from single_player import CELL_NUMBER, CELL_SIZE, MAX_PROJECTILES, PROJECTILE_COLOR, SCREEN_SIZE
+
+
+def draw_circles(screen, game):
+    """The projectile and charge glows as Game.draw drew them before the sprites."""
+    draws = 0
+    for proj in game.projectiles:
+        pos = (int(proj.pos.x * CELL_SIZE + CELL_SIZE/2), int(proj.pos.y * CELL_SIZE + CELL_SIZE/2))
+        pygame.draw.circle(screen, PROJECTILE_COLOR, pos, 5)
+        glow_size = int(abs(math.sin(game.glow_effect * 3)) * 8) + 5
+        for i in range(glow_size, 0, -1):
+            alpha = int((1 - i/glow_size) * 100)
+            pygame.draw.circle(screen, (*PROJECTILE_COLOR, alpha), pos, 5 + i)
+        draws += 1 + glow_size
+    for i in range(game.snake.projectiles):
+        glow_size = int(abs(math.sin(game.glow_effect + i * 0.5)) * 4) + 3
+        for j in range(glow_size, 0, -1):
+            alpha = int((1 - j/glow_size) * 150)
+            pygame.draw.circle(screen, (*PROJECTILE_COLOR, alpha), (20 + i * 20, SCREEN_SIZE - 30), 5 + j)
+        draws += glow_size
+    return draws
+
+
+class DrawNow:
+    """Stands in for a DirtyRenderer, drawing every item as it is added."""
+
+    def add(self, key, rect, look, draw, *args):
+        draw(*args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--projectiles', type=int, default=500)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    game = object.__new__(single_player.Game)  # Drawing needs only these, so skip the color screen
+    game.projectiles = [single_player.Projectile((rng.randrange(CELL_NUMBER), rng.randrange(CELL_NUMBER)), (1, 0), None)
+                        for _ in range(args.projectiles)]
+    game.snake = SimpleNamespace(projectiles=MAX_PROJECTILES)
+    game.glow_effect = 0.0
+    circles, sprites = pygame.Surface((SCREEN_SIZE, SCREEN_SIZE)), pygame.Surface((SCREEN_SIZE, SCREEN_SIZE))
+    single_player.screen = sprites
+    renderer = DrawNow()
+    times = {"circles": 0.0, "sprites": 0.0}
+    draws = {"circles": 0, "sprites": 0}
+    for frame in range(args.frames):
+        game.glow_effect += 0.05
+        circles.fill(single_player.BACKGROUND_COLOR)
+        sprites.fill(single_player.BACKGROUND_COLOR)
+        start = time.perf_counter()
+        draws["circles"] += draw_circles(circles, game)
+        times["circles"] += time.perf_counter() - start
+        start = time.perf_counter()
+        game.add_projectiles(renderer)
+        game.add_charges(renderer)
+        times["sprites"] += time.perf_counter() - start
+        draws["sprites"] += len(game.projectiles) + game.snake.projectiles
+        assert pygame.image.tobytes(circles, "RGB") == pygame.image.tobytes(sprites, "RGB"), f"frame {frame} differs"
+
+    print(f"{args.projectiles} projectiles and {MAX_PROJECTILES} charges, {args.frames} frames, screens identical")
+    print(f"{'mode':>8}{'ms/frame':>10}{'draws/frame':>13}{'us/projectile':>15}")
+    for mode in ("circles", "sprites"):
+        per_frame = times[mode] / args.frames
+        print(f"{mode:>8}{per_frame * 1000:>10.3f}{draws[mode] / args.frames:>13.1f}"
+              f"{per_frame / (args.projectiles + MAX_PROJECTILES) * 1e6:>15.2f}")
+
+
+if __name__ == '__main__':
+    main()
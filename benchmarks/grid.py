@@ -0,0 +1,84 @@
+"""Single player background grid: a surface per line every frame vs one numpy pass.
+
+The grid pulses as Game.draw advances its phase, on screens of each size.
+"surfaces" is what Game.draw_grid did before: fill the screen, then
+allocate, fill and blit a 2-pixel SRCALPHA surface for every line. "numpy"
+is Grid.draw, which writes the background and every line into the screen
+through pygame.surfarray. "fill" is filling the screen alone, the floor
+for drawing the whole background.
+
+The two screens have to come out identical on every checked frame.
+
+Run from the repository root:
+    python -m benchmarks.grid --sizes 750 1500 3000
+"""
+import argparse
+import math
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # single_player opens a window on import
+
+import pygame
+
+import single_player
+from single_player import BACKGROUND_COLOR, GRID_COLOR, GRID_SPACING, Grid
+
+
+def draw_surfaces(screen, size, phase):
+    """The grid as Game.draw_grid drew it before Grid."""
+    screen.fill(BACKGROUND_COLOR)
+    for x in range(0, size, GRID_SPACING):
+        alpha = abs(math.sin(phase + x * 0.01)) * 30 + 20
+        grid_surface = pygame.Surface((2, size), pygame.SRCALPHA)
+        grid_surface.fill((GRID_COLOR[0], GRID_COLOR[1], GRID_COLOR[2], int(alpha)))
+        screen.blit(grid_surface, (x, 0))
+    for y in range(0, size, GRID_SPACING):
+        alpha = abs(math.sin(phase + y * 0.01)) * 30 + 20
+        grid_surface = pygame.Surface((size, 2), pygame.SRCALPHA)
+        grid_surface.fill((GRID_COLOR[0], GRID_COLOR[1], GRID_COLOR[2], int(alpha)))
+        screen.blit(grid_surface, (0, y))
+
+
+def run(size, frames, check_every):
+    surfaces = pygame.Surface((size, size), 0, single_player.screen)
+    single_player.screen = pygame.Surface((size, size), 0, single_player.screen)  # Grid draws on the screen
+    grid = Grid(size, GRID_SPACING)
+    times = {"surfaces": 0.0, "numpy": 0.0, "fill": 0.0}
+    phase = 0.0
+    for frame in range(frames):
+        phase += 0.05
+        start = time.perf_counter()
+        draw_surfaces(surfaces, size, phase)
+        times["surfaces"] += time.perf_counter() - start
+        if frame % check_every == 0:
+            start = time.perf_counter()
+            single_player.screen.fill(BACKGROUND_COLOR)
+            times["fill"] += time.perf_counter() - start
+        start = time.perf_counter()
+        grid.draw(phase)
+        times["numpy"] += time.perf_counter() - start
+        if frame % check_every == 0:
+            assert pygame.image.tobytes(surfaces, "RGB") == pygame.image.tobytes(single_player.screen, "RGB"), \
+                f"{size}px frame {frame} differs"
+    times["fill"] *= check_every
+    return {mode: total / frames for mode, total in times.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[750, 1500, 3000], help="screen sides in pixels")
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--check-every', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'pixels':>7}{'lines':>7}{'surfaces ms':>13}{'numpy ms':>10}{'fill ms':>9}")
+    for size in args.sizes:
+        times = run(size, args.frames, args.check_every)
+        lines = 2 * len(range(0, size, GRID_SPACING))
+        print(f"{size:>7}{lines:>7}{times['surfaces'] * 1000:>13.3f}{times['numpy'] * 1000:>10.3f}"
+              f"{times['fill'] * 1000:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Single player HUD text: drawing every glow layer each frame vs cached composites.
+
+Each frame draws the HUD's three labels (Score, Level, Next Level) the way
+single_player.Game.draw_hud_text does, with the score going up every
+--frames-per-point frames. "layered" is what draw_hud_text did before the
+text cache: a new Font every call, and every glow layer rendered and
+blitted onto the screen. "cached" is draw_hud_text now, which blits one
+composed surface per label from text_cache.
+
+Both draw onto the same background, and the two screens are compared
+after every frame; the composites are blended on a transparent surface, so
+a channel may differ by a rounding step or two.
+
+Run from the repository root:
+    python -m benchmarks.hud_text --frames 600
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # single_player opens a window on import
+
+import pygame
+
+import single_player
+from text_cache import text_cache
+
+HUD_COLOR = (0, 231, 255)
+MAX_CHANNEL_ERROR = 3
+
+
+class CountingSurface(pygame.Surface):
+    """A screen that counts the blits made onto it."""
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.blits = 0
+
+    def blit(self, *args, **kwargs):
+        self.blits += 1
+        return super().blit(*args, **kwargs)
+
+
+def layered_hud_text(screen, text, color, position, size=36):
+    """draw_hud_text before the text cache."""
+    base_font = pygame.font.Font(None, size)
+    for glow_size in range(8, 0, -2):
+        glow_surface = base_font.render(text, True, (*color, 40))
+        glow_rect = glow_surface.get_rect(center=position)
+        for dx, dy in [(-1,0), (1,0), (0,-1), (0,1), (-1,-1), (-1,1), (1,-1), (1,1)]:
+            screen.blit(glow_surface, (glow_rect.x + dx * glow_size, glow_rect.y + dy * glow_size))
+    for glow_size in range(4, 0, -1):
+        glow_surface = base_font.render(text, True, (*color, 60))
+        glow_rect = glow_surface.get_rect(center=position)
+        for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
+            screen.blit(glow_surface, (glow_rect.x + dx * glow_size, glow_rect.y + dy * glow_size))
+    glow_surface = base_font.render(text, True, (*color, 120))
+    glow_rect = glow_surface.get_rect(center=position)
+    screen.blit(glow_surface, (glow_rect.x - 1, glow_rect.y - 1))
+    screen.blit(glow_surface, (glow_rect.x + 1, glow_rect.y + 1))
+    text_surface = base_font.render(text, True, (255, 255, 255))
+    screen.blit(text_surface, text_surface.get_rect(center=position))
+
+
+def hud_labels(frame, frames_per_point):
+    """The HUD's labels at this frame, as Game.draw lays them out."""
+    score = frame // frames_per_point
+    level = score // 5 + 1
+    labels = [(f'Score: {score}', (100, 30)), (f'Level: {level}', (single_player.SCREEN_SIZE - 100, 30))]
+    points_needed = level * 5 - score
+    if points_needed > 0:
+        labels.append((f'Next Level: {points_needed}', (single_player.SCREEN_SIZE // 2, 30)))
+    return labels
+
+
+def max_channel_error(a, b):
+    width, height = a.get_size()
+    error = 0
+    for y in range(0, 80):
+        for x in range(width):
+            pa, pb = a.get_at((x, y)), b.get_at((x, y))
+            error = max(error, abs(pa[0] - pb[0]), abs(pa[1] - pb[1]), abs(pa[2] - pb[2]))
+    return error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--frames-per-point', type=int, default=40)
+    parser.add_argument('--check-every', type=int, default=50, help="compare the two screens every this many frames")
+    args = parser.parse_args()
+
+    size = (single_player.SCREEN_SIZE, single_player.SCREEN_SIZE)
+    layered, cached = CountingSurface(size), CountingSurface(size)
+    game = object.__new__(single_player.Game)  # draw_hud_text needs no game, so skip the color screen
+    single_player.screen = cached
+    times = {"layered": 0.0, "cached": 0.0}
+    worst = 0
+    for frame in range(args.frames):
+        labels = hud_labels(frame, args.frames_per_point)
+        layered.fill(single_player.BACKGROUND_COLOR)
+        cached.fill(single_player.BACKGROUND_COLOR)
+        start = time.perf_counter()
+        for text, position in labels:
+            layered_hud_text(layered, text, HUD_COLOR, position, 42)
+        times["layered"] += time.perf_counter() - start
+        start = time.perf_counter()
+        for text, position in labels:
+            game.draw_hud_text(text, HUD_COLOR, position, 42)
+        times["cached"] += time.perf_counter() - start
+        if frame % args.check_every == 0:
+            worst = max(worst, max_channel_error(layered, cached))
+    assert worst <= MAX_CHANNEL_ERROR, f"cached HUD differs by {worst} in a channel"
+
+    print(f"{'mode':>8}{'ms/frame':>10}{'blits/frame':>13}")
+    for mode, screen in (("layered", layered), ("cached", cached)):
+        print(f"{mode:>8}{times[mode] / args.frames * 1000:>10.3f}{screen.blits / args.frames:>13.1f}")
+    stats = text_cache.stats()
+    print(f"text cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%}), "
+          f"{stats['size']} surfaces; screens differ by at most {worst} per channel")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Input messages per second and turns lost: per-frame input vs change-only input.
+
+Replays a scripted player at 60 frames per second: turns at random moments,
+some of them quick double turns a couple of frames apart, and occasional
+shots. The old client sent its held keys every frame and the server applied
+everything queued at the next tick, so the last turn before a tick won. The
+current client sends only changes with sequence numbers and the server
+applies at most one turn per player per tick.
+
+Run from the repository root:
+    python -m benchmarks.input_queue --seconds 60
+"""
+import argparse
+import random
+
+from benchmarks.common import make_room, make_server
+from protocol import encode_message
+from tick_scheduler import TICK_INTERVAL
+
+FPS = 60
+PERPENDICULAR = {(1, 0): [(0, 1), (0, -1)], (-1, 0): [(0, 1), (0, -1)],
+                 (0, 1): [(1, 0), (-1, 0)], (0, -1): [(1, 0), (-1, 0)]}
+
+
+def script(seconds, seed):
+    """Per frame: (direction key held, list of key presses) for a random player."""
+    rng = random.Random(seed)
+    frames = []
+    direction = (1, 0)
+    next_turn = rng.randint(5, 40)
+    for frame in range(seconds * FPS):
+        presses = []
+        if frame == next_turn:
+            direction = rng.choice(PERPENDICULAR[direction])
+            presses.append(direction)
+            # A third of the turns are followed by a second one two frames later
+            next_turn = frame + (2 if rng.random() < 0.33 else rng.randint(5, 40))
+        if rng.random() < 0.01:
+            presses.append("shoot")
+        frames.append((direction, presses))
+    return frames
+
+
+def run(frames, mode):
+    server = make_server()
+    room = make_room(server, single_player=True)
+    frames_per_tick = TICK_INTERVAL * FPS
+    messages = sent_bytes = 0
+    seq = 0
+    last_sent = None
+    intended = [(1, 0)]
+    applied = [(1, 0)]
+    next_tick = frames_per_tick
+    old_queue = []
+    for frame, (held, presses) in enumerate(frames):
+        intended.extend(p for p in presses if p != "shoot")
+        if mode == "per-frame":
+            inputs = [{"direction": held, "shoot": "shoot" in presses}]
+        else:
+            inputs = []
+            for press in presses:
+                if press == "shoot":
+                    inputs.append({"shoot": True})
+                elif press != last_sent:
+                    last_sent = press
+                    inputs.append({"direction": press})
+        for data in inputs:
+            if mode != "per-frame":
+                seq += 1
+                data["seq"] = seq
+            messages += 1
+            sent_bytes += len(encode_message(dict(data, command="game_input")))
+            if mode == "per-frame":
+                old_queue.append(data)
+            else:
+                server.handle_game_input(room, None, data)
+        while frame + 1 >= next_tick:
+            next_tick += frames_per_tick
+            if mode == "per-frame":
+                for data in old_queue:
+                    server.apply_input(room, 0, data)
+                old_queue.clear()
+            else:
+                server.apply_pending_inputs(room)
+            direction = tuple(room.game_state.players.directions[0])
+            if direction != applied[-1]:
+                applied.append(direction)
+    seconds = len(frames) / FPS
+    return messages / seconds, sent_bytes / seconds, len(intended) - 1, len(applied) - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    frames = script(args.seconds, args.seed)
+    print(f"{'mode':<12}{'msgs/s':>9}{'bytes/s':>10}{'turns':>8}{'applied':>9}{'lost':>7}")
+    for mode in ("per-frame", "changes"):
+        rate, byte_rate, turns, applied = run(frames, mode)
+        print(f"{mode:<12}{rate:>9.1f}{byte_rate:>10.0f}{turns:>8}{applied:>9}{turns - applied:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Launcher background gradient: a line per row every frame vs one numpy write of cached rows.
+
+The menu redraws its animated gradient every frame at 60 frames a second.
+"lines" is what create_gradient_background did before: six sin/cos and a
+pygame.draw.line per row. "numpy" works out the row colors every frame
+with gradient_rows, one numpy expression, and writes them into the screen
+through pygame.surfarray. "cached" is create_gradient_background now,
+which writes the same way but works out the rows only when the end colors
+change.
+
+The three screens have to come out identical on every checked frame.
+
+Run from the repository root:
+    python -m benchmarks.launcher_gradient --sizes 750x750 3840x2160
+"""
+import argparse
+import math
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # The launcher's imports open a window
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')  # and it starts the mixer on import
+
+import pygame
+
+import launch_game
+from launch_game import create_gradient_background, gradient_colors, gradient_rows
+
+FPS = 60
+
+
+def draw_lines(surface, time):
+    """create_gradient_background before the numpy gradient."""
+    height = surface.get_height()
+    width = surface.get_width()
+    for y in range(height):
+        ratio = y / height
+        color1 = (
+            int((math.sin(time * 0.5) * 0.5 + 0.5) * 100),
+            int((math.sin(time * 0.3) * 0.5 + 0.5) * 50),
+            int((math.sin(time * 0.7) * 0.5 + 0.5) * 100)
+        )
+        color2 = (
+            int((math.cos(time * 0.6) * 0.5 + 0.5) * 50),
+            int((math.cos(time * 0.4) * 0.5 + 0.5) * 100),
+            int((math.cos(time * 0.8) * 0.5 + 0.5) * 100)
+        )
+        color = [
+            color1[i] * (1 - ratio) + color2[i] * ratio
+            for i in range(3)
+        ]
+        pygame.draw.line(surface, color, (0, y), (width, y))
+
+
+def draw_numpy(surface, time):
+    pixels = pygame.surfarray.pixels2d(surface).T
+    pixels[:] = gradient_rows(surface, *gradient_colors(time))[:, None]
+    del pixels
+
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=[(750, 750), (3840, 2160)],
+                        help="WIDTHxHEIGHT screens to draw")
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--check-every', type=int, default=10, help="compare the screens every this many frames")
+    args = parser.parse_args()
+
+    modes = {"lines": draw_lines, "numpy": draw_numpy, "cached": create_gradient_background}
+    print(f"{args.frames} frames at {FPS} fps, screens identical")
+    print(f"{'size':>11}{'mode':>8}{'ms/frame':>10}{'color changes/frame':>21}")
+    for size in args.sizes:
+        screens = {mode: pygame.Surface(size) for mode in modes}
+        times = dict.fromkeys(modes, 0.0)
+        launch_game._gradients.clear()
+        changes = 0
+        last_colors = None
+        for frame in range(args.frames):
+            now = frame / FPS
+            for mode, draw in modes.items():
+                start = time.perf_counter()
+                draw(screens[mode], now)
+                times[mode] += time.perf_counter() - start
+            colors = gradient_colors(now)
+            changes += colors != last_colors
+            last_colors = colors
+            if frame % args.check_every == 0:
+                expected = pygame.image.tobytes(screens["lines"], "RGB")
+                for mode in ("numpy", "cached"):
+                    assert pygame.image.tobytes(screens[mode], "RGB") == expected, f"{mode} differs at frame {frame}"
+
+        label = f"{size[0]}x{size[1]}"
+        for mode in modes:
+            per_frame = {"lines": 1, "numpy": 1, "cached": changes / args.frames}[mode]
+            print(f"{label:>11}{mode:>8}{times[mode] / args.frames * 1000:>10.3f}{per_frame:>21.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""Headless load test: bot clients playing real games against server.py.
+
+Bots connect in pairs on one asyncio loop, no pygame needed. The host
+creates a room, the guest joins it, both send ready and then play until the
+game ends or the run is over; finished pairs reconnect and start a new room.
+Bots steer away from walls and their own body, turn at random moments,
+shoot now and then and chat occasionally, sending only input changes like
+client.py does. Each bot acknowledges states so the server sends deltas.
+
+Reported: connection setup (TCP connect to welcome) and room setup (welcome
+to first state) times, input-to-state latency (a turn until the first state
+showing it), messages and bytes per second in both directions, and the
+server's CPU use from /proc (summed over its child processes, so sharded
+mode counts the workers).
+
+Bot decisions come from a fixed seed, so runs are reproducible up to timing.
+Run from the repository root:
+    python -m benchmarks.load_test --clients 200 --duration 30 --seed 1
+    python -m benchmarks.load_test --clients 200 --server-args="--shards 2"
+    python -m benchmarks.load_test --port 5556 --server-pid 1234  # running server
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import shlex
+import tempfile
+import time
+
+from benchmarks.common import percentile, start_server
+from protocol import MessageDecoder, encode_message
+from snapshots import apply_delta
+
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+TURN_INTERVAL = (0.3, 2.0)  # Seconds between voluntary turns
+SHOOT_CHANCE = 0.1  # Per turn
+CHAT_INTERVAL = (10.0, 40.0)
+CHAT_LINES = ["gg", "nice shot", "watch out", "hello", "rematch?"]
+
+
+class Stats:
+    def __init__(self):
+        self.connect_times = []
+        self.setup_times = []
+        self.latencies = []
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.received_messages = 0
+        self.received_bytes = 0
+        self.games = 0
+        self.errors = 0
+
+
+class BotConnection:
+    """One client connection that counts the traffic it sends and receives."""
+
+    def __init__(self, reader, writer, stats: Stats):
+        self.reader = reader
+        self.writer = writer
+        self.stats = stats
+        self.decoder = MessageDecoder()
+        self.pending = []
+        self.input_seq = 0
+
+    @classmethod
+    async def open(cls, port, stats: Stats):
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        conn = cls(reader, writer, stats)
+        await conn.wait_for("welcome")
+        stats.connect_times.append(time.perf_counter() - start)
+        return conn
+
+    def send(self, msg):
+        frame = encode_message(msg)
+        self.writer.write(frame)
+        self.stats.sent_messages += 1
+        self.stats.sent_bytes += len(frame)
+
+    def send_input(self, data):
+        self.input_seq += 1
+        self.send(dict(data, command="game_input", seq=self.input_seq))
+
+    async def read_message(self):
+        while not self.pending:
+            chunk = await self.reader.read(65536)
+            if not chunk:
+                raise ConnectionResetError("server closed connection")
+            self.stats.received_bytes += len(chunk)
+            self.pending.extend(self.decoder.feed(chunk))
+        self.stats.received_messages += 1
+        return self.pending.pop(0)
+
+    async def wait_for(self, *commands):
+        while True:
+            msg = await self.read_message()
+            if msg["command"] in commands:
+                return msg
+
+    def close(self):
+        self.writer.close()
+
+
+def safe_directions(body, direction, board_size):
+    """Directions other than reversing that do not run into a wall or the body next tick."""
+    head = body[0]
+    options = []
+    for candidate in DIRECTIONS:
+        if candidate == (-direction[0], -direction[1]):
+            continue
+        x, y = head[0] + candidate[0], head[1] + candidate[1]
+        if 0 <= x < board_size[0] and 0 <= y < board_size[1] and (x, y) not in body[1:-1]:
+            options.append(candidate)
+    return options
+
+
+async def play(conn: BotConnection, player: int, rng: random.Random, stats: Stats, end: float, joined: float):
+    """Play one game; return True if it ended before the run did.
+
+    Voluntary turns fire on their own timer, independent of state arrival, so
+    inputs land at random points within a tick like a person's would. Turns
+    to dodge a wall or the body are made as soon as a state shows the danger.
+    """
+    states = {}
+    state = None
+    outstanding = None  # (direction, sent at) of the turn not yet seen in a state
+    next_turn = time.perf_counter() + rng.uniform(*TURN_INTERVAL)
+    next_chat = time.perf_counter() + rng.uniform(*CHAT_INTERVAL)
+
+    def turn(now, urgent):
+        nonlocal outstanding, next_turn
+        body = state.players.positions[player - 1]
+        direction = tuple(state.players.directions[player - 1])
+        options = safe_directions(body, direction, state.board_size)
+        if urgent and direction in options:
+            return
+        turns = [d for d in options if d != direction]
+        if turns:
+            choice = rng.choice(turns)
+            data = {"direction": choice}
+            if rng.random() < SHOOT_CHANCE:
+                data["shoot"] = True
+            conn.send_input(data)
+            outstanding = (choice, now)
+        next_turn = now + rng.uniform(*TURN_INTERVAL)
+
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            return False
+        if state is not None and outstanding is None and now >= next_turn:
+            turn(now, urgent=False)
+        if now >= next_chat:
+            conn.send_input({"chat": rng.choice(CHAT_LINES)})
+            next_chat = now + rng.uniform(*CHAT_INTERVAL)
+        wake = min(end, next_chat, next_turn if outstanding is None else end)
+        try:
+            msg = await asyncio.wait_for(conn.read_message(), timeout=max(0.0, wake - now))
+        except asyncio.TimeoutError:
+            continue
+        if msg["command"] == "game_state":
+            new_state = msg["state"]
+        elif msg["command"] == "state_delta" and msg["base"] in states:
+            new_state = apply_delta(states[msg["base"]], msg)
+        else:
+            continue
+        now = time.perf_counter()
+        if state is None:
+            stats.setup_times.append(now - joined)
+        state = new_state
+        states[msg["seq"]] = state
+        for seq in [seq for seq in states if seq < msg["seq"] - 40]:
+            del states[seq]
+        conn.send({"command": "ack", "seq": msg["seq"]})
+        if state.game_over:
+            return True
+
+        direction = tuple(state.players.directions[player - 1])
+        if outstanding and direction == outstanding[0]:
+            stats.latencies.append(now - outstanding[1])
+            outstanding = None
+        if outstanding is None:
+            turn(now, urgent=True)
+
+
+async def run_pair(port, seed, stats: Stats, end: float, connect_slots: asyncio.Semaphore):
+    """Keep one host/guest pair playing games until the run ends."""
+    rng = random.Random(seed)
+    while time.perf_counter() < end:
+        conns = []
+        try:
+            async with connect_slots:
+                host = await BotConnection.open(port, stats)
+                conns.append(host)
+                guest = await BotConnection.open(port, stats)
+                conns.append(guest)
+            joined = time.perf_counter()
+            host.send({"command": "create_room", "room_name": f"bot-{seed}", "single_player": False})
+            room_id = (await host.wait_for("room_created"))["room_id"]
+            guest.send({"command": "join_room", "room_id": room_id})
+            await asyncio.gather(host.wait_for("start_game"), guest.wait_for("start_game"))
+            host.send({"command": "ready"})
+            guest.send({"command": "ready"})
+            finished = await asyncio.gather(play(host, 1, rng, stats, end, joined),
+                                            play(guest, 2, rng, stats, end, joined))
+            stats.games += any(finished)
+        except (OSError, asyncio.IncompleteReadError):
+            stats.errors += 1
+            await asyncio.sleep(0.1)
+        finally:
+            for conn in conns:
+                conn.close()
+
+
+def process_cpu_seconds(pid):
+    """CPU time of a process and all of its descendants, from /proc."""
+    ticks = os.sysconf('SC_CLK_TCK')
+    children = {}
+    times = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        times[int(entry)] = (int(fields[11]) + int(fields[12])) / ticks
+    total = 0.0
+    todo = [pid]
+    while todo:
+        current = todo.pop()
+        total += times.get(current, 0.0)
+        todo.extend(children.get(current, []))
+    return total
+
+
+async def load(port, clients, duration, seed, connect_batch):
+    stats = Stats()
+    end = time.perf_counter() + duration
+    connect_slots = asyncio.Semaphore(connect_batch)
+    await asyncio.gather(*(run_pair(port, seed * 100003 + i, stats, end, connect_slots)
+                           for i in range(clients // 2)))
+    return stats
+
+
+def report(stats: Stats, elapsed, cpu_seconds):
+    def ms(values, pct):
+        return f"{percentile(values, pct) * 1000:.1f}" if values else "-"
+
+    print(f"games finished   {stats.games} ({stats.errors} connection errors)")
+    for name, values in (("connect ms", stats.connect_times), ("room setup ms", stats.setup_times),
+                         ("input->state ms", stats.latencies)):
+        print(f"{name:<17}p50 {ms(values, 50):>8}  p95 {ms(values, 95):>8}  p99 {ms(values, 99):>8}"
+              f"  ({len(values)} samples)")
+    print(f"sent             {stats.sent_messages / elapsed:>10.0f} msgs/s {stats.sent_bytes / elapsed:>12.0f} B/s")
+    print(f"received         {stats.received_messages / elapsed:>10.0f} msgs/s "
+          f"{stats.received_bytes / elapsed:>12.0f} B/s")
+    if cpu_seconds is not None:
+        print(f"server CPU       {cpu_seconds:.2f} s ({cpu_seconds / elapsed * 100:.0f}% of one core)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=100, help='bot clients, two per room')
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--connect-batch', type=int, default=10,
+                        help='concurrent connects; the threaded server listens with a backlog of 10')
+    parser.add_argument('--server-args', default='', help='flags for the server.py started by this run')
+    parser.add_argument('--port', type=int, help='use an already running server on localhost')
+    parser.add_argument('--server-pid', type=int, help='pid of that server, for CPU use')
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = None
+        if args.port:
+            port, pid = args.port, args.server_pid
+        else:
+            proc, port = start_server(workdir, *shlex.split(args.server_args))
+            pid = proc.pid
+        try:
+            cpu_start = process_cpu_seconds(pid) if pid else None
+            start = time.perf_counter()
+            stats = asyncio.run(load(port, args.clients, args.duration, args.seed, args.connect_batch))
+            elapsed = time.perf_counter() - start
+            cpu_seconds = process_cpu_seconds(pid) - cpu_start if pid else None
+        finally:
+            if proc:
+                proc.kill()
+                proc.wait()
+    print(f"{args.clients} clients for {elapsed:.1f} s, seed {args.seed}, "
+          f"server {'pid %d' % pid if args.port else 'server.py ' + args.server_args}")
+    report(stats, elapsed, cpu_seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Lockstep rooms: clients stay in step, and bytes per tick vs acked deltas.
+
+First the determinism check: bots chase the food with random turns and
+shots through many seeded games, the server simulates them with
+simulate_rooms, and a client Simulation started from the encoded start_game
+message replays the encoded tick_inputs. Its state hash has to match the
+server's on every tick and its whole state at the end of every game.
+
+Then the bandwidth: rooms like those of benchmarks.state_delta (snakes
+stretched to each length, player 1 weaving, occasional shots and chat),
+on a board large enough to play every tick, send either acked deltas or
+relayed inputs. "B/tick" includes the first keyframe or start_game;
+"steady B/tick" leaves it out.
+
+Run from the repository root:
+    python -m benchmarks.lockstep --lengths 10 100 1000 10000 --players 2 16
+"""
+import argparse
+import random
+
+from benchmarks.common import make_room, make_server
+from benchmarks.state_delta import same_state
+from protocol import MessageDecoder, encode_message
+from simulation import Simulation, relayed_inputs, state_hash
+from snake_body import SnakeBody
+from snapshots import SnapshotTracker
+
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+def start_simulation(server, room, decoder):
+    """The client's Simulation, from the start_game message send_start would send."""
+    state = room.game_state
+    frame = encode_message({"command": "start_game", "player_number": 1, "state": state,
+                            "tick": state.tick, "seed": state.seed})
+    (msg,) = decoder.feed(frame)
+    msg["state"].tick, msg["state"].seed = msg["tick"], msg["seed"]
+    return Simulation(msg["state"], room.single_player), len(frame)
+
+
+def relay_tick(server, room, simulation, decoder):
+    """Simulate a tick on the server, replay it on the client and return the frame size."""
+    server.simulate_rooms([room])
+    frame = encode_message(server.tick_inputs_message(room))
+    (msg,) = decoder.feed(frame)
+    simulation.tick(relayed_inputs(msg))
+    return len(frame)
+
+
+def chase(rng, state, player):
+    """Head for the food, turning at random now and then."""
+    if rng.random() < 0.2:
+        return rng.choice(DIRECTIONS)
+    head, food = state.players.positions[player][0], state.food_pos
+    if head[0] != food[0]:
+        return (1, 0) if food[0] > head[0] else (-1, 0)
+    return (0, 1) if food[1] > head[1] else (0, -1)
+
+
+def check_determinism(server, games, max_ticks, seed):
+    rng = random.Random(seed)
+    ticks = eaten = 0
+    for game in range(games):
+        players = rng.choice([1, 2, 3, 4])
+        room = make_room(server, str(game), single_player=(players == 1), players=max(players, 2))
+        room.lockstep = True
+        room.game_state = server.create_game_state((rng.randrange(10, 30), rng.randrange(10, 30)),
+                                                   len(room.clients), seed=rng.getrandbits(32))
+        decoder = MessageDecoder()
+        simulation, _ = start_simulation(server, room, decoder)
+        state = room.game_state
+        while not state.game_over and state.tick < max_ticks:
+            for player in range(len(room.clients)):
+                data = {}
+                if rng.random() < 0.5:
+                    data["direction"] = chase(rng, state, player)
+                if rng.random() < 0.1:
+                    data["shoot"] = True
+                if rng.random() < 0.02:
+                    data["chat"] = f"tick {state.tick}"
+                if data:
+                    room.pending_inputs[player].append(data)
+            relay_tick(server, room, simulation, decoder)
+            assert state_hash(simulation.game_state) == state_hash(state), f"game {game} out of step at tick {state.tick}"
+        assert same_state(simulation.game_state, state) and simulation.game_state.tick == state.tick, \
+            f"game {game} diverged"
+        ticks += state.tick
+        eaten += sum(state.players.scores)
+    print(f"lockstep ok: {games} games, {ticks} ticks, {eaten} food eaten")
+
+
+def bandwidth(server, players, length, ticks, seed):
+    rng = random.Random(seed)
+    room = make_room(server, players=players)
+    room.lockstep = True
+    state = room.game_state = server.create_game_state((1000, 1000), players)
+    table = state.players
+    # Player 1 heads right from the left edge, the others trail off the right one,
+    # all far enough from the walls to play every tick
+    table.positions = [SnakeBody((5 - i, 500) for i in range(length))]
+    table.positions += [SnakeBody((900 + i, 20 + player) for i in range(length)) for player in range(1, players)]
+    tracker = SnapshotTracker()
+    decoder = MessageDecoder()
+    simulation, start_bytes = start_simulation(server, room, decoder)
+    delta_bytes = lockstep_bytes = 0
+    for tick in range(ticks):
+        if rng.random() < 0.2:
+            turn = rng.choice([(0, 1), (0, -1)]) if table.directions[0][0] else (1, 0)
+            room.pending_inputs[0].append({"direction": turn})
+        if rng.random() < 0.1:
+            room.pending_inputs[rng.randrange(1, players)].append({"shoot": True})
+        if rng.random() < 0.02:
+            room.pending_inputs[0].append({"chat": f"tick {tick}"})
+        lockstep_bytes += relay_tick(server, room, simulation, decoder)
+        msg = tracker.build_message(state)
+        delta_bytes += len(encode_message(msg))
+        tracker.acknowledge(msg["seq"])
+    assert not state.game_over and same_state(simulation.game_state, state), "client diverged"
+    return delta_bytes / ticks, (start_bytes + lockstep_bytes) / ticks, lockstep_bytes / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--players', type=int, nargs='+', default=[2, 16])
+    parser.add_argument('--ticks', type=int, default=300)
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    server = make_server()
+    check_determinism(server, args.games, args.ticks, args.seed)
+    print(f"{'players':>8}{'length':>8}{'delta B/tick':>14}{'lockstep B/tick':>17}{'steady B/tick':>15}")
+    for players in args.players:
+        for length in args.lengths:
+            delta, lockstep, steady = bandwidth(server, players, length, args.ticks, args.seed)
+            print(f"{players:>8}{length:>8}{delta:>14.1f}{lockstep:>17.1f}{steady:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Cost of metrics collection on the server's hot paths.
+
+Times tick_games over many rooms and the receive path (decode plus
+handle_command) for a stream of game_input frames, in memory and through a
+socket pair one frame per recv as a live server sees them. Each path runs
+with the real ServerMetrics and with every metric replaced by a stand-in
+whose methods do nothing. The stand-ins still pay for the method calls, so the
+per-operation costs printed first give the full price of each recording.
+
+Run from the repository root:
+    python -m benchmarks.metrics_overhead --rooms 1000
+"""
+import argparse
+import socket
+import threading
+import timeit
+
+from benchmarks.common import make_room, make_server
+from metrics import Counter, Histogram, TimedLock, Traffic
+from protocol import MessageDecoder, encode_message
+
+
+class Disabled:
+    """Stands in for any metric; every method does nothing."""
+
+    def inc(self, *args):
+        pass
+
+    dec = set = observe = observe_many = record = inc
+
+
+def disable(server):
+    metrics = server.metrics
+    for name, value in vars(metrics).items():
+        if isinstance(value, (Counter, Histogram, Traffic)):
+            setattr(metrics, name, Disabled())
+    server.lock = threading.Lock()
+
+
+def per_call_ns(function, number=200000):
+    return timeit.timeit(function, number=number) / number * 1e9
+
+
+def micro():
+    counter = Counter("c", "c", ("command",))
+    traffic = Traffic(Counter("m", "m", ("command",)), Counter("b", "b", ("command",)))
+    histogram = Histogram("h", "h")
+    timed = TimedLock(Histogram("w", "w"))
+    plain = threading.Lock()
+
+    def with_timed():
+        with timed:
+            pass
+
+    def with_plain():
+        with plain:
+            pass
+
+    print(f"{'operation':<28}{'ns':>8}")
+    print(f"{'Counter.inc (labelled)':<28}{per_call_ns(lambda: counter.inc(1, ('game_input',))):>8.0f}")
+    print(f"{'Traffic.record':<28}{per_call_ns(lambda: traffic.record('game_input', 13)):>8.0f}")
+    print(f"{'Histogram.observe':<28}{per_call_ns(lambda: histogram.observe(0.0003)):>8.0f}")
+    print(f"{'TimedLock acquire/release':<28}{per_call_ns(with_timed):>8.0f}")
+    print(f"{'Lock acquire/release':<28}{per_call_ns(with_plain):>8.0f}")
+
+
+def tick_path(room_count, enabled):
+    server = make_server()
+    if not enabled:
+        disable(server)
+    rooms = []
+    for i in range(room_count):
+        room = make_room(server, str(i))
+        server.rooms[room.id] = room
+        rooms.append(room)
+
+    def tick():
+        for room in rooms:
+            if room.game_state.game_over:
+                room.game_state = server.create_game_state()
+        server.tick_games()
+
+    return tick
+
+
+def receive_path(frames, enabled, over_socket=False):
+    server = make_server()
+    if not enabled:
+        disable(server)
+    room = make_room(server)
+    client = object()
+    room.clients[0] = client
+    server.rooms[room.id] = room
+    server.client_to_room[client] = room.id
+    data = [encode_message({"command": "game_input", "direction": (0, 1), "seq": i + 1})
+            for i in range(frames)]
+    sender, receiver = socket.socketpair()
+
+    def receive():
+        room.last_input_seq[0] = 0
+        for queue in room.pending_inputs:
+            queue.clear()
+        decoder = MessageDecoder()
+        if over_socket:
+            # One frame per recv, as arrives from a client sending input changes
+            for frame in data:
+                sender.sendall(frame)
+                for msg in server.decode_received(decoder, receiver.recv(65536)):
+                    server.handle_command(client, msg)
+        else:
+            for msg in server.decode_received(decoder, b''.join(data)):
+                server.handle_command(client, msg)
+
+    return receive
+
+
+def compare(make_path, number, repeat):
+    """Best time per call with metrics off and on, alternating runs to share machine noise."""
+    paths = (make_path(False), make_path(True))
+    best = [float('inf'), float('inf')]
+    for _ in range(repeat):
+        for i, path in enumerate(paths):
+            best[i] = min(best[i], timeit.timeit(path, number=number))
+    return best[0] / number, best[1] / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=1000)
+    parser.add_argument('--ticks', type=int, default=20)
+    parser.add_argument('--frames', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    micro()
+    print()
+    print(f"{'path':<28}{'metrics off':>12}{'metrics on':>12}{'overhead':>10}")
+    off, on = compare(lambda enabled: tick_path(args.rooms, enabled), args.ticks, args.repeat)
+    print(f"{f'tick_games, {args.rooms} rooms':<28}{off * 1e3:>10.2f}ms{on * 1e3:>10.2f}ms{(on / off - 1) * 100:>9.1f}%")
+    off, on = compare(lambda enabled: receive_path(args.frames, enabled), 1, args.repeat)
+    off, on = off / args.frames, on / args.frames
+    print(f"{'receive game_input':<28}{off * 1e6:>10.2f}us{on * 1e6:>10.2f}us{(on / off - 1) * 100:>9.1f}%")
+    off, on = compare(lambda enabled: receive_path(args.frames, enabled, over_socket=True), 1, args.repeat)
+    off, on = off / args.frames, on / args.frames
+    print(f"{'  with socket send/recv':<28}{off * 1e6:>10.2f}us{on * 1e6:>10.2f}us{(on / off - 1) * 100:>9.1f}%")
+
+
+if __name__ == '__main__':
+    main()
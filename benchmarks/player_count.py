@@ -0,0 +1,57 @@
+"""Tick cost by number of players in a room.
+
+Every player's snake starts in the spread-out layout create_game_state
+gives a room, and a quarter of the players fire each tick, so projectiles
+are always in flight. The room is stepped with apply_pending_inputs and
+update_game_state for a stretch of ticks that ends before any snake
+reaches a wall. "us/player" should stay flat as the room grows.
+
+Run from the repository root:
+    python -m benchmarks.player_count --players 2 4 8 16 32 64
+"""
+import argparse
+import time
+
+from benchmarks.common import make_room, make_server
+
+TURNS = [(0, 1), (0, -1)]
+
+
+def tick_us(server, players, board, ticks, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        room = make_room(server, players=players)
+        room.game_state = server.create_game_state((board, board), players)
+        server.occupancy(room)
+        start = time.perf_counter()
+        for tick in range(ticks):
+            for player in range(tick % 4, players, 4):
+                room.pending_inputs[player].append({"shoot": True})
+            if tick % 8 == 0:
+                # Weave up and down so snakes do not run off the board
+                for player in range(players):
+                    room.pending_inputs[player].append({"direction": TURNS[tick // 8 % 2]})
+            server.apply_pending_inputs(room)
+            server.update_game_state(room)
+        best = min(best, (time.perf_counter() - start) / ticks)
+        assert not room.game_state.game_over, "a snake crashed; use a larger board or fewer ticks"
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, nargs='+', default=[2, 4, 8, 16, 32, 64])
+    parser.add_argument('--board', type=int, default=200)
+    parser.add_argument('--ticks', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    server = make_server()
+    print(f"{'players':>8}{'us/tick':>10}{'us/player':>11}")
+    for players in args.players:
+        us = tick_us(server, players, args.board, args.ticks, args.repeat)
+        print(f"{players:>8}{us:>10.1f}{us / players:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
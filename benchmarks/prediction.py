@@ -0,0 +1,165 @@
+"""Client prediction: how soon your inputs show, and how often it is corrected.
+
+A room runs on the real server path (queued inputs, the tick, delta
+snapshots with the applied input seq) in simulated time, with each message
+taking half the round trip plus jitter to cross the link. A bot client
+draws 60 frames a second and turns every so often; so does the other
+player.
+
+For every turn, "latest state" is how long until the first frame that
+draws a state the server applied it to, which is what drawing the last
+received state shows. "predicted" is how long until the predictor's view
+has the snake heading the new way. "corrections" counts received states
+that moved your drawn head, and by how many cells; "remote step" is how
+far the other snake's head moves on screen per frame.
+
+Run from the repository root:
+    python -m benchmarks.prediction --rtt 100 --jitter 0 20
+"""
+import argparse
+import heapq
+import math
+import random
+
+from benchmarks.common import make_room, make_server, percentile
+from prediction import Predictor
+from protocol import MessageDecoder, encode_message
+from snapshots import SnapshotTracker, apply_delta
+from tick_scheduler import TICK_INTERVAL
+
+FRAME = 1 / 60
+BOARD = 100
+
+
+def steer(rng, state, player):
+    """A turn across the current heading, towards the middle of the board."""
+    (x, y), (dx, dy) = state.players.positions[player][0], state.players.directions[player]
+    if dx:
+        return (0, 1) if y < BOARD // 2 else (0, -1)
+    return (1, 0) if x < BOARD // 2 else (-1, 0)
+
+
+def run(rtt, jitter, seconds, seed):
+    rng = random.Random(seed)
+    server = make_server()
+    room = make_room(server)
+    room.game_state = server.create_game_state((BOARD, BOARD), 2)
+    tracker = SnapshotTracker()
+    decoder = MessageDecoder()
+    predictor = Predictor(0)
+    in_flight = {"server": [], "client": []}  # (arrival, order, payload) heaps per destination
+    order = 0
+    last_arrival = {"server": 0.0, "client": 0.0}
+
+    def send(now, destination, payload):
+        # TCP keeps order, so jitter never lets a message overtake the one before
+        nonlocal order
+        arrival = max(now + rtt / 2 + rng.uniform(0, jitter), last_arrival[destination])
+        last_arrival[destination] = arrival
+        heapq.heappush(in_flight[destination], (arrival, order, payload))
+        order += 1
+
+    to_server, to_client = in_flight["server"], in_flight["client"]
+
+    history, latest, latest_seq = {}, None, 0
+    seq = 0
+    waiting = []  # (seq, direction, sent at, shown predicted at)
+    latest_delays, predicted_delays, corrections = [], [], []
+    remote_steps, last_remote = [], None
+    next_tick = TICK_INTERVAL
+    next_turn = {0: 0.5, 1: 0.5}
+    now = 0.0
+    while now < seconds and not room.game_state.game_over:
+        now += FRAME
+        # The server: inputs that have arrived, then every tick due by now
+        while next_tick <= now:
+            while to_server and to_server[0][0] <= next_tick:
+                _, _, payload = heapq.heappop(to_server)
+                if payload["command"] == "ack":
+                    tracker.acknowledge(payload["seq"])
+                else:
+                    room.pending_inputs[0].append(payload)
+            # The other player's input goes straight into its queue
+            if next_tick >= next_turn[1]:
+                room.pending_inputs[1].append({"direction": steer(rng, room.game_state, 1)})
+                next_turn[1] = next_tick + rng.uniform(0.3, 1.2)
+            server.apply_pending_inputs(room)
+            server.update_game_state(room)
+            msg = tracker.build_message(room.game_state)
+            msg["input_seq"] = room.applied_input_seq[0]
+            send(next_tick, "client", encode_message(msg))
+            next_tick += TICK_INTERVAL
+
+        # The client: a turn now and then
+        if now >= next_turn[0] and latest is not None:
+            seq += 1
+            data = {"direction": steer(rng, predictor.view(now), 0)}
+            predictor.input_sent(seq, data, now)
+            send(now, "server", dict(data, command="game_input", seq=seq))
+            waiting.append([seq, data["direction"], now, None])
+            next_turn[0] = now + rng.uniform(0.3, 1.2)
+
+        # States that have arrived, and how far each moves your drawn head
+        while to_client and to_client[0][0] <= now:
+            _, _, frame = heapq.heappop(to_client)
+            (msg,) = decoder.feed(frame)
+            if msg["command"] == "game_state":
+                state = msg["state"]
+                state.tick = msg["tick"]
+            else:
+                state = apply_delta(history[msg["base"]], msg)
+            history[msg["seq"]] = state
+            before = predictor.view(now) if predictor.states else None
+            predictor.state_received(state, msg.get("input_seq", 0), now)
+            latest, latest_seq = state, msg.get("input_seq", 0)
+            send(now, "server", {"command": "ack", "seq": msg["seq"]})
+            if before is not None and not state.game_over:
+                was = before.players.positions[0][0]
+                head = predictor.view(now).players.positions[0][0]
+                jump = math.hypot(head[0] - was[0], head[1] - was[1])
+                if jump > 1e-9:
+                    corrections.append(jump)
+
+        # The frame
+        if latest is None:
+            continue
+        view = predictor.view(now)
+        for entry in waiting:
+            if entry[3] is None and view.players.directions[0] == entry[1]:
+                entry[3] = now
+        for entry in [entry for entry in waiting if entry[0] <= latest_seq]:
+            latest_delays.append(now - entry[2])
+            if entry[3] is not None:
+                predicted_delays.append(entry[3] - entry[2])
+            waiting.remove(entry)
+        remote = view.players.positions[1][0]
+        if last_remote is not None:
+            remote_steps.append(math.hypot(remote[0] - last_remote[0], remote[1] - last_remote[1]))
+        last_remote = remote
+    states = room.game_state.tick
+    return latest_delays, predicted_delays, corrections, remote_steps, states
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt', type=float, nargs='+', default=[100], help="round trip in ms")
+    parser.add_argument('--jitter', type=float, nargs='+', default=[0, 20], help="extra one-way delay up to this many ms")
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'rtt ms':>7}{'jitter':>7}{'turns':>6}{'latest state ms':>17}{'p95':>6}"
+          f"{'predicted ms':>14}{'p95':>6}{'frames':>7}{'corrections':>12}{'mean cells':>11}{'remote step':>12}{'max':>6}")
+    for rtt in args.rtt:
+        for jitter in args.jitter:
+            latest, predicted, corrections, steps, _ = run(rtt / 1000, jitter / 1000, args.seconds, args.seed)
+            mean = lambda values: sum(values) / len(values) if values else 0.0
+            frames = max(predicted) / FRAME if predicted else 0.0
+            print(f"{rtt:>7.0f}{jitter:>7.0f}{len(latest):>6}"
+                  f"{mean(latest) * 1000:>17.1f}{percentile(latest, 95) * 1000:>6.0f}"
+                  f"{mean(predicted) * 1000:>14.1f}{percentile(predicted, 95) * 1000:>6.0f}{frames:>7.1f}"
+                  f"{len(corrections):>12}{mean(corrections):>11.2f}{mean(steps):>12.3f}{max(steps):>6.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""snake_game projectile hits: end-point checks vs swept checks on the occupancy grid.
+
+Projectiles move PROJECTILE_SPEED cells a tick. Checking only where a move
+ends lets a projectile pass through a snake lying across its path; the
+swept check looks at every cell the move passes within one cell of.
+
+First a correctness pass compares OccupancyGrid.near_path with a scan of
+every segment's distance to the path, over random bodies and paths. Then
+projectiles are fired from every distance at a snake lying across their
+path, counting the hits each check finds. Last, the cost of checking one
+projectile against snakes of each length: the end-point scan the engine
+made before it kept a grid, the swept version of that scan, and the grid.
+
+Run from the repository root:
+    python -m benchmarks.projectile_sweep --lengths 10 1000 100000
+"""
+import argparse
+import math
+import random
+import timeit
+
+from occupancy import OccupancyGrid
+from snake_game import PROJECTILE_SPEED
+
+
+def path_distance(x, y, x0, y0, x1, y1):
+    """Distance from (x, y) to the path from (x0, y0) to (x1, y1)."""
+    dx, dy = x1 - x0, y1 - y0
+    length_sq = dx * dx + dy * dy
+    t = max(0.0, min(1.0, ((x - x0) * dx + (y - y0) * dy) / length_sq)) if length_sq else 0.0
+    return math.hypot(x - x0 - t * dx, y - y0 - t * dy)
+
+
+def swept_scan(body, path):
+    return any(path_distance(x, y, *path) < 1 for x, y in body)
+
+
+def end_point_scan(body, path):
+    return any(math.hypot(path[2] - x, path[3] - y) < 1 for x, y in body)
+
+
+def check_exact(cases, seed):
+    rng = random.Random(seed)
+    for _ in range(cases):
+        body = [(rng.randrange(-2, 30), rng.randrange(-2, 30)) for _ in range(rng.randrange(1, 60))]
+        grid = OccupancyGrid(body)
+        x0, y0 = rng.uniform(-5, 30), rng.uniform(-5, 30)
+        if rng.random() < 0.5:
+            # Snake-aligned shots from a cell, as the game fires them
+            x0, y0 = round(x0), round(y0)
+            dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        else:
+            angle = rng.uniform(0, 2 * math.pi)
+            dx, dy = math.cos(angle), math.sin(angle)
+        reach = rng.choice([0, PROJECTILE_SPEED, rng.uniform(0, 20)])
+        path = (x0, y0, x0 + dx * reach, y0 + dy * reach)
+        assert grid.near_path(*path) == swept_scan(body, path), f"near_path disagrees on {path} for {body}"
+    print(f"near_path matches the segment scan in {cases} random cases")
+
+
+def tunnelling():
+    """Fire along y = 0 from every start before a snake lying across x = 30."""
+    wall = [(30, y) for y in range(-10, 11)]
+    grid = OccupancyGrid(wall)
+    end_point = swept = 0
+    shots = PROJECTILE_SPEED * 4
+    for start in range(30 - shots, 30):
+        x = start
+        while x < 30 + PROJECTILE_SPEED:
+            path = (x, 0, x + PROJECTILE_SPEED, 0)
+            if end_point_scan(wall, path):
+                end_point += 1
+                break
+            x += PROJECTILE_SPEED
+        x = start
+        while x < 30 + PROJECTILE_SPEED:
+            if grid.near_path(x, 0, x + PROJECTILE_SPEED, 0):
+                swept += 1
+                break
+            x += PROJECTILE_SPEED
+    print(f"shots at a snake across the path: {shots}, end-point hits {end_point}, swept hits {swept}")
+
+
+def per_call_us(function):
+    number, _ = timeit.Timer(function).autorange()
+    return min(timeit.repeat(function, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--cases', type=int, default=20000)
+    args = parser.parse_args()
+
+    check_exact(args.cases, seed=1)
+    tunnelling()
+    print(f"{'length':>8}{'end-point scan us':>19}{'swept scan us':>15}{'swept grid us':>15}")
+    # A snake trailing off along y = 5 and a projectile crossing the board above it
+    path = (2, 3, 2 + PROJECTILE_SPEED, 3)
+    for length in args.lengths:
+        body = [(20 - i, 5) for i in range(length)]
+        grid = OccupancyGrid(body)
+        print(f"{length:>8}{per_call_us(lambda: end_point_scan(body, path)):>19.2f}"
+              f"{per_call_us(lambda: swept_scan(body, path)):>15.2f}"
+              f"{per_call_us(lambda: grid.near_path(*path)):>15.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Encode/decode cost and bytes per message: framed protocol vs pickle.
+
+Run from the repository root:
+    python -m benchmarks.protocol_codec --lengths 3 100 1000
+"""
+import argparse
+import pickle
+import timeit
+
+from protocol import MessageDecoder, encode_message
+from server import LobbyServer
+
+
+def make_state(length):
+    state = LobbyServer.create_game_state(None)
+    state.players.positions = [[(i % 25, i // 25) for i in range(length)],
+                               [(24 - i % 25, 24 - i // 25) for i in range(length)]]
+    state.projectiles = [(i, 3, 1, 0) for i in range(4)]
+    for i in range(5):
+        state.chat_messages.append(f"Player {i % 2 + 1}: message {i}")
+    return state
+
+
+def bench(name, msg, number):
+    frame = encode_message(msg)
+    pickled = pickle.dumps(msg)
+    decoder = MessageDecoder()
+    encode_us = timeit.timeit(lambda: encode_message(msg), number=number) / number * 1e6
+    decode_us = timeit.timeit(lambda: decoder.feed(frame), number=number) / number * 1e6
+    pickle_encode_us = timeit.timeit(lambda: pickle.dumps(msg), number=number) / number * 1e6
+    pickle_decode_us = timeit.timeit(lambda: pickle.loads(pickled), number=number) / number * 1e6
+    print(f"{name:<22}{len(frame):>9}{len(pickled):>9}"
+          f"{encode_us:>10.1f}{decode_us:>10.1f}{pickle_encode_us:>10.1f}{pickle_decode_us:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[3, 100, 1000])
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'message':<22}{'bytes':>9}{'pickle':>9}"
+          f"{'enc us':>10}{'dec us':>10}{'p.enc us':>10}{'p.dec us':>10}")
+    bench("game_input", {"command": "game_input", "direction": (0, -1), "shoot": True}, args.number)
+    bench("create_room", {"command": "create_room", "room_name": "Lobby", "single_player": False}, args.number)
+    bench("start_game", {"command": "start_game", "player_number": 2}, args.number)
+    for length in args.lengths:
+        msg = {"command": "game_state", "state": make_state(length)}
+        bench(f"game_state len={length}", msg, max(1, args.number // max(1, length // 10)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Input latency and tick cost with one global lock vs per-room locking.
+
+Fills the server with active rooms, runs the tick loop in one thread and
+several input threads submitting game_input to random rooms at a fixed total
+rate. In "global" mode the tick holds server.lock over every room and inputs
+take the same lock to apply; in "room" mode the server's tick_games locks one
+room at a time and inputs are queued for the next tick.
+
+Run from the repository root:
+    python -m benchmarks.room_contention --rooms 1000 --threads 8
+"""
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.common import make_room, make_server
+from tick_scheduler import TickScheduler
+
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+def restart_finished(server, room):
+    if room.game_state.game_over:
+        room.game_state = server.create_game_state()
+
+
+def global_tick(server, rooms):
+    with server.lock:
+        for room in rooms:
+            restart_finished(server, room)
+            server.update_game_state(room)
+
+
+def room_tick(server, rooms):
+    for room in rooms:
+        if room.game_state.game_over:
+            with room.lock:
+                restart_finished(server, room)
+    server.tick_games()
+
+
+def global_input(server, room, data):
+    with server.lock:
+        server.apply_input(room, 0, data)
+
+
+def room_input(server, room, data):
+    server.handle_game_input(room, None, data)
+
+
+def input_worker(server, rooms, submit, rate, stop, latencies, seed):
+    rng = random.Random(seed)
+    interval = 1.0 / rate
+    next_send = time.perf_counter()
+    while not stop.is_set():
+        room = rng.choice(rooms)
+        data = {"direction": rng.choice(DIRECTIONS), "shoot": rng.random() < 0.05}
+        start = time.perf_counter()
+        submit(server, room, data)
+        latencies.append(time.perf_counter() - start)
+        next_send += interval
+        time.sleep(max(0.0, next_send - time.perf_counter()))
+
+
+def run(mode, room_count, threads, rate, duration):
+    server = make_server()
+    rooms = []
+    for i in range(room_count):
+        room = make_room(server, str(i))
+        server.rooms[room.id] = room
+        rooms.append(room)
+    tick, submit = (global_tick, global_input) if mode == "global" else (room_tick, room_input)
+
+    scheduler = TickScheduler()
+    stop = threading.Event()
+    latencies = [[] for _ in range(threads)]
+    workers = [
+        threading.Thread(target=input_worker,
+                         args=(server, rooms, submit, rate / threads, stop, latencies[i], i))
+        for i in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    durations = []
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        for _ in range(scheduler.due_ticks()):
+            scheduler.run_tick(lambda: tick(server, rooms))
+            durations.append(scheduler.last_duration)
+        time.sleep(scheduler.time_until_next())
+    stop.set()
+    for worker in workers:
+        worker.join()
+    samples = sorted(x for per_thread in latencies for x in per_thread)
+    return samples, durations, scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=2000, help='total inputs per second')
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.rooms} rooms, {args.threads} input threads, {args.rate:.0f} inputs/s target")
+    print(f"{'mode':<8}{'inputs':>8}{'p50 us':>9}{'p99 us':>10}{'max ms':>9}"
+          f"{'tick ms':>9}{'tick max':>10}{'overruns':>10}")
+    for mode in ("global", "room"):
+        samples, durations, scheduler = run(mode, args.rooms, args.threads, args.rate, args.duration)
+        p50 = samples[len(samples) // 2]
+        p99 = samples[int(len(samples) * 0.99)]
+        print(f"{mode:<8}{len(samples):>8}{p50 * 1e6:>9.1f}{p99 * 1e6:>10.1f}{samples[-1] * 1000:>9.2f}"
+              f"{sum(durations) / len(durations) * 1000:>9.2f}{max(durations) * 1000:>10.2f}"
+              f"{scheduler.overruns:>10}")
+
+
+if __name__ == '__main__':
+    main()
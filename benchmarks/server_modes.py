@@ -0,0 +1,110 @@
+"""Compare connection count against input latency for the server modes.
+
+Starts server.py in a subprocess (threaded, then --asyncio), opens N client
+connections, gives each one a single player room and measures, for every
+connection concurrently, the time from a game_input until the first broadcast
+state that reflects it. Inputs are sent at a random point within the tick, so
+about half a tick interval of the latency is the wait for the next tick.
+
+Run from the repository root:
+    python -m benchmarks.server_modes --connections 50 200 1000
+"""
+import argparse
+import asyncio
+import random
+import resource
+import tempfile
+import time
+from collections import deque
+
+from benchmarks.common import percentile, start_server
+from protocol import MessageDecoder, encode_message
+from tick_scheduler import TICK_INTERVAL
+
+
+class MessageStream:
+    """Read decoded server messages one at a time from an asyncio reader."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.decoder = MessageDecoder()
+        self.pending = deque()
+
+    async def read_message(self):
+        while not self.pending:
+            chunk = await self.reader.read(65536)
+            if not chunk:
+                raise ConnectionResetError("server closed connection")
+            self.pending.extend(self.decoder.feed(chunk))
+        return self.pending.popleft()
+
+
+async def open_client(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    stream = MessageStream(reader)
+    await stream.read_message()  # welcome
+    writer.write(encode_message({"command": "create_room", "room_name": "bench", "single_player": True}))
+    while (await stream.read_message()).get("command") != "room_created":
+        pass
+    return stream, writer
+
+
+async def ping(stream, writer, rounds, latencies, rng):
+    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    for i in range(rounds):
+        await asyncio.sleep(rng.uniform(0, TICK_INTERVAL))
+        direction = directions[i % 4]
+        start = time.perf_counter()
+        writer.write(encode_message({"command": "game_input", "direction": direction}))
+        while True:
+            msg = await stream.read_message()
+            if msg["command"] == "game_state" and msg["state"].players.directions[0] == direction:
+                break
+        latencies.append(time.perf_counter() - start)
+
+
+async def measure(port, connections, rounds, connect_batch, seed=0):
+    rng = random.Random(seed)
+    clients = []
+    for i in range(0, connections, connect_batch):
+        batch = min(connect_batch, connections - i)
+        clients += await asyncio.gather(*(open_client(port) for _ in range(batch)))
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(ping(stream, writer, rounds, latencies, rng) for stream, writer in clients))
+    elapsed = time.perf_counter() - start
+    for _, writer in clients:
+        writer.close()
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, nargs='+', default=[10, 100, 500, 1000])
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--modes', nargs='+', default=['threaded', 'asyncio'])
+    parser.add_argument('--connect-batch', type=int, default=10)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    print(f"{'mode':<10}{'conns':>8}{'p50 ms':>10}{'p99 ms':>10}{'inputs/s':>12}")
+    for mode in args.modes:
+        for connections in args.connections:
+            with tempfile.TemporaryDirectory() as workdir:
+                proc, port = start_server(workdir, *(['--asyncio'] if mode == 'asyncio' else []))
+                try:
+                    latencies, elapsed = asyncio.run(
+                        measure(port, connections, args.rounds, args.connect_batch))
+                finally:
+                    proc.kill()
+                    proc.wait()
+            print(f"{mode:<10}{connections:>8}"
+                  f"{percentile(latencies, 50) * 1000:>10.2f}"
+                  f"{percentile(latencies, 99) * 1000:>10.2f}"
+                  f"{len(latencies) / elapsed:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Rooms ticked per second with the simulation split over 1..N processes.
+
+Each process plays the part of one shard: it fills a server with active
+rooms and runs tick_games back to back, restarting games that end. The
+total room count is split evenly between the processes, so the numbers show
+how far ticking scales once rooms no longer share one interpreter.
+
+Run from the repository root:
+    python -m benchmarks.shard_scaling --rooms 2000 --processes 1 2 4
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+from benchmarks.common import make_room, make_server
+
+
+def run_shard(room_count, duration, barrier, results):
+    server = make_server()
+    rooms = []
+    for i in range(room_count):
+        room = make_room(server, str(i))
+        server.rooms[room.id] = room
+        rooms.append(room)
+    barrier.wait()
+    room_ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        for room in rooms:
+            if room.game_state.game_over:
+                room.game_state = server.create_game_state()
+        server.tick_games()
+        room_ticks += room_count
+    results.put((room_ticks, time.perf_counter() - start))
+
+
+def run(processes, room_count, duration):
+    barrier = multiprocessing.Barrier(processes)
+    results = multiprocessing.Queue()
+    shard_sizes = [room_count // processes + (i < room_count % processes) for i in range(processes)]
+    workers = [multiprocessing.Process(target=run_shard, args=(size, duration, barrier, results))
+               for size in shard_sizes]
+    for worker in workers:
+        worker.start()
+    totals = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return sum(ticks / elapsed for ticks, elapsed in totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=2000)
+    parser.add_argument('--processes', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--duration', type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"{args.rooms} rooms, {os.cpu_count()} CPUs")
+    print(f"{'processes':<11}{'room-ticks/s':>14}{'speedup':>9}")
+    baseline = None
+    for processes in args.processes:
+        rate = run(processes, args.rooms, args.duration)
+        baseline = baseline or rate
+        print(f"{processes:<11}{rate:>14.0f}{rate / baseline:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
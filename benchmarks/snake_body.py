@@ -0,0 +1,74 @@
+"""Cost of one snake move by body representation and snake length.
+
+"copy" is the move single_player used to make (copy all but the tail,
+insert the new head, copy back), "list" the list insert(0)/pop() the other
+engines made, and "SnakeBody" the deque-backed body every engine keeps now.
+Also checks that a SnakeBody survives the save_game round trip: JSON lists
+back, and float coordinates from older saves.
+
+Run from the repository root:
+    python -m benchmarks.snake_body --lengths 10 1000 100000
+"""
+import argparse
+import json
+import timeit
+
+from snake_body import SnakeBody
+
+
+def line(length):
+    return [(-i, 0) for i in range(length)]
+
+
+def copy_move(body):
+    def move():
+        body_copy = body[:-1]
+        body_copy.insert(0, (body[0][0] + 1, 0))
+        body[:] = body_copy
+    return move
+
+
+def list_move(body):
+    def move():
+        body.insert(0, (body[0][0] + 1, 0))
+        body.pop()
+    return move
+
+
+def deque_move(body):
+    def move():
+        body.advance(body[0][0] + 1, 0)
+    return move
+
+
+def per_call_ns(function):
+    number, _ = timeit.Timer(function).autorange()
+    return min(timeit.repeat(function, number=number, repeat=3)) / number * 1e9
+
+
+def check_round_trip():
+    body = SnakeBody(line(5))
+    body.advance(1, 0)
+    body.grow()
+    saved = json.loads(json.dumps({"body": list(body)}))["body"]
+    assert SnakeBody(saved) == body, "round trip through JSON changed the body"
+    assert SnakeBody([[float(x), float(y)] for x, y in saved]) == body, "float save did not load"
+    print("save/load round trip ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[10, 1000, 100000])
+    args = parser.parse_args()
+
+    check_round_trip()
+    print(f"{'length':>8}{'copy ns':>12}{'list ns':>12}{'SnakeBody ns':>14}")
+    for length in args.lengths:
+        copy_ns = per_call_ns(copy_move(line(length)))
+        list_ns = per_call_ns(list_move(line(length)))
+        deque_ns = per_call_ns(deque_move(SnakeBody(line(length))))
+        print(f"{length:>8}{copy_ns:>12.0f}{list_ns:>12.0f}{deque_ns:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
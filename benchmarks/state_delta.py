@@ -0,0 +1,86 @@
+"""Bytes per room per tick for full GameState keyframes vs acked deltas.
+
+Every player's snake is stretched to each length, then the room is stepped
+with update_game_state while a simulated client applies every message it is
+sent and acks it. The client's reconstructed state is checked against the
+server's on every tick. "delta B/tick" includes the initial keyframe;
+"B/delta" is the steady state.
+
+Run from the repository root:
+    python -m benchmarks.state_delta --lengths 10 100 1000 10000 --players 2 16
+"""
+import argparse
+import random
+
+from benchmarks.common import make_room, make_server
+from protocol import MessageDecoder, encode_message
+from snake_body import SnakeBody
+from snapshots import PLAYER_COLUMNS, SCALAR_FIELDS, SnapshotTracker, apply_delta
+
+
+def same_state(a, b):
+    return (a.players.positions == b.players.positions
+            and sorted(a.projectiles) == sorted(b.projectiles)
+            and list(a.chat_messages) == list(b.chat_messages)
+            and all(getattr(a, name) == getattr(b, name) for name in SCALAR_FIELDS)
+            and all(getattr(a.players, name) == getattr(b.players, name) for name in PLAYER_COLUMNS))
+
+
+def run(server, players, length, ticks, seed):
+    rng = random.Random(seed)
+    room = make_room(server, players=players)
+    state = room.game_state
+    table = state.players
+    # Player 1 heads right from the left edge, the others trail off the right one
+    table.positions = [SnakeBody((5 - i, 5) for i in range(length))]
+    table.positions += [SnakeBody((20 + i, 20 - player % 16) for i in range(length)) for player in range(1, players)]
+    tracker = SnapshotTracker()
+    decoder = MessageDecoder()
+    history = {}
+    keyframe_bytes = delta_bytes = steady_bytes = 0
+    for tick in range(ticks):
+        if rng.random() < 0.2:
+            table.directions[0] = rng.choice([(0, 1), (0, -1)]) if table.directions[0][0] else (1, 0)
+        shooter = rng.randrange(1, players)
+        if rng.random() < 0.1 and table.charges[shooter]:
+            head, direction = table.positions[shooter][0], table.directions[shooter]
+            state.projectiles.append((head[0], head[1], direction[0], direction[1]))
+            table.charges[shooter] -= 1
+        if rng.random() < 0.02:
+            state.chat_messages.append(f"Player 1: tick {tick}")
+        server.update_game_state(room)
+
+        keyframe_bytes += len(encode_message({"command": "game_state", "state": state}))
+        frame = encode_message(tracker.build_message(state))
+        delta_bytes += len(frame)
+        (msg,) = decoder.feed(frame)
+        if msg["command"] == "game_state":
+            client_state = msg["state"]
+        else:
+            client_state = apply_delta(history[msg["base"]], msg)
+            steady_bytes += len(frame)
+        assert same_state(client_state, state), f"client diverged at tick {tick}"
+        history[msg["seq"]] = client_state
+        tracker.acknowledge(msg["seq"])
+    return (keyframe_bytes / ticks, delta_bytes / ticks,
+            steady_bytes / max(1, tracker.deltas), tracker.keyframes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--players', type=int, nargs='+', default=[2])
+    parser.add_argument('--ticks', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    server = make_server()
+    print(f"{'players':>8}{'length':>8}{'full B/tick':>14}{'delta B/tick':>14}{'B/delta':>10}{'keyframes':>11}")
+    for players in args.players:
+        for length in args.lengths:
+            full, delta, steady, keyframes = run(server, players, length, args.ticks, args.seed)
+            print(f"{players:>8}{length:>8}{full:>14.0f}{delta:>14.1f}{steady:>10.1f}{keyframes:>11}")
+
+
+if __name__ == '__main__':
+    main()
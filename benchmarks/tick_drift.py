@@ -0,0 +1,74 @@
+"""Achieved tick rate of sleep-after-update vs the fixed-timestep scheduler.
+
+For each room count, steps every room once per tick (no sockets attached)
+for a few seconds with the old `update; sleep(0.15)` loop and with
+TickScheduler, then reports the real period and the overrun counters.
+
+Run from the repository root:
+    python -m benchmarks.tick_drift --rooms 0 500 2000
+"""
+import argparse
+import time
+
+from benchmarks.common import make_room, make_server
+from tick_scheduler import TICK_INTERVAL, TickScheduler
+
+
+def populate(server, count):
+    server.rooms.clear()
+    for i in range(count):
+        room = make_room(server, str(i))
+        server.rooms[room.id] = room
+
+
+def reset_games(server):
+    # Keep every game running for the whole measurement
+    for room in server.rooms.values():
+        if room.game_state.game_over or room.game_state.tick % 15 == 0:
+            room.game_state = server.create_game_state()
+
+
+def step_all(server):
+    reset_games(server)
+    for room in server.rooms.values():
+        server.update_game_state(room)
+
+
+def sleep_loop(server, duration):
+    ticks = 0
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        step_all(server)
+        ticks += 1
+        time.sleep(TICK_INTERVAL)
+    return (time.monotonic() - start) / ticks, None
+
+
+def scheduled_loop(server, duration):
+    scheduler = TickScheduler()
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        for _ in range(scheduler.due_ticks()):
+            scheduler.run_tick(lambda: step_all(server))
+        time.sleep(scheduler.time_until_next())
+    return (time.monotonic() - start) / scheduler.ticks, scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, nargs='+', default=[0, 500, 2000])
+    parser.add_argument('--duration', type=float, default=3.0)
+    args = parser.parse_args()
+
+    server = make_server()
+    print(f"{'rooms':>7}{'sleep ms':>10}{'sched ms':>10}{'overruns':>10}{'late':>6}{'skipped':>9}")
+    for count in args.rooms:
+        populate(server, count)
+        old_period, _ = sleep_loop(server, args.duration)
+        new_period, scheduler = scheduled_loop(server, args.duration)
+        print(f"{count:>7}{old_period * 1000:>10.1f}{new_period * 1000:>10.1f}"
+              f"{scheduler.overruns:>10}{scheduler.late_ticks:>6}{scheduler.skipped_ticks:>9}")
+
+
+if __name__ == '__main__':
+    main()
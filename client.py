@@ -1,11 +1,22 @@
 from turtle import Screen
 import pygame
+import queue
 import socket
-import pickle
 import sys
 from pygame.math import Vector2
 import threading
 from save_game import load_game
+from protocol import MessageDecoder, ProtocolError, encode_message
+from simulation import Simulation, relayed_inputs
+from snapshots import apply_delta
+from prediction import Predictor, copy_state
+from snake_body import SnakeBody
+from game_state import BOARD_SIZE, VIEW_SIZE, GameState, PlayerTable, view_origin
+from occupancy import AREA_CHUNK
+from text_cache import render_text
+from dirty_rects import DirtyRenderer
+from collections import OrderedDict, deque
+from itertools import islice
 
 from single_player import MAX_PROJECTILES, PROJECTILE_COOLDOWN, Projectile
 
@@ -14,9 +25,11 @@ pygame.init()
 
 # Constants
 CELL_SIZE = 30
-CELL_NUMBER = 25
+CELL_NUMBER = VIEW_SIZE  # Cells shown per side; larger boards scroll to follow your snake
 SCREEN_SIZE = CELL_SIZE * CELL_NUMBER
 CHAT_HEIGHT = 150  # Height of chat area
+MINIMAP_SIZE = 120  # Side of the whole-board map drawn on boards with an area of interest
+TEXT_SIZE = 32  # Scores, stun and chat text
 
 # Colors
 BACKGROUND_COLOR = (40, 40, 40)
@@ -26,6 +39,8 @@ TEXT_COLOR = (255, 255, 255)
 PROJECTILE_COLOR = (255, 255, 0)
 CHAT_BG_COLOR = (30, 30, 30)
 CHAT_INPUT_COLOR = (50, 50, 50)
+CRASHED_COLOR = (90, 90, 90)  # Snakes out of the game
+MINIMAP_COLOR = (110, 110, 110)  # Chunks some snake covers
 
 # Predefined snake colors
 SNAKE_COLORS = {
@@ -39,10 +54,45 @@ SNAKE_COLORS = {
     "Red": (255, 0, 0)
 }
 
+# Other players' snakes take these in turn
+OTHER_COLORS = [SNAKE_COLORS[name] for name in ("Sky Blue", "Green", "Purple", "Orange", "Cyan", "Red")]
+
+# Messages the receive thread applies itself; the game loop handles the rest
+STATE_COMMANDS = {"start_game", "game_state", "state_delta", "tick_inputs", "area_state"}
+
+# Movement keys and shoot key per player
+CONTROLS = {
+    1: ({pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1), pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0)},
+        pygame.K_SPACE),
+    2: ({pygame.K_w: (0, -1), pygame.K_s: (0, 1), pygame.K_a: (-1, 0), pygame.K_d: (1, 0)},
+        pygame.K_LSHIFT),
+}
+
 class Client:
-    def __init__(self, host='localhost', start_port=5556):
+    def __init__(self, host='localhost', start_port=5556, dirty=False):
         self.client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.decoder = MessageDecoder()
+        self.pending_messages = []
+        # Once the game loop runs, a receive thread reads the socket: game
+        # messages update the state below under state_lock, the rest queue
+        # up in events for the loop
+        self.events = queue.Queue()
+        self.state_lock = threading.Lock()
+        self.send_lock = threading.Lock()  # Acks go out from the receive thread
+        self.replies = []  # Acks and desync reports, sent once state_lock is released
+        self.game_state = None
+        self.state_history = OrderedDict()  # seq -> GameState, bases for incoming deltas
+        self.input_seq = 0
+        self.last_direction = None  # Last direction sent, so held keys are not resent
         self.single_player = '--single-player' in sys.argv
+        self.lockstep = '--lockstep' in sys.argv  # Run the room's simulation here from relayed inputs
+        self.simulation = None
+        self.predictor = None  # What to draw between server states, from start_game on
+        self.lockstep_input_seq = 0  # Lockstep: seq of our last input a relayed tick applied
+        self.minimap = {}  # "chunks", "heads" and "food_chunk" from the latest area state carrying them
+        self.board_size = BOARD_SIZE
+        if '--board' in sys.argv:
+            self.board_size = int(sys.argv[sys.argv.index('--board') + 1])
         
         # Try to read port from file
         try:
@@ -63,22 +113,22 @@ class Client:
             sys.exit(1)
 
         try:
+            self.player_number = self.wait_for_message("welcome")["player_number"]
             if self.single_player:
                 # Create single player room
-                self.client.send(pickle.dumps({
-                    "command": "create_room",
+                self.send_command("create_room", {
                     "room_name": "Single Player",
-                    "single_player": True
-                }))
-                response = pickle.loads(self.client.recv(4096))
-                if response.get("command") == "room_created":
+                    "single_player": True,
+                    "board_size": (self.board_size, self.board_size),
+                    "lockstep": self.lockstep
+                })
+                response = self.wait_for_message("room_created", "error")
+                if response["command"] == "room_created":
                     print("Created single player room")
                     self.player_number = 1
                 else:
                     print("Failed to create single player room")
                     sys.exit(1)
-            else:
-                self.player_number = pickle.loads(self.client.recv(4096))
             print(f"You are Player {self.player_number}")
         except Exception as e:
             print(f"Error during initialization: {e}")
@@ -88,18 +138,78 @@ class Client:
         self.screen = pygame.display.set_mode((SCREEN_SIZE, SCREEN_SIZE + CHAT_HEIGHT))
         pygame.display.set_caption(f'Snake Battle - Player {self.player_number}')
         self.clock = pygame.time.Clock()
+        self.renderer = DirtyRenderer(self.screen, BACKGROUND_COLOR, dirty)
         
         # Chat input setup
         self.chat_input = ""
         self.chat_active = False
-        self.font = pygame.font.Font(None, 32)
         
         # Select color
         self.my_color = self.color_selection_screen()
 
+    def send_command(self, command, data=None):
+        """Send a command frame to the server."""
+        msg = {"command": command}
+        if data:
+            msg.update(data)
+        with self.send_lock:
+            self.client.sendall(encode_message(msg))
+
+    def receive_messages(self):
+        """Block until at least one complete message has arrived from the server."""
+        if self.decoder.error:
+            raise self.decoder.error
+        messages = []
+        while not messages:
+            raw = self.client.recv(65536)
+            if not raw:
+                raise ConnectionResetError("Server closed the connection")
+            messages = self.decoder.feed(raw)
+        return messages
+
+    def start_receiving(self):
+        """Hand the socket to a background receive thread, with anything already queued."""
+        for msg in self.pending_messages:
+            self.route_message(msg)
+        self.pending_messages = []
+        threading.Thread(target=self.receive_loop, daemon=True).start()
+
+    def receive_loop(self):
+        """Read and route server messages as they arrive, until the connection drops."""
+        try:
+            while True:
+                for msg in self.receive_messages():
+                    self.route_message(msg)
+        except (OSError, ProtocolError):  # ConnectionResetError included
+            self.events.put({"command": "connection_lost"})
+
+    def route_message(self, msg):
+        """Apply a game message to the state at once; queue anything else for the game loop."""
+        if msg["command"] in STATE_COMMANDS:
+            with self.state_lock:
+                self.handle_server_message(msg)
+            self.send_replies()
+        else:
+            self.events.put(msg)
+
+    def send_replies(self):
+        """Send the replies handling messages queued, outside state_lock so a
+        full socket buffer cannot hold up the frame."""
+        with self.state_lock:
+            replies, self.replies = self.replies, []
+        for command, data in replies:
+            self.send_command(command, data)
+
+    def wait_for_message(self, *commands):
+        """Block until one of the given commands arrives, queueing anything else."""
+        while True:
+            for i, msg in enumerate(self.pending_messages):
+                if msg["command"] in commands:
+                    return self.pending_messages.pop(i)
+            self.pending_messages.extend(self.receive_messages())
+
     def color_selection_screen(self):
         """Let player choose their snake color."""
-        font = pygame.font.Font(None, 48)
         button_size = 80
         gap = 20
         colors_per_row = 4
@@ -108,7 +218,7 @@ class Client:
             self.screen.fill(BACKGROUND_COLOR)
             
             # Draw title
-            title = font.render(f"Select Your Color (Player {self.player_number})", True, TEXT_COLOR)
+            title = render_text(f"Select Your Color (Player {self.player_number})", TEXT_COLOR, 48)
             title_rect = title.get_rect(center=(SCREEN_SIZE/2, 50))
             self.screen.blit(title, title_rect)
             
@@ -122,8 +232,7 @@ class Client:
                 rect = pygame.Rect(x, y, button_size, button_size)
                 pygame.draw.rect(self.screen, color_value, rect)
                 
-                font = pygame.font.Font(None, 24)
-                text = font.render(color_name, True, TEXT_COLOR)
+                text = render_text(color_name, TEXT_COLOR, 24)
                 text_rect = text.get_rect(center=rect.center)
                 self.screen.blit(text, text_rect)
                 color_rects[color_name] = rect
@@ -153,13 +262,13 @@ class Client:
         pygame.draw.rect(self.screen, CHAT_INPUT_COLOR, input_rect)
         
         # Draw chat input text
-        input_text = self.font.render(self.chat_input, True, TEXT_COLOR)
+        input_text = render_text(self.chat_input, TEXT_COLOR, TEXT_SIZE)
         self.screen.blit(input_text, (input_rect.x + 5, input_rect.y + 5))
         
         # Draw chat messages
         y_offset = SCREEN_SIZE + 10
         for message in game_state.chat_messages:
-            text = self.font.render(message, True, TEXT_COLOR)
+            text = render_text(message, TEXT_COLOR, TEXT_SIZE)
             self.screen.blit(text, (10, y_offset))
             y_offset += 25
 
@@ -182,63 +291,114 @@ class Client:
                     self.chat_input += event.unicode
         return None
 
+    def view_origin(self, game_state):
+        """Top-left board cell on screen, scrolled so your snake's head stays in view."""
+        positions = game_state.players.positions
+        body = positions[self.player_number - 1] if self.player_number <= len(positions) else None
+        if not body:
+            return 0, 0
+        return view_origin(game_state.board_size, body[0])
+
     def draw_game_state(self, game_state):
         """Draw the current game state."""
-        self.screen.fill(BACKGROUND_COLOR)
+        renderer = self.renderer
+        left, top = self.view_origin(game_state)
         
-        # Draw game elements
-        food_rect = pygame.Rect(
-            game_state.food_pos[0] * CELL_SIZE,
-            game_state.food_pos[1] * CELL_SIZE,
-            CELL_SIZE, CELL_SIZE
-        )
-        pygame.draw.rect(self.screen, FOOD_COLOR, food_rect, border_radius=10)
+        # Draw game elements; area states leave out food away from the view
+        if game_state.food_pos is not None:
+            food_rect = pygame.Rect(
+                (game_state.food_pos[0] - left) * CELL_SIZE,
+                (game_state.food_pos[1] - top) * CELL_SIZE,
+                CELL_SIZE, CELL_SIZE
+            )
+            renderer.add("food", food_rect, True, pygame.draw.rect, self.screen, FOOD_COLOR, food_rect, 0, 10)
         
-        # Draw snakes
-        for pos in game_state.snake1_pos:
-            rect = pygame.Rect(pos[0] * CELL_SIZE, pos[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            pygame.draw.rect(self.screen, self.my_color if self.player_number == 1 else SNAKE_COLORS["Sky Blue"],
-                           rect, border_radius=8)
-            
-        for pos in game_state.snake2_pos:
-            rect = pygame.Rect(pos[0] * CELL_SIZE, pos[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            pygame.draw.rect(self.screen, SNAKE_COLORS["Sky Blue"] if self.player_number == 1 else self.my_color,
-                           rect, border_radius=8)
+        # Draw snakes, skipping segments outside the view
+        players = game_state.players
+        me = self.player_number - 1
+        for player, body in enumerate(players.positions):
+            color = self.player_color(player)
+            if not players.alive[player]:
+                color = CRASHED_COLOR
+            for x, y in body:
+                if 0 <= x - left < CELL_NUMBER and 0 <= y - top < CELL_NUMBER:
+                    rect = pygame.Rect((x - left) * CELL_SIZE, (y - top) * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+                    renderer.add((player, rect.topleft), rect, color, pygame.draw.rect, self.screen, color, rect, 0, 8)
         
         # Draw projectiles
-        for proj in game_state.projectiles:
-            pygame.draw.circle(self.screen, PROJECTILE_COLOR,
-                             (int(proj[0] * CELL_SIZE), int(proj[1] * CELL_SIZE)), 5)
+        for i, proj in enumerate(game_state.projectiles):
+            center = (int((proj[0] - left) * CELL_SIZE), int((proj[1] - top) * CELL_SIZE))
+            renderer.add(("projectile", i), (center[0] - 5, center[1] - 5, 10, 10), center,
+                         pygame.draw.circle, self.screen, PROJECTILE_COLOR, center, 5)
         
-        # Draw scores
-        score1 = self.font.render(f'P1: {game_state.snake1_score}', True, 
-                           self.my_color if self.player_number == 1 else SNAKE_COLORS["Sky Blue"])
-        score2 = self.font.render(f'P2: {game_state.snake2_score}', True,
-                           SNAKE_COLORS["Sky Blue"] if self.player_number == 1 else self.my_color)
-        self.screen.blit(score1, (20, 20))
-        self.screen.blit(score2, (SCREEN_SIZE-120, 20))
+        # Draw scores: yours on the left, the best of the others on the right
+        if me >= len(players):
+            me = 0  # The welcome number can exceed the room's seats until start_game assigns one
+        self.add_text("score1", f'P{me + 1}: {players.scores[me]}', self.player_color(me), topleft=(20, 20))
+        others = [player for player in range(len(players)) if player != me]
+        if others:
+            leader = max(others, key=players.scores.__getitem__)
+            self.add_text("score2", f'P{leader + 1}: {players.scores[leader]}', self.player_color(leader),
+                          topleft=(SCREEN_SIZE-120, 20))
         
         # Draw projectile charges
-        charges = game_state.snake1_projectiles if self.player_number == 1 else game_state.snake2_projectiles
-        for i in range(charges):
-            pygame.draw.circle(self.screen, PROJECTILE_COLOR,
-                             (20 + i * 20, SCREEN_SIZE - 40), 5)
+        for i in range(players.charges[me]):
+            renderer.add(("charge", i), (15 + i * 20, SCREEN_SIZE - 45, 10, 10), True,
+                         pygame.draw.circle, self.screen, PROJECTILE_COLOR, (20 + i * 20, SCREEN_SIZE - 40), 5)
         
         # Draw stun indicators
-        if (self.player_number == 1 and game_state.snake1_stunned > 0) or \
-           (self.player_number == 2 and game_state.snake2_stunned > 0):
-            text = self.font.render("STUNNED!", True, TEXT_COLOR)
-            text_rect = text.get_rect(center=(SCREEN_SIZE/2, 50))
-            self.screen.blit(text, text_rect)
+        if players.stunned[me] > 0:
+            self.add_text("stunned", "STUNNED!", TEXT_COLOR, center=(SCREEN_SIZE/2, 50))
+        
+        if self.minimap:
+            # The heads' dots reach a little past the map
+            renderer.add("minimap", (SCREEN_SIZE - MINIMAP_SIZE - 12, SCREEN_SIZE - MINIMAP_SIZE - 12,
+                                     MINIMAP_SIZE + 4, MINIMAP_SIZE + 4),
+                         (left, top, game_state.board_size, self.minimap), self.draw_minimap, game_state, left, top)
         
         # Draw chat area
-        self.draw_chat(game_state)
+        renderer.add("chat", (0, SCREEN_SIZE, SCREEN_SIZE, CHAT_HEIGHT),
+                     (self.chat_input, tuple(game_state.chat_messages)), self.draw_chat, game_state)
         
         # Draw game over
         if game_state.game_over:
-            self.draw_game_over(game_state.winner)
+            renderer.add("game over", (0, 0, SCREEN_SIZE, SCREEN_SIZE), game_state.winner,
+                         self.draw_game_over, game_state.winner)
             
-        pygame.display.flip()
+        renderer.present()
+
+    def add_text(self, key, text, color, **anchor):
+        """Show `text` through the renderer, placed by a get_rect anchor such as center=(x, y)."""
+        surface = render_text(text, color, TEXT_SIZE)
+        text_rect = surface.get_rect(**anchor)
+        self.renderer.add(key, text_rect, (text, color), self.screen.blit, surface, text_rect)
+
+    def draw_minimap(self, game_state, left, top):
+        """Draw the whole board small in the bottom-right corner from the area
+        states' summary: chunks snakes cover, the food's chunk, every head and
+        the view."""
+        width, height = game_state.board_size
+        scale = MINIMAP_SIZE / max(width, height)
+        x0, y0 = SCREEN_SIZE - MINIMAP_SIZE - 10, SCREEN_SIZE - MINIMAP_SIZE - 10
+        pygame.draw.rect(self.screen, CHAT_BG_COLOR, (x0, y0, width * scale, height * scale))
+        chunk = max(AREA_CHUNK * scale, 1)
+        for cx, cy in self.minimap.get("chunks", ()):
+            pygame.draw.rect(self.screen, MINIMAP_COLOR,
+                             (x0 + cx * AREA_CHUNK * scale, y0 + cy * AREA_CHUNK * scale, chunk, chunk))
+        food = self.minimap.get("food_chunk")
+        if food:
+            pygame.draw.rect(self.screen, FOOD_COLOR,
+                             (x0 + food[0] * AREA_CHUNK * scale, y0 + food[1] * AREA_CHUNK * scale, chunk, chunk))
+        for player, (x, y) in enumerate(self.minimap.get("heads", ())):
+            pygame.draw.circle(self.screen, self.player_color(player), (x0 + x * scale, y0 + y * scale), 2)
+        pygame.draw.rect(self.screen, TEXT_COLOR,
+                         (x0 + left * scale, y0 + top * scale, CELL_NUMBER * scale, CELL_NUMBER * scale), 1)
+
+    def player_color(self, player):
+        """Your chosen color for your own snake; the others cycle through OTHER_COLORS."""
+        if player == self.player_number - 1:
+            return self.my_color
+        return OTHER_COLORS[player % len(OTHER_COLORS)]
 
     def draw_game_over(self, winner):
         """Draw game over screen."""
@@ -247,64 +407,17 @@ class Client:
         overlay.set_alpha(128)
         self.screen.blit(overlay, (0, 0))
         
-        font = pygame.font.Font(None, 64)
-        text = font.render(f"{winner} Wins!", True, TEXT_COLOR)
+        text = render_text(f"{winner} Wins!", TEXT_COLOR, 64)
         text_rect = text.get_rect(center=(SCREEN_SIZE/2, SCREEN_SIZE/2))
         self.screen.blit(text, text_rect)
-        
-        pygame.display.flip()
 
     def run(self):
-        """Main game loop."""
+        """Main game loop: input and drawing at the display rate, whatever the network does."""
+        self.start_receiving()
         running = True
         while running:
-            data = {}
-            
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                    
-                # Handle chat input
-                chat_data = self.handle_chat_input(event)
-                if chat_data:
-                    data.update(chat_data)
-            
-            # Only handle game controls if chat is not active
-            if not self.chat_active:
-                keys = pygame.key.get_pressed()
-                
-                # Handle movement
-                if self.player_number == 1:
-                    if keys[pygame.K_UP]:
-                        data["direction"] = (0, -1)
-                    elif keys[pygame.K_DOWN]:
-                        data["direction"] = (0, 1)
-                    elif keys[pygame.K_LEFT]:
-                        data["direction"] = (-1, 0)
-                    elif keys[pygame.K_RIGHT]:
-                        data["direction"] = (1, 0)
-                    data["shoot"] = keys[pygame.K_SPACE]
-                else:
-                    if keys[pygame.K_w]:
-                        data["direction"] = (0, -1)
-                    elif keys[pygame.K_s]:
-                        data["direction"] = (0, 1)
-                    elif keys[pygame.K_a]:
-                        data["direction"] = (-1, 0)
-                    elif keys[pygame.K_d]:
-                        data["direction"] = (1, 0)
-                    data["shoot"] = keys[pygame.K_LSHIFT]
-            
             try:
-                # Send input to server
-                self.client.send(pickle.dumps(data))
-                
-                # Get game state from server
-                game_state = pickle.loads(self.client.recv(4096))
-                
-                # Draw game state
-                self.draw_game_state(game_state)
-                
+                running = self.frame(pygame.event.get())
             except (ConnectionResetError, BrokenPipeError):
                 print("Lost connection to server")
                 running = False
@@ -314,6 +427,46 @@ class Client:
         pygame.quit()
         sys.exit()
 
+    def frame(self, events):
+        """Handle one frame's events and queued messages, then draw. False on quit."""
+        running = True
+        inputs = []
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+                
+            # Handle chat input
+            chat_data = self.handle_chat_input(event)
+            if chat_data:
+                inputs.append(chat_data)
+            # Only handle game controls if chat is not active
+            elif not self.chat_active and event.type == pygame.KEYDOWN:
+                change = self.game_controls(event.key)
+                if change:
+                    inputs.append(change)
+        
+        # Send only what changed since the last frame
+        for data in inputs:
+            self.send_input(data)
+        
+        # Messages the receive thread queued; game state is already applied
+        while True:
+            try:
+                msg = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if msg["command"] == "connection_lost":
+                raise ConnectionResetError("Server closed the connection")
+            self.handle_server_message(msg)
+        
+        # Draw your snake predicted from your inputs, the others interpolated;
+        # the view is a copy, so drawing needs no lock
+        with self.state_lock:
+            view = self.predictor.view() if self.predictor else None
+        if view:
+            self.draw_game_state(view)
+        return running
+
     def handle_events(self):
         """Handle pygame events."""
         for event in pygame.event.get():
@@ -337,25 +490,138 @@ class Client:
                             pygame.K_LEFT: (-1, 0),
                             pygame.K_RIGHT: (1, 0)
                         }[event.key]
-                        self.send_command("game_input", {"direction": direction})
+                        self.send_input({"direction": direction})
                     elif event.key == pygame.K_SPACE:  # Shoot projectile
-                        self.send_command("game_input", {"shoot": True})
+                        self.send_input({"shoot": True})
+
+    def game_controls(self, key):
+        """Turn a key press into a game_input change, or None if nothing changes."""
+        directions, shoot_key = CONTROLS[1 if self.player_number == 1 else 2]
+        if key == shoot_key:
+            return {"shoot": True}
+        direction = directions.get(key)
+        if direction and direction != self.last_direction:
+            self.last_direction = direction
+            return {"direction": direction}
+        return None
+
+    def send_input(self, data):
+        """Send one input change with the next sequence number.
+
+        The predictor hears of the input first, so a state applying it cannot
+        arrive before it does; the send itself happens outside the state lock.
+        """
+        with self.state_lock:
+            self.input_seq += 1
+            seq = self.input_seq
+            if self.predictor:
+                self.predictor.input_sent(seq, data)
+        self.send_command("game_input", dict(data, seq=seq))
+
+    def apply_state(self, state, seq, input_seq=0):
+        """Show a new state and acknowledge it so the server can delta against it.
+
+        The predictor replays on it the inputs sent after `input_seq`.
+        """
+        self.game_state = state
+        if self.predictor:
+            self.predictor.state_received(state, input_seq)
+        if seq is None:
+            return
+        self.state_history[seq] = state
+        while len(self.state_history) > 64:
+            self.state_history.popitem(last=False)
+        self.replies.append(("ack", {"seq": seq}))
+
+    def apply_area_state(self, msg):
+        """Show the area around your view and keep the summary of the rest for the minimap.
+
+        Players with nothing in the area get empty bodies, and every player's
+        direction, stun and charges but yours are left at rest.
+        """
+        count = len(msg["alive"])
+        positions = [[] for _ in range(count)]
+        for player, body in zip(msg["players"], msg["bodies"]):
+            positions[player] = body
+        me = self.player_number - 1
+        players = PlayerTable(
+            positions=positions, directions=[(0, 0)] * count, scores=msg["scores"],
+            stunned=[0] * count, charges=[0] * count, alive=msg["alive"], moves=[0] * count,
+        )
+        if me < count:
+            players.directions[me] = msg["direction"]
+            players.stunned[me] = msg["stunned"]
+            players.charges[me] = msg["charges"]
+        state = GameState(
+            players, msg.get("food_pos"), msg.get("projectiles", []), msg.get("game_over", False),
+            msg.get("winner", ""), deque(msg.get("chat_messages", ()), maxlen=5),
+            tick=msg["tick"], board_size=msg["board_size"],
+        )
+        if "minimap" in msg:
+            self.minimap = {"chunks": msg["minimap"], "heads": msg["heads"], "food_chunk": msg.get("food_chunk")}
+        self.apply_state(state, None, msg.get("input_seq", 0))
 
     def handle_server_message(self, msg):
         """Handle message from server."""
         if msg["command"] == "start_game":
             print("Game starting!")
+            self.player_number = msg.get("player_number", self.player_number)
             self.game_state = None
+            self.simulation = None
+            self.minimap = {}
+            self.predictor = Predictor(self.player_number - 1)
+            if "state" in msg:
+                # Lockstep room: simulate from this state; only inputs follow
+                state = msg["state"]
+                state.tick, state.seed = msg["tick"], msg["seed"]
+                self.simulation = Simulation(state, self.single_player)
+                self.game_state = state
+                self.lockstep_input_seq = msg.get("input_seq", 0)
+                self.predictor.state_received(copy_state(state), self.lockstep_input_seq)
+        elif msg["command"] == "tick_inputs":
+            self.step_simulation(msg)
         elif msg["command"] == "game_state":
-            self.game_state = msg["state"]
+            state = msg["state"]
+            state.tick = msg.get("tick", state.tick)
+            self.apply_state(state, msg.get("seq"), msg.get("input_seq", 0))
+        elif msg["command"] == "area_state":
+            self.apply_area_state(msg)
+        elif msg["command"] == "state_delta":
+            base = self.state_history.get(msg["base"])
+            if base is not None:
+                self.apply_state(apply_delta(base, msg), msg["seq"], msg.get("input_seq", 0))
         elif msg["command"] == "game_saved":
             print(f"Game saved to: {msg['save_path']}")
         elif msg["command"] == "error":
             print(f"Error: {msg['message']}")
 
+    def step_simulation(self, msg):
+        """Run the next tick of a lockstep room with the inputs the server applied.
+
+        Ticks the start state already covers are skipped. A tick that does
+        not follow on, or a state hash that differs from the server's, is
+        reported, and the server restarts this client from its state.
+        """
+        simulation = self.simulation
+        if simulation is None or msg["tick"] <= simulation.game_state.tick:
+            return
+        if msg["tick"] == simulation.game_state.tick + 1:
+            inputs = relayed_inputs(msg)
+            simulation.tick(inputs)
+            # Inputs are relayed in the order sent, so counting ours gives the last seq applied
+            me = self.player_number - 1
+            self.lockstep_input_seq += sum(1 for player, _ in inputs if player == me)
+            # The simulation changes its state in place; the predictor keeps each tick's
+            self.predictor.state_received(copy_state(simulation.game_state), self.lockstep_input_seq)
+            if "hash" not in msg or simulation.state_hash() == msg["hash"]:
+                return
+        print(f"Out of step with the server at tick {msg['tick']}")
+        self.simulation = None
+        self.replies.append(("desync", {"tick": msg["tick"], "hash": msg.get("hash")}))
+
 class Snake:
     def __init__(self, pos, color):
-        self.body = [Vector2(pos[0], pos[1])]
+        body = [(pos[0], pos[1])]
         self.direction = Vector2(1, 0)
         self.color = color
         self.alive = True
@@ -366,16 +632,18 @@ class Snake:
         
         # Add initial body segments
         for i in range(2):
-            self.body.append(Vector2(self.body[0].x - (i + 1), self.body[0].y))
+            body.append((body[0][0] - (i + 1), body[0][1]))
+        self.body = SnakeBody(body)
     
     def draw(self):
+        head = Vector2(self.body[0])
         # Draw body segments
-        for segment in self.body[1:]:
-            rect = pygame.Rect(segment.x * CELL_SIZE, segment.y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+        for x, y in islice(self.body, 1, None):
+            rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
             pygame.draw.rect(Screen, self.color, rect, border_radius=8)
         
         # Draw head
-        head_rect = pygame.Rect(self.body[0].x * CELL_SIZE, self.body[0].y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+        head_rect = pygame.Rect(head.x * CELL_SIZE, head.y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
         pygame.draw.rect(Screen, self.color, head_rect, border_radius=8)
         
         # Calculate eye positions based on direction
@@ -385,35 +653,35 @@ class Snake:
         
         # Base eye positions (when facing right)
         left_eye_pos = (
-            self.body[0].x * CELL_SIZE + eye_offset,
-            self.body[0].y * CELL_SIZE + eye_offset
+            head.x * CELL_SIZE + eye_offset,
+            head.y * CELL_SIZE + eye_offset
         )
         right_eye_pos = (
-            self.body[0].x * CELL_SIZE + eye_offset,
-            self.body[0].y * CELL_SIZE + CELL_SIZE - eye_offset
+            head.x * CELL_SIZE + eye_offset,
+            head.y * CELL_SIZE + CELL_SIZE - eye_offset
         )
         
         # Adjust eye positions based on direction
         if self.direction == Vector2(1, 0):  # Right
-            left_eye_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE - eye_offset, 
-                          self.body[0].y * CELL_SIZE + eye_offset)
-            right_eye_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE - eye_offset,
-                           self.body[0].y * CELL_SIZE + CELL_SIZE - eye_offset)
+            left_eye_pos = (head.x * CELL_SIZE + CELL_SIZE - eye_offset, 
+                          head.y * CELL_SIZE + eye_offset)
+            right_eye_pos = (head.x * CELL_SIZE + CELL_SIZE - eye_offset,
+                           head.y * CELL_SIZE + CELL_SIZE - eye_offset)
         elif self.direction == Vector2(-1, 0):  # Left
-            left_eye_pos = (self.body[0].x * CELL_SIZE + eye_offset,
-                          self.body[0].y * CELL_SIZE + eye_offset)
-            right_eye_pos = (self.body[0].x * CELL_SIZE + eye_offset,
-                           self.body[0].y * CELL_SIZE + CELL_SIZE - eye_offset)
+            left_eye_pos = (head.x * CELL_SIZE + eye_offset,
+                          head.y * CELL_SIZE + eye_offset)
+            right_eye_pos = (head.x * CELL_SIZE + eye_offset,
+                           head.y * CELL_SIZE + CELL_SIZE - eye_offset)
         elif self.direction == Vector2(0, -1):  # Up
-            left_eye_pos = (self.body[0].x * CELL_SIZE + eye_offset,
-                          self.body[0].y * CELL_SIZE + eye_offset)
-            right_eye_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE - eye_offset,
-                           self.body[0].y * CELL_SIZE + eye_offset)
+            left_eye_pos = (head.x * CELL_SIZE + eye_offset,
+                          head.y * CELL_SIZE + eye_offset)
+            right_eye_pos = (head.x * CELL_SIZE + CELL_SIZE - eye_offset,
+                           head.y * CELL_SIZE + eye_offset)
         else:  # Down
-            left_eye_pos = (self.body[0].x * CELL_SIZE + eye_offset,
-                          self.body[0].y * CELL_SIZE + CELL_SIZE - eye_offset)
-            right_eye_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE - eye_offset,
-                           self.body[0].y * CELL_SIZE + CELL_SIZE - eye_offset)
+            left_eye_pos = (head.x * CELL_SIZE + eye_offset,
+                          head.y * CELL_SIZE + CELL_SIZE - eye_offset)
+            right_eye_pos = (head.x * CELL_SIZE + CELL_SIZE - eye_offset,
+                           head.y * CELL_SIZE + CELL_SIZE - eye_offset)
         
         # Draw eyes
         pygame.draw.circle(Screen, eye_color, left_eye_pos, eye_size)
@@ -422,8 +690,8 @@ class Snake:
         # Draw tongue
         tongue_color = (255, 100, 100)  # Pink tongue
         tongue_start = (
-            self.body[0].x * CELL_SIZE + CELL_SIZE/2,
-            self.body[0].y * CELL_SIZE + CELL_SIZE/2
+            head.x * CELL_SIZE + CELL_SIZE/2,
+            head.y * CELL_SIZE + CELL_SIZE/2
         )
         
         # Calculate tongue end position based on direction
@@ -453,13 +721,11 @@ class Snake:
     
     def move(self):
         if self.alive and self.stunned <= 0:
-            body_copy = self.body[:-1]
-            new_head = Vector2(self.body[0].x + self.direction.x, self.body[0].y + self.direction.y)
-            body_copy.insert(0, new_head)
-            self.body = body_copy[:]
+            head = self.body[0]
+            self.body.advance(int(head[0] + self.direction.x), int(head[1] + self.direction.y))
     
     def grow(self):
-        self.body.append(self.body[-1])
+        self.body.grow()
         self.score += 1
     
     def shoot_projectile(self):
@@ -470,24 +736,10 @@ class Snake:
         return None
 
 if __name__ == "__main__":
-    single_player = '--single-player' in sys.argv
-    if len(sys.argv) > 1 and sys.argv[1] != '--single-player':
-        client = Client(host=sys.argv[1])
+    dirty = '--dirty-rects' in sys.argv  # Repaint and push only what changed since the last frame
+    if len(sys.argv) > 1 and not sys.argv[1].startswith('--'):
+        client = Client(host=sys.argv[1], dirty=dirty)
     else:
-        client = Client()
-    
-    # Create room for single player mode
-    if single_player:
-        client.client.send(pickle.dumps({
-            "command": "create_room",
-            "room_name": "Single Player",
-            "single_player": True
-        }))
-        response = pickle.loads(client.client.recv(4096))
-        if response.get("command") == "room_created":
-            print("Created single player room")
-        else:
-            print("Failed to create single player room")
-            sys.exit(1)
+        client = Client(dirty=dirty)
     
     client.run() 
\ No newline at end of file
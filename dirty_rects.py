@@ -0,0 +1,91 @@
+from typing import Dict, List, Tuple
+
+import pygame
+
+
+class DirtyRenderer:
+    """Draws a screen from a list of items, repainting only those that changed.
+
+    Each frame a screen adds what it shows, in drawing order: a key naming
+    the item, the rect it covers, a `look` that stays equal while the item
+    would draw the same, and the call that draws it. present() compares
+    them with the last frame. An item that appeared, went, moved or looks
+    different dirties its old and new rects, as does every item over a
+    dirty rect; those get the retained background back and their items
+    redrawn in order, and only they are pushed to the display.
+
+    Animated items, with a look of None, opt out: they are redrawn every
+    frame. With `dirty` off every frame is drawn whole and flipped, as the
+    screens did before; invalidate() has the next one drawn whole.
+    """
+
+    def __init__(self, screen: pygame.Surface, background, dirty: bool = False):
+        self.screen = screen
+        self.background = background  # A color, a surface the size of the screen, or None if an item covers it
+        self.dirty = dirty
+        self.items: List[Tuple] = []  # This frame's (key, rect, look, draw, args)
+        self.shown: Dict = {}  # Key -> (rect, look) as last presented
+        self.full = True
+        self.pushed: List[pygame.Rect] = []  # The rects the last present() repainted and pushed
+        self.pixels = 0  # And how many pixels they cover
+
+    def add(self, key, rect, look, draw, *args):
+        """Show `draw(*args)` this frame, covering `rect`."""
+        self.items.append((key, pygame.Rect(rect), look, draw, args))
+
+    def invalidate(self):
+        """Draw the next frame whole, as after something else drew on the screen."""
+        self.full = True
+
+    def present(self) -> List[pygame.Rect]:
+        """Repaint what changed, push it to the display and return the rects pushed."""
+        items, self.items = self.items, []
+        shown = {key: (rect, look) for key, rect, look, _, _ in items}
+        rects = [rect for _, rect, _, _, _ in items]
+        bounds = self.screen.get_rect()
+        drawn = range(len(items))
+        if self.full or not self.dirty:
+            dirty = [bounds]
+        else:
+            dirty = []
+            for key, (rect, look) in shown.items():
+                before = self.shown.get(key)
+                if before is None:
+                    dirty.append(rect)
+                elif look is None or before != (rect, look):
+                    dirty.append(rect)
+                    if before[0] != rect:
+                        dirty.append(before[0])
+            dirty += [rect for key, (rect, _) in self.shown.items() if key not in shown]
+            # Items are drawn whole, never clipped, so whatever an item over a
+            # dirty rect covers is dirty too, and so on
+            touched, grown = set(), dirty
+            while grown:
+                found = {i for area in grown for i in area.collidelistall(rects)} - touched
+                touched |= found
+                grown = [rects[i] for i in found]
+                dirty += grown
+            dirty = [rect.clip(bounds) for rect in dirty]
+            dirty = [rect for rect in dirty if rect.w and rect.h]
+            if sum(rect.w * rect.h for rect in dirty) >= bounds.w * bounds.h:
+                dirty = [bounds]  # As when the view scrolls: one pass over the screen beats many
+            else:
+                drawn = sorted(touched)
+        self.shown = shown
+        self.full = False
+
+        for area in dirty:
+            if isinstance(self.background, pygame.Surface):
+                self.screen.blit(self.background, area, area)
+            elif self.background is not None:
+                self.screen.fill(self.background, area)
+        for i in drawn:
+            _, _, _, draw, args = items[i]
+            draw(*args)
+        self.pushed = dirty
+        self.pixels = sum(rect.w * rect.h for rect in dirty)
+        if not self.dirty:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+        return dirty
@@ -0,0 +1,71 @@
+from dataclasses import dataclass, field
+from typing import List, Tuple
+from collections import deque
+
+BOARD_SIZE = 25  # Default board width and height in cells
+MIN_BOARD_SIZE = 10  # Room for both starting snakes
+MAX_BOARD_SIZE = 1000
+MAX_PLAYERS = 64  # Snakes per room
+VIEW_SIZE = BOARD_SIZE  # Cells a client shows per side; larger boards scroll with its snake
+AREA_MARGIN = 8  # Cells around a client's view that area states still cover
+
+
+def view_origin(board_size: Tuple[int, int], head) -> Tuple[int, int]:
+    """Top-left cell of the view that keeps `head` in the middle, short of the board's edges."""
+    width, height = board_size
+    left = min(max(int(head[0]) - VIEW_SIZE // 2, 0), max(width - VIEW_SIZE, 0))
+    top = min(max(int(head[1]) - VIEW_SIZE // 2, 0), max(height - VIEW_SIZE, 0))
+    return left, top
+
+
+def has_area_of_interest(board_size: Tuple[int, int]) -> bool:
+    """Whether a view and its margin can miss part of the board, so that
+    clients get area states rather than the whole state."""
+    return max(board_size) > VIEW_SIZE + 2 * AREA_MARGIN
+
+
+@dataclass
+class PlayerTable:
+    """Per-player columns of a room: player i is row i of every column.
+
+    The tick works through one column at a time over every player, so each
+    rule is a single pass whatever the number of snakes.
+    """
+    positions: List[List[Tuple[float, float]]] = field(default_factory=list)
+    directions: List[Tuple[float, float]] = field(default_factory=list)
+    scores: List[int] = field(default_factory=list)
+    stunned: List[int] = field(default_factory=list)
+    charges: List[int] = field(default_factory=list)  # Projectiles ready to fire
+    alive: List[bool] = field(default_factory=list)  # False once the snake has crashed
+    # Bookkeeping for delta snapshots: heads pushed per snake
+    moves: List[int] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def add(self, body, direction: Tuple[float, float], charges: int = 5) -> int:
+        """Append a player with a fresh score and return its index."""
+        self.positions.append(body)
+        self.directions.append(direction)
+        self.scores.append(0)
+        self.stunned.append(0)
+        self.charges.append(charges)
+        self.alive.append(True)
+        self.moves.append(0)
+        return len(self.positions) - 1
+
+@dataclass
+class GameState:
+    players: PlayerTable
+    food_pos: Tuple[float, float]
+    projectiles: List[Tuple[float, float, float, float]]
+    game_over: bool
+    winner: str
+    chat_messages: deque
+    # Ticks simulated, for delta snapshots
+    tick: int = 0
+    # Width and height in cells; fixed for the life of a room
+    board_size: Tuple[int, int] = (BOARD_SIZE, BOARD_SIZE)
+    # Seeds food respawns together with the tick, so a state and the
+    # inputs after it determine every later state
+    seed: int = 0
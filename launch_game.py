@@ -3,6 +3,7 @@ import sys
 import subprocess
 import threading
 from server import LobbyServer
+from game_state import BOARD_SIZE
 import math
 import os
 import numpy
@@ -18,7 +19,7 @@ from client import Client
 
 # Constants
 CELL_SIZE = 30
-CELL_NUMBER = 25
+CELL_NUMBER = BOARD_SIZE
 SCREEN_SIZE = CELL_SIZE * CELL_NUMBER
 
 # Button dimensions
@@ -248,28 +249,53 @@ NEON_YELLOW = (255, 255, 20)
 NEON_PURPLE = (191, 62, 255)
 NEON_ORANGE = (255, 153, 0)
 
-def create_gradient_background(surface, time):
-    """Create an animated gradient background."""
+GRADIENT_CACHE_SIZE = 2  # Background gradients kept, the oldest end colors dropped first
+_gradients = {}  # ((color1, color2), height, pixel masks) -> row colors
+
+def gradient_colors(time):
+    """The gradient's top and bottom colors at `time`."""
+    color1 = (
+        int((math.sin(time * 0.5) * 0.5 + 0.5) * 100),
+        int((math.sin(time * 0.3) * 0.5 + 0.5) * 50),
+        int((math.sin(time * 0.7) * 0.5 + 0.5) * 100)
+    )
+    color2 = (
+        int((math.cos(time * 0.6) * 0.5 + 0.5) * 50),
+        int((math.cos(time * 0.4) * 0.5 + 0.5) * 100),
+        int((math.cos(time * 0.8) * 0.5 + 0.5) * 100)
+    )
+    return color1, color2
+
+def gradient_rows(surface, color1, color2):
+    """Each row's color in `surface`'s pixel format, shading from color1 at the top to color2 at the bottom.
+
+    The colors come from one numpy expression, mapped to pixel values
+    through a one-pixel-wide strip in the surface's format.
+    """
     height = surface.get_height()
-    width = surface.get_width()
-    for y in range(height):
-        ratio = y / height
-        # Create shifting colors based on time
-        color1 = (
-            int((math.sin(time * 0.5) * 0.5 + 0.5) * 100),
-            int((math.sin(time * 0.3) * 0.5 + 0.5) * 50),
-            int((math.sin(time * 0.7) * 0.5 + 0.5) * 100)
-        )
-        color2 = (
-            int((math.cos(time * 0.6) * 0.5 + 0.5) * 50),
-            int((math.cos(time * 0.4) * 0.5 + 0.5) * 100),
-            int((math.cos(time * 0.8) * 0.5 + 0.5) * 100)
-        )
-        color = [
-            color1[i] * (1 - ratio) + color2[i] * ratio
-            for i in range(3)
-        ]
-        pygame.draw.line(surface, color, (0, y), (width, y))
+    ratio = numpy.arange(height) / height
+    colors = (numpy.multiply.outer(1 - ratio, color1) + numpy.multiply.outer(ratio, color2)).astype(numpy.uint8)
+    strip = pygame.Surface((1, height), 0, surface)
+    pygame.surfarray.blit_array(strip, colors[numpy.newaxis])
+    return pygame.surfarray.array2d(strip)[0]
+
+def create_gradient_background(surface, time):
+    """Create an animated gradient background.
+
+    A frame is one numpy write of the row colors into the surface, row by
+    contiguous row. The row colors only change with the end colors, which
+    are whole numbers and hold for a few frames at a time, so the last
+    GRADIENT_CACHE_SIZE pairs' rows are kept.
+    """
+    key = (gradient_colors(time), surface.get_height(), surface.get_masks())
+    rows = _gradients.get(key)
+    if rows is None:
+        rows = _gradients[key] = gradient_rows(surface, *key[0])
+        if len(_gradients) > GRADIENT_CACHE_SIZE:
+            del _gradients[next(iter(_gradients))]
+    pixels = pygame.surfarray.pixels2d(surface).T  # Indexed [y, x], each row contiguous
+    pixels[:] = rows[:, numpy.newaxis]
+    del pixels
 
 def create_rainbow_text(text, font, time):
     """Create rainbow colored text with neon effect."""
@@ -0,0 +1,220 @@
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+
+# Upper bounds in seconds, from 10 microseconds to one second
+TIME_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic count, optionally split by label values."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.values: Dict[Tuple, float] = {} if labels else {(): 0}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, labels: Tuple = ()):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = list(self.values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {value}" for labels, value in values]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, or is read from `function` at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), function: Callable = None):
+        super().__init__(name, help, labels)
+        self.function = function
+
+    def dec(self, amount: float = 1, labels: Tuple = ()):
+        self.inc(-amount, labels)
+
+    def set(self, value: float, labels: Tuple = ()):
+        with self.lock:
+            self.values[labels] = value
+
+    def render(self) -> List[str]:
+        if self.function is not None:
+            return [f"{self.name} {self.function()}"]
+        return super().render()
+
+
+class Traffic:
+    """Message and byte counters per command, updated together under one lock."""
+
+    def __init__(self, messages: Counter, bytes: Counter):
+        self.messages = messages
+        self.bytes = bytes
+        bytes.lock = messages.lock
+
+    def record(self, command: str, size: int):
+        labels = (command,)
+        with self.messages.lock:
+            values = self.messages.values
+            values[labels] = values.get(labels, 0) + 1
+            values = self.bytes.values
+            values[labels] = values.get(labels, 0) + size
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=TIME_BUCKETS, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        self.counts: Dict[Tuple, List[int]] = {}  # Per bucket, last one is +Inf
+        self.sums: Dict[Tuple, float] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple = ()):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.counts.get(labels)
+            if counts is None:
+                counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+                self.sums[labels] = 0.0
+            counts[index] += 1
+            self.sums[labels] += value
+
+    def observe_many(self, values: List[float], labels: Tuple = ()):
+        """Observe several values, taking the lock once."""
+        indexes = [bisect_left(self.buckets, value) for value in values]
+        with self.lock:
+            counts = self.counts.get(labels)
+            if counts is None:
+                counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+                self.sums[labels] = 0.0
+            for index in indexes:
+                counts[index] += 1
+            self.sums[labels] += sum(values)
+
+    def render(self) -> List[str]:
+        with self.lock:
+            series = [(labels, list(counts), self.sums[labels]) for labels, counts in self.counts.items()]
+        lines = []
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                label_text = _format_labels(self.label_names, labels, [("le", bound)])
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {total}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class TimedLock:
+    """threading.Lock that records how long each acquire waited."""
+
+    def __init__(self, histogram: Histogram):
+        self.lock = threading.Lock()
+        self.histogram = histogram
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self.lock.acquire()
+        self.histogram.observe(time.perf_counter() - start)
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Serve /metrics from a background thread."""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the server log
+
+        httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        return httpd
+
+
+class ServerMetrics(Registry):
+    """The metrics a LobbyServer records."""
+
+    def __init__(self, rooms: Callable[[], int]):
+        super().__init__()
+        self.tick_duration = self.register(Histogram(
+            "snake_tick_duration_seconds", "Time to simulate and broadcast one tick of every room."))
+        self.tick_overruns = self.register(Counter(
+            "snake_tick_overruns_total", "Ticks that took longer than the interval (long), ran late to catch up "
+            "(late) or were skipped, by kind.", ("kind",)))
+        self.room_simulation = self.register(Histogram(
+            "snake_room_simulation_seconds", "Time to apply inputs and simulate one room for one tick."))
+        self.lock_wait = self.register(Histogram(
+            "snake_lock_wait_seconds", "Time spent waiting for the server-wide room table lock."))
+        self.received = Traffic(
+            self.register(Counter("snake_messages_received_total", "Messages received from clients.",
+                                  ("command",))),
+            self.register(Counter("snake_bytes_received_total", "Frame bytes received from clients.",
+                                  ("command",))))
+        self.sent = Traffic(
+            self.register(Counter("snake_messages_sent_total", "Messages sent to clients.", ("command",))),
+            self.register(Counter("snake_bytes_sent_total", "Frame bytes sent to clients.", ("command",))))
+        self.undecodable = self.register(Counter(
+            "snake_undecodable_messages_total", "Frames skipped because their body did not decode."))
+        self.dropped = self.register(Counter(
+            "snake_dropped_messages_total", "Messages or connections dropped, by reason.", ("reason",)))
+        self.desyncs = self.register(Counter(
+            "snake_lockstep_desyncs_total", "State hashes lockstep clients found different from the server's."))
+        self.rooms = self.register(Gauge("snake_rooms", "Rooms currently open.", function=rooms))
+        self.connections = self.register(Gauge("snake_connections", "Client connections currently open."))
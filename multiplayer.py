@@ -2,14 +2,16 @@ import pygame
 import sys
 from pygame.math import Vector2
 from single_player import Snake, CELL_SIZE, CELL_NUMBER, SCREEN_SIZE, BACKGROUND_COLOR, screen, clock
+from dirty_rects import DirtyRenderer
 
 class MultiplayerGame:
-    def __init__(self):
+    def __init__(self, dirty=False):
         # Create two snakes with different starting positions and colors
         self.snake1 = Snake((5, 5), (255, 66, 161))  # Pink snake
         self.snake2 = Snake((CELL_NUMBER-5, CELL_NUMBER-5), (0, 255, 255))  # Cyan snake
         self.game_over = False
         self.winner = None
+        self.renderer = DirtyRenderer(screen, BACKGROUND_COLOR, dirty)
         
     def update(self):
         if not self.game_over:
@@ -30,41 +32,40 @@ class MultiplayerGame:
     def check_collisions(self):
         # Wall collisions
         for snake in [self.snake1, self.snake2]:
-            if not (0 <= snake.body[0].x < CELL_NUMBER and 
-                    0 <= snake.body[0].y < CELL_NUMBER):
+            if not (0 <= snake.body[0][0] < CELL_NUMBER and 
+                    0 <= snake.body[0][1] < CELL_NUMBER):
                 self.game_over = True
                 self.winner = self.snake2 if snake == self.snake1 else self.snake1
         
-        # Snake collisions with self
-        if self.snake1.body[0] in self.snake1.body[1:]:
+        # Snake collisions with self (the head's own cell counts once)
+        head1, head2 = self.snake1.body[0], self.snake2.body[0]
+        if self.snake1.occupancy.count(head1) > 1:
             self.game_over = True
             self.winner = self.snake2
-        if self.snake2.body[0] in self.snake2.body[1:]:
+        if self.snake2.occupancy.count(head2) > 1:
             self.game_over = True
             self.winner = self.snake1
             
         # Snake collisions with each other
-        if self.snake1.body[0] in self.snake2.body or self.snake2.body[0] in self.snake1.body:
+        if head1 in self.snake2.occupancy or head2 in self.snake1.occupancy:
             self.game_over = True
             # If head-on collision, no winner
-            if self.snake1.body[0] == self.snake2.body[0]:
+            if head1 == head2:
                 self.winner = None
             else:
                 # Winner is the snake that didn't collide with the other's body
-                self.winner = self.snake2 if self.snake1.body[0] in self.snake2.body else self.snake1
+                self.winner = self.snake2 if head1 in self.snake2.occupancy else self.snake1
     
     def draw(self):
-        screen.fill(BACKGROUND_COLOR)
-        
         # Draw both snakes
-        self.snake1.draw()
-        self.snake2.draw()
+        self.snake1.add_to(self.renderer, "snake1")
+        self.snake2.add_to(self.renderer, "snake2")
         
-        # Draw game over screen if needed
+        # Draw game over screen if needed; nothing moves once the game is over
         if self.game_over:
-            self.draw_game_over()
+            self.renderer.add("game over", screen.get_rect(), True, self.draw_game_over)
         
-        pygame.display.flip()
+        self.renderer.present()
     
     def draw_game_over(self):
         # Semi-transparent overlay
@@ -98,8 +99,8 @@ class MultiplayerGame:
         restart_rect = restart_text.get_rect(center=(SCREEN_SIZE/2, SCREEN_SIZE/2 + 120))
         screen.blit(restart_text, restart_rect)
 
-def run_multiplayer_game():
-    game = MultiplayerGame()
+def run_multiplayer_game(dirty=False):
+    game = MultiplayerGame(dirty)
     
     SCREEN_UPDATE = pygame.USEREVENT
     pygame.time.set_timer(SCREEN_UPDATE, 150)  # Same speed as single player
@@ -114,7 +115,7 @@ def run_multiplayer_game():
             if event.type == pygame.KEYDOWN:
                 if game.game_over:
                     if event.key == pygame.K_SPACE:
-                        game = MultiplayerGame()  # Reset game
+                        game = MultiplayerGame(dirty)  # Reset game
                     elif event.key == pygame.K_ESCAPE:
                         return  # Return to mode selection
                 else:
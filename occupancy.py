@@ -0,0 +1,279 @@
+import math
+import random
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+Cell = Tuple[int, int]
+
+# Boards up to this many cells keep FreeCells' list of free cells from the start
+LIST_CELLS = 4096
+AREA_CHUNK = 16  # Side in cells of the squares AreaIndex files segments under
+
+
+class OccupancyGrid:
+    """Number of snake segments on each cell, kept in step with a body.
+
+    Update it as the body changes: `add` the new head and `remove` the
+    retired tail on a move, `grow` by the duplicated tail. Every query
+    is then a single dict lookup instead of a scan over the body. Cells are
+    (x, y) tuples; off-board cells are allowed, so a head that just left
+    the board still counts until the wall check ends the game. `body` is
+    the sequence the grid was built from, for callers that need to notice
+    a body being replaced wholesale. A grid given `free` takes each cell
+    it starts occupying out of that FreeCells and puts back each cell it
+    leaves. A grid given `area` files its cells there under `player`.
+    """
+
+    def __init__(self, body: Iterable = (), free: Optional['FreeCells'] = None,
+                 area: Optional['AreaIndex'] = None, player: int = 0):
+        self.body = body
+        self.free = free
+        self.area = area
+        self.player = player
+        self.counts: Dict[Cell, int] = {}
+        self.pushes = 0  # Cells added since the grid was built
+        for order, segment in enumerate(body):
+            # Head first, so the further back a segment the lower its order
+            self._add((segment[0], segment[1]), -order)
+
+    def add(self, cell: Cell):
+        self.pushes += 1
+        self._add(cell, self.pushes)
+
+    def grow(self, cell: Cell):
+        """Count the copy of the tail segment a growing body appends."""
+        self.counts[cell] += 1
+
+    def _add(self, cell: Cell, order: int):
+        count = self.counts.get(cell, 0)
+        self.counts[cell] = count + 1
+        if not count and self.free is not None:
+            self.free.take(cell)
+        if self.area is not None and (not count or order > 0):
+            # A head on a cell the body still covers is filed as the head
+            self.area.add(cell, self.player, order)
+
+    def remove(self, cell: Cell):
+        count = self.counts[cell] - 1
+        if count:
+            self.counts[cell] = count
+        else:
+            del self.counts[cell]
+            if self.free is not None:
+                self.free.release(cell)
+            if self.area is not None:
+                self.area.remove(cell, self.player)
+
+    def clear(self):
+        """Forget every segment, handing the cells back to the free set."""
+        for cell in self.counts:
+            if self.free is not None:
+                self.free.release(cell)
+            if self.area is not None:
+                self.area.remove(cell, self.player)
+        self.counts = {}
+
+    def count(self, cell: Cell) -> int:
+        return self.counts.get(cell, 0)
+
+    def __contains__(self, cell: Cell) -> bool:
+        return cell in self.counts
+
+    def near_path(self, x0: float, y0: float, x1: float, y1: float) -> bool:
+        """Whether a segment lies closer than one cell to some point of the
+        path from (x0, y0) to (x1, y1), such as a projectile's move.
+
+        Only the cells cells_near_path yields can be that close, so the
+        cost follows the length of the path, not of the snake.
+        """
+        counts = self.counts
+        # Shots fly along a row or column from a cell, and then only the
+        # cells of that line within one of the path can be close enough
+        if y0 == y1 and float(y0).is_integer():
+            y = int(y0)
+            return any((x, y) in counts for x in range(math.floor(min(x0, x1)), math.ceil(max(x0, x1)) + 1))
+        if x0 == x1 and float(x0).is_integer():
+            x = int(x0)
+            return any((x, y) in counts for y in range(math.floor(min(y0, y1)), math.ceil(max(y0, y1)) + 1))
+        return any(cell in counts for cell in cells_near_path(x0, y0, x1, y1))
+
+
+def cells_near_path(x0: float, y0: float, x1: float, y1: float) -> Iterator[Cell]:
+    """Every cell closer than one cell to some point of the path from (x0, y0) to (x1, y1).
+
+    The path is walked a whole cell at a time along its longer axis. At each
+    step the candidates are the cells within one of the path's span on the
+    other axis, and those whose exact distance to the path is under one are
+    yielded. A path of length zero is a point.
+    """
+    steep = abs(y1 - y0) > abs(x1 - x0)
+    if steep:
+        x0, y0, x1, y1 = y0, x0, y1, x1
+    if x0 > x1:
+        x0, y0, x1, y1 = x1, y1, x0, y0
+    dx, dy = x1 - x0, y1 - y0
+    length_sq = dx * dx + dy * dy
+    slope = dy / dx if dx else 0.0
+    for u in range(math.floor(x0), math.ceil(x1) + 1):
+        # The part of the path less than one away from u on the long axis
+        v0 = y0 + (max(x0, u - 1) - x0) * slope
+        v1 = y0 + (min(x1, u + 1) - x0) * slope
+        for v in range(math.floor(min(v0, v1)), math.ceil(max(v0, v1)) + 1):
+            t = ((u - x0) * dx + (v - y0) * dy) / length_sq if length_sq else 0.0
+            t = 0.0 if t < 0 else 1.0 if t > 1 else t
+            ex, ey = u - x0 - t * dx, v - y0 - t * dy
+            if ex * ex + ey * ey < 1:
+                yield (v, u) if steep else (u, v)
+
+
+class FreeCells:
+    """Board cells that no snake occupies, with uniform sampling in constant time.
+
+    `cells` lists the free cell numbers (y * width + x) in no particular
+    order and `index` gives each free cell's position in it. Taking a cell
+    moves the last entry into its place and releasing one appends it, so
+    both are constant time, as is picking a random entry. Occupancy grids
+    sharing the set report when they start and stop covering a cell; a cell
+    covered by several grids is free again once the last one leaves it.
+    Cells off the board are ignored.
+
+    Boards of more than LIST_CELLS cells start without the list: while
+    snakes cover at most half the board, sampling draws random cells until
+    one is free, under two draws on average. The list is built once they
+    cover more, so memory follows the covered cells rather than the area.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.area = width * height
+        self.owners: Dict[int, int] = {}  # Grids covering each covered cell
+        self.cells = self.index = None
+        if self.area <= LIST_CELLS:
+            self.cells = _numbers(self.area)[:]
+            self.index = _numbers(self.area)[:]
+
+    def __len__(self) -> int:
+        return self.area - len(self.owners)
+
+    def __contains__(self, cell: Cell) -> bool:
+        x, y = cell
+        return 0 <= x < self.width and 0 <= y < self.height and y * self.width + x not in self.owners
+
+    def take(self, cell: Cell):
+        x, y = cell
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return
+        number = y * self.width + x
+        owners = self.owners.get(number, 0)
+        self.owners[number] = owners + 1
+        if owners:
+            return
+        if self.cells is not None:
+            last = self.cells.pop()
+            if last != number:
+                position = self.index[number]
+                self.cells[position] = last
+                self.index[last] = position
+        elif 2 * len(self.owners) > self.area:
+            self._build_list()
+
+    def release(self, cell: Cell):
+        x, y = cell
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return
+        number = y * self.width + x
+        owners = self.owners[number] - 1
+        if owners:
+            self.owners[number] = owners
+            return
+        del self.owners[number]
+        if self.cells is not None:
+            self.index[number] = len(self.cells)
+            self.cells.append(number)
+
+    def _build_list(self):
+        owners = self.owners
+        self.cells = array('i', (number for number in range(self.area) if number not in owners))
+        self.index = array('i', [0]) * self.area
+        for position, number in enumerate(self.cells):
+            self.index[number] = position
+
+    def sample(self, rng=random) -> Optional[Cell]:
+        """A uniformly random free cell, or None when the board is full."""
+        if self.cells is not None:
+            if not self.cells:
+                return None
+            number = self.cells[rng.randrange(len(self.cells))]
+        else:
+            number = rng.randrange(self.area)
+            while number in self.owners:
+                number = rng.randrange(self.area)
+        y, x = divmod(number, self.width)
+        return x, y
+
+
+class AreaIndex:
+    """Snake segments filed by the AREA_CHUNK-sided square of board they lie on.
+
+    Each chunk maps its segments, as (x, y, player), to the order their
+    grid added them in, which grows towards the head. Listing a rectangle
+    visits only the chunks it overlaps, so it costs what lies there
+    whatever the size of the board; chunks empty out and are dropped as
+    snakes move on. Occupancy grids given the index keep it up to date.
+    """
+
+    def __init__(self):
+        self.chunks: Dict[Cell, Dict[Tuple[int, int, int], int]] = {}
+
+    def add(self, cell: Cell, player: int, order: int):
+        x, y = cell
+        chunk = self.chunks.get((x // AREA_CHUNK, y // AREA_CHUNK))
+        if chunk is None:
+            chunk = self.chunks[(x // AREA_CHUNK, y // AREA_CHUNK)] = {}
+        chunk[(x, y, player)] = order
+
+    def remove(self, cell: Cell, player: int):
+        x, y = cell
+        key = (x // AREA_CHUNK, y // AREA_CHUNK)
+        chunk = self.chunks[key]
+        del chunk[(x, y, player)]
+        if not chunk:
+            del self.chunks[key]
+
+    def segments(self, left: int, top: int, right: int, bottom: int, players: int) -> List[List[Cell]]:
+        """Each player's segments with left <= x < right and top <= y < bottom, head first."""
+        found: List[List[Tuple[int, int, int]]] = [[] for _ in range(players)]
+        chunks = self.chunks
+        for key, inside in chunks_in(left, top, right, bottom):
+            chunk = chunks.get(key)
+            if chunk is None:
+                continue
+            for (x, y, player), order in chunk.items():
+                if inside or (left <= x < right and top <= y < bottom):
+                    found[player].append((order, x, y))
+        bodies = []
+        for segments in found:
+            segments.sort(reverse=True)
+            bodies.append([(x, y) for _, x, y in segments])
+        return bodies
+
+    def occupied(self) -> List[Cell]:
+        """The chunks some segment lies on, as (x, y) in chunks."""
+        return list(self.chunks)
+
+
+def chunks_in(left: int, top: int, right: int, bottom: int) -> Iterator[Tuple[Cell, bool]]:
+    """The chunks overlapping left <= x < right, top <= y < bottom, each
+    with whether it lies wholly inside, when its cells need no bounds check."""
+    for cy in range(top // AREA_CHUNK, (bottom - 1) // AREA_CHUNK + 1):
+        rows_inside = top <= cy * AREA_CHUNK and (cy + 1) * AREA_CHUNK <= bottom
+        for cx in range(left // AREA_CHUNK, (right - 1) // AREA_CHUNK + 1):
+            yield (cx, cy), rows_inside and left <= cx * AREA_CHUNK and (cx + 1) * AREA_CHUNK <= right
+
+
+@lru_cache(maxsize=8)
+def _numbers(count: int) -> array:
+    """0 .. count - 1, copied by every FreeCells of that size instead of rebuilt."""
+    return array('i', range(count))
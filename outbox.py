@@ -0,0 +1,70 @@
+import socket
+import threading
+from collections import deque
+
+MAX_QUEUED_BYTES = 1 << 20  # A client this far behind on reading is dropped
+
+
+class Outbox:
+    """Frames waiting to go out to one client, written by a thread of its own.
+
+    put() never waits on the socket, so the tick thread can broadcast to
+    every room however slowly one client reads. The writer sends whatever
+    has queued up since its last write in one sendall, in the order queued.
+    """
+
+    def __init__(self, sock: socket.socket, limit: int = MAX_QUEUED_BYTES):
+        self.sock = sock
+        self.limit = limit
+        self.frames = deque()
+        self.size = 0  # Bytes queued
+        self.closed = False
+        self.ready = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def put(self, frame: bytes) -> bool:
+        """Queue a frame. Returns False, once, if that would put more than
+        `limit` bytes in the queue; the outbox then drops everything queued
+        and stops, and the caller should disconnect the client."""
+        with self.ready:
+            if self.closed:
+                return True
+            if self.size + len(frame) > self.limit:
+                self.closed = True
+                self.frames.clear()
+                self.size = 0
+                self.ready.notify()
+                return False
+            self.frames.append(frame)
+            self.size += len(frame)
+            self.ready.notify()
+        return True
+
+    def close(self, timeout: float = None):
+        """Stop the writer once it has sent what is queued, waiting up to `timeout` seconds for that if given."""
+        with self.ready:
+            self.closed = True
+            self.ready.notify()
+        if timeout is not None:
+            self.thread.join(timeout)
+
+    def run(self):
+        while True:
+            with self.ready:
+                while not self.frames and not self.closed:
+                    self.ready.wait()
+                if not self.frames:
+                    return
+                data = b''.join(self.frames)
+                self.frames.clear()
+                self.size = 0
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                # The client's handler sees the connection drop and cleans up
+                with self.ready:
+                    self.closed = True
+                    self.frames.clear()
+                    self.size = 0
+                return
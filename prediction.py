@@ -0,0 +1,182 @@
+import time
+from collections import deque
+from dataclasses import replace
+from typing import Deque, Dict, List, Optional, Tuple
+from game_state import GameState, PlayerTable
+from simulation import apply_input
+from snake_body import SnakeBody
+from tick_scheduler import TICK_INTERVAL
+
+INTERPOLATION_TICKS = 1.0  # Other snakes are drawn this far behind the newest state
+MAX_EXTRAPOLATION_TICKS = 2.0  # How far the clock runs on past a late state
+STATE_BUFFER = 8  # Received states kept for interpolation
+RTT_SAMPLES = 16  # Round trips measured from acks, the least of which is taken
+
+
+class Predictor:
+    """What a client draws: its own snake predicted ahead, the others interpolated.
+
+    The server applies an input on its first tick after the input arrives,
+    so the newest state is about a round trip behind what an input sent now
+    will act on. Your snake is run on from the newest state by that many
+    ticks, replaying every input the state has not acknowledged on the tick
+    it was stamped with when sent. Each state restarts the prediction, so
+    a misprediction is corrected by the next one.
+
+    Other snakes are drawn between the two received states around
+    INTERPOLATION_TICKS before the estimated server tick, each segment
+    sliding towards where it is in the later state.
+    """
+
+    def __init__(self, player: int, interval: float = TICK_INTERVAL, clock=time.monotonic):
+        self.player = player  # Index into the player table
+        self.interval = interval
+        self.clock = clock
+        self.states: Deque[Tuple[float, GameState]] = deque(maxlen=STATE_BUFFER)  # (arrival, state)
+        self.pending: Deque[Tuple[int, int, Dict, float]] = deque()  # (seq, tick, input, sent at)
+        self.rtt_samples: Deque[float] = deque(maxlen=RTT_SAMPLES)
+        self.rtt = 0.0
+
+    def server_tick(self, now: float) -> float:
+        """The server's tick as of the newest state, run on by the time since it arrived.
+
+        Each buffered state gives an estimate; the one delayed least on the
+        way, by the link or by waiting for a frame, gives the largest, so
+        a late state does not set the clock back.
+        """
+        newest = self.states[-1][1].tick
+        estimate = max(state.tick + (now - arrival) / self.interval for arrival, state in self.states)
+        return min(estimate, newest + MAX_EXTRAPOLATION_TICKS)
+
+    def predicted_tick(self, now: float) -> int:
+        """The last tick the server will have simulated when an input sent now arrives."""
+        return int(self.server_tick(now) + self.rtt / self.interval)
+
+    def input_sent(self, seq: int, data: Dict, now: Optional[float] = None):
+        """Record an input sent to the server, stamped with the tick it should act on."""
+        if now is None:
+            now = self.clock()
+        tick = self.predicted_tick(now) + 1 if self.states else 0
+        self.pending.append((seq, tick, data, now))
+
+    def state_received(self, state: GameState, input_seq: int, now: Optional[float] = None):
+        """Take a new authoritative state that has applied inputs up to input_seq."""
+        if now is None:
+            now = self.clock()
+        self.states.append((now, state))
+        acked = None
+        while self.pending and self.pending[0][0] <= input_seq:
+            acked = self.pending.popleft()
+        if acked is not None:
+            # Each sample also holds the wait for the server's next tick and
+            # for a frame to notice the state; the least one holds the least
+            self.rtt_samples.append(now - acked[3])
+            self.rtt = min(self.rtt_samples)
+
+    def view(self, now: Optional[float] = None) -> Optional[GameState]:
+        """The state to draw now, or None before the first state arrives."""
+        if not self.states:
+            return None
+        if now is None:
+            now = self.clock()
+        state = self.states[-1][1]
+        players = state.players
+        table = PlayerTable(
+            positions=self.interpolated_positions(now), directions=list(players.directions),
+            scores=players.scores, stunned=list(players.stunned), charges=list(players.charges),
+            alive=players.alive, moves=players.moves,
+        )
+        view = replace(state, players=table, projectiles=list(state.projectiles))
+        me = self.player
+        if me < len(players) and players.alive[me] and not state.game_over:
+            self.predict(view, players.positions[me], now)
+        return view
+
+    def predict(self, view: GameState, body, now: float):
+        """Run your snake in `view` on to the present with the pending inputs.
+
+        Inputs for the tick in progress are applied too, and the head is
+        drawn partway into its next cell, so a turn or a shot shows on the
+        next frame rather than on the next tick.
+        """
+        me = self.player
+        width, height = view.board_size
+        players = view.players
+        body = players.positions[me] = SnakeBody(body)
+        ahead = self.server_tick(now) + self.rtt / self.interval
+        spawned = len(view.projectiles)
+        pending = iter(self.pending)
+        waiting = next(pending, None)
+        moving = True
+        for current in range(view.tick + 1, int(ahead) + 1):
+            # Inputs stamped for a tick the state already covers act on the next one
+            while waiting is not None and waiting[1] <= current:
+                apply_input(view, me, _controls(waiting[2]))
+                waiting = next(pending, None)
+            if players.stunned[me] > 0:
+                players.stunned[me] -= 1
+            else:
+                head = (body[0][0] + players.directions[me][0], body[0][1] + players.directions[me][1])
+                if not (0 <= head[0] < width and 0 <= head[1] < height):
+                    moving = False  # The server decides crashes
+                    break
+                body.advance(*head)
+            if players.charges[me] < 5:
+                players.charges[me] += 1
+            # Shots fired in the prediction fly on with it
+            view.projectiles[spawned:] = [
+                (x + dx, y + dy, dx, dy) for x, y, dx, dy in view.projectiles[spawned:]
+                if 0 <= x + dx < width and 0 <= y + dy < height
+            ]
+        while waiting is not None:
+            apply_input(view, me, _controls(waiting[2]))
+            waiting = next(pending, None)
+        if moving and players.stunned[me] <= 0:
+            fraction = ahead - int(ahead)
+            (x, y), (dx, dy) = body[0], players.directions[me]
+            players.positions[me] = [(x + dx * fraction, y + dy * fraction), *body]
+
+    def interpolated_positions(self, now: float) -> List:
+        """Every body of the newest state, the other players' slid back to the render tick."""
+        positions = list(self.states[-1][1].players.positions)
+        render = self.server_tick(now) - INTERPOLATION_TICKS
+        older = None
+        for _, state in self.states:
+            if state.tick > render:
+                if older is not None and state.tick - older.tick == 1 and len(older.players) == len(positions):
+                    fraction = render - older.tick
+                    for player, (before, after) in enumerate(zip(older.players.positions, state.players.positions)):
+                        if player != self.player:
+                            positions[player] = _slide(before, after, fraction)
+                break
+            older = state
+        return positions
+
+
+def _controls(data: Dict) -> Dict:
+    """An input without its chat line, which only the server posts."""
+    return {key: value for key, value in data.items() if key != "chat"}
+
+
+def copy_state(state: GameState) -> GameState:
+    """A copy of a state that later ticks on the original leave alone."""
+    players = state.players
+    table = PlayerTable(
+        positions=[SnakeBody(body) for body in players.positions], directions=list(players.directions),
+        scores=list(players.scores), stunned=list(players.stunned), charges=list(players.charges),
+        alive=list(players.alive), moves=list(players.moves),
+    )
+    return replace(state, players=table, projectiles=list(state.projectiles),
+                   chat_messages=deque(state.chat_messages, maxlen=state.chat_messages.maxlen))
+
+
+def _slide(before, after, fraction: float) -> List[Tuple[float, float]]:
+    """Segments of `after` a fraction of the way from where they were in `before`."""
+    if not before:
+        return list(after)
+    last = len(before) - 1
+    segments = []
+    for i, (x, y) in enumerate(after):
+        bx, by = before[min(i, last)]
+        segments.append((bx + (x - bx) * fraction, by + (y - by) * fraction))
+    return segments
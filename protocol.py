@@ -0,0 +1,386 @@
+import struct
+import sys
+from array import array
+from collections import deque
+from itertools import chain
+from typing import Dict, List, Optional
+from game_state import GameState, PlayerTable
+
+# Every frame starts with a fixed header: message type (uint8) and body length (uint32)
+HEADER = struct.Struct('!BI')
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+# Message schemas: command -> (type id, [(field, kind), ...])
+# Every field is optional; a presence bitmask in front of the body records which are set.
+SCHEMAS = {
+    "welcome": (1, [("player_number", "u16")]),
+    "create_room": (2, [("room_name", "str"), ("single_player", "bool"), ("board_size", "pos"),
+                        ("max_players", "u8"), ("lockstep", "bool"), ("seed", "u32")]),
+    "room_created": (3, [("room_id", "str")]),
+    "join_room": (4, [("room_id", "str")]),
+    # Lockstep rooms also send the state to simulate from, with its tick, seed
+    # and the seq of the player's last input it applied
+    "start_game": (5, [("player_number", "u8"), ("state", "state"), ("tick", "u32"), ("seed", "u32"),
+                       ("input_seq", "u32")]),
+    "error": (6, [("message", "str")]),
+    "ready": (7, []),
+    # Clients send only changes; seq increases by one per game_input sent
+    "game_input": (8, [("direction", "dir"), ("shoot", "bool"), ("chat", "str"), ("seq", "u32")]),
+    "save_game": (9, []),
+    "game_saved": (10, [("save_path", "str")]),
+    "host_disconnected": (11, []),
+    "guest_disconnected": (12, []),
+    # States also carry the seq of the recipient's last input they applied
+    "game_state": (13, [("state", "state"), ("seq", "u32"), ("tick", "u32"), ("input_seq", "u32")]),
+    # Changes since a snapshot the client acknowledged (see snapshots.py);
+    # "kind[]" fields hold one entry per player. Scalars and player columns
+    # are only present when they changed.
+    "state_delta": (14, [
+        ("seq", "u32"), ("base", "u32"), ("ticks", "u32"),
+        ("heads", "positions[]"), ("keep", "u32[]"), ("lengths", "u32[]"),
+        ("removed_projectiles", "indices"), ("added_projectiles", "projectiles"),
+        ("chat_messages", "strlist"),
+        ("directions", "dir[]"), ("scores", "u32[]"), ("stunned", "u16[]"),
+        ("charges", "u8[]"), ("alive", "bool[]"),
+        ("food_pos", "pos"), ("game_over", "bool"), ("winner", "str"),
+        ("input_seq", "u32"),
+    ]),
+    "ack": (15, [("seq", "u32")]),
+    "list_rooms": (16, []),
+    "room_list": (17, [("rooms", "rooms")]),
+    # Lockstep rooms: the inputs applied on a tick (see simulation.relay_fields)
+    # and, every HASH_INTERVAL ticks, the resulting state's hash
+    "tick_inputs": (18, [("tick", "u32"), ("players", "u8[]"), ("flags", "u8[]"), ("directions", "dir[]"),
+                         ("chat", "str[]"), ("hash", "u32")]),
+    # From a lockstep client whose state hash differs from the server's
+    "desync": (19, [("tick", "u32"), ("hash", "u32")]),
+    # Rooms larger than a view send each client what lies around its view:
+    # the segments there of the listed players, head first, the projectiles
+    # and the food if it is there, with the recipient's own direction, stun
+    # and charges. Every few ticks the chunks snakes cover, every head and the
+    # food's chunk sum up the rest.
+    "area_state": (20, [
+        ("tick", "u32"), ("input_seq", "u32"), ("board_size", "pos"),
+        ("players", "u8[]"), ("bodies", "positions[]"), ("projectiles", "projectiles"), ("food_pos", "pos"),
+        ("direction", "dir"), ("stunned", "u16"), ("charges", "u8"), ("scores", "u32[]"), ("alive", "bool[]"),
+        ("chat_messages", "strlist"), ("game_over", "bool"), ("winner", "str"),
+        ("minimap", "positions"), ("heads", "positions"), ("food_chunk", "pos"),
+    ]),
+}
+
+COMMANDS = {type_id: (command, fields) for command, (type_id, fields) in SCHEMAS.items()}
+
+U8 = struct.Struct('!B')
+U16 = struct.Struct('!H')
+U32 = struct.Struct('!I')
+BOOL = struct.Struct('!?')
+DIRECTION = struct.Struct('!bb')
+POSITION = struct.Struct('!hh')
+# food, game_over, board width and height, number of players
+STATE_SCALARS = struct.Struct('!hh?HHB')
+# direction, score, stun timer, charges, alive; one per player
+PLAYER_SCALARS = struct.Struct('!bbIHB?')
+PROJECTILE = struct.Struct('!hhbb')
+ROOM_FLAGS = struct.Struct('!BB??')  # players, max_players, in_game, single_player
+NATIVE_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+class ProtocolError(Exception):
+    """Raised when the byte stream can no longer be decoded."""
+
+
+def _pack_str(parts: List[bytes], value: str):
+    data = value.encode('utf-8')
+    parts.append(U16.pack(len(data)))
+    parts.append(data)
+
+
+def _unpack_str(body: memoryview, offset: int):
+    (length,) = U16.unpack_from(body, offset)
+    offset += U16.size
+    return bytes(body[offset:offset + length]).decode('utf-8'), offset + length
+
+
+def _pack_positions(parts: List[bytes], positions):
+    flat = array('h', chain.from_iterable(positions))
+    if NATIVE_LITTLE_ENDIAN:
+        flat.byteswap()
+    parts.append(U32.pack(len(flat) // 2))
+    parts.append(flat.tobytes())
+
+
+def _unpack_positions(body: memoryview, offset: int):
+    (count,) = U32.unpack_from(body, offset)
+    offset += U32.size
+    end = offset + count * 4
+    if end > len(body):
+        raise ValueError("position list runs past end of body")
+    flat = array('h')
+    flat.frombytes(body[offset:end])
+    if NATIVE_LITTLE_ENDIAN:
+        flat.byteswap()
+    return list(zip(flat[::2], flat[1::2])), end
+
+
+def _pack_projectiles(parts: List[bytes], projectiles):
+    parts.append(U16.pack(len(projectiles)))
+    for x, y, dx, dy in projectiles:
+        parts.append(PROJECTILE.pack(int(x), int(y), int(dx), int(dy)))
+
+
+def _unpack_projectiles(body: memoryview, offset: int):
+    (count,) = U16.unpack_from(body, offset)
+    offset += U16.size
+    projectiles = []
+    for _ in range(count):
+        projectiles.append(PROJECTILE.unpack_from(body, offset))
+        offset += PROJECTILE.size
+    return projectiles, offset
+
+
+def _pack_rooms(parts: List[bytes], rooms):
+    parts.append(U16.pack(len(rooms)))
+    for room in rooms:
+        _pack_str(parts, room["id"])
+        _pack_str(parts, room["name"])
+        parts.append(ROOM_FLAGS.pack(room["players"], room["max_players"], room["in_game"], room["single_player"]))
+
+
+def _unpack_rooms(body: memoryview, offset: int):
+    (count,) = U16.unpack_from(body, offset)
+    offset += U16.size
+    rooms = []
+    for _ in range(count):
+        room_id, offset = _unpack_str(body, offset)
+        name, offset = _unpack_str(body, offset)
+        players, max_players, in_game, single_player = ROOM_FLAGS.unpack_from(body, offset)
+        offset += ROOM_FLAGS.size
+        rooms.append({"id": room_id, "name": name, "players": players, "max_players": max_players,
+                      "in_game": in_game, "single_player": single_player})
+    return rooms, offset
+
+
+def _pack_state(parts: List[bytes], state: GameState):
+    players = state.players
+    parts.append(STATE_SCALARS.pack(
+        int(state.food_pos[0]), int(state.food_pos[1]),
+        state.game_over, state.board_size[0], state.board_size[1], len(players)))
+    for direction, score, stunned, charges, alive in zip(
+            players.directions, players.scores, players.stunned, players.charges, players.alive):
+        parts.append(PLAYER_SCALARS.pack(int(direction[0]), int(direction[1]), score, stunned, charges, alive))
+    _pack_str(parts, state.winner)
+    for body in players.positions:
+        _pack_positions(parts, body)
+    _pack_projectiles(parts, state.projectiles)
+    parts.append(U8.pack(len(state.chat_messages)))
+    for message in state.chat_messages:
+        _pack_str(parts, message)
+
+
+def _unpack_state(body: memoryview, offset: int):
+    food_x, food_y, game_over, width, height, count = STATE_SCALARS.unpack_from(body, offset)
+    offset += STATE_SCALARS.size
+    players = PlayerTable()
+    for _ in range(count):
+        dx, dy, score, stunned, charges, alive = PLAYER_SCALARS.unpack_from(body, offset)
+        offset += PLAYER_SCALARS.size
+        players.directions.append((dx, dy))
+        players.scores.append(score)
+        players.stunned.append(stunned)
+        players.charges.append(charges)
+        players.alive.append(alive)
+    players.moves = [0] * count
+    winner, offset = _unpack_str(body, offset)
+    for _ in range(count):
+        positions, offset = _unpack_positions(body, offset)
+        players.positions.append(positions)
+    projectiles, offset = _unpack_projectiles(body, offset)
+    (chat_count,) = U8.unpack_from(body, offset)
+    offset += U8.size
+    chat_messages = deque(maxlen=5)
+    for _ in range(chat_count):
+        message, offset = _unpack_str(body, offset)
+        chat_messages.append(message)
+    state = GameState(
+        players, (food_x, food_y), projectiles,
+        game_over, winner, chat_messages, board_size=(width, height)
+    )
+    return state, offset
+
+
+# Element formats of the number lists among "kind[]" fields
+_LIST_CODES = {"u8": "B", "u16": "H", "u32": "I", "bool": "?"}
+
+
+def _pack_list(parts: List[bytes], kind: str, values):
+    parts.append(U16.pack(len(values)))
+    code = _LIST_CODES.get(kind)
+    if code:
+        parts.append(struct.pack(f'!{len(values)}{code}', *values))
+    else:
+        for value in values:
+            _pack_field(parts, kind, value)
+
+
+def _unpack_list(body: memoryview, offset: int, kind: str):
+    (count,) = U16.unpack_from(body, offset)
+    offset += U16.size
+    code = _LIST_CODES.get(kind)
+    if code:
+        layout = struct.Struct(f'!{count}{code}')
+        return list(layout.unpack_from(body, offset)), offset + layout.size
+    items = []
+    for _ in range(count):
+        item, offset = _unpack_field(body, offset, kind)
+        items.append(item)
+    return items, offset
+
+
+_SIMPLE = {"u8": U8, "u16": U16, "u32": U32, "bool": BOOL, "dir": DIRECTION, "pos": POSITION}
+
+
+def _mask_struct(fields) -> struct.Struct:
+    if len(fields) <= 8:
+        return U8
+    return U16 if len(fields) <= 16 else U32
+
+
+def _pack_field(parts: List[bytes], kind: str, value):
+    if kind in ("u8", "u16", "u32", "bool"):
+        parts.append(_SIMPLE[kind].pack(value))
+    elif kind in ("dir", "pos"):
+        parts.append(_SIMPLE[kind].pack(int(value[0]), int(value[1])))
+    elif kind == "str":
+        _pack_str(parts, value)
+    elif kind == "strlist":
+        parts.append(U8.pack(len(value)))
+        for item in value:
+            _pack_str(parts, item)
+    elif kind == "positions":
+        _pack_positions(parts, value)
+    elif kind == "projectiles":
+        _pack_projectiles(parts, value)
+    elif kind == "indices":
+        parts.append(U16.pack(len(value)))
+        parts.append(struct.pack(f'!{len(value)}H', *value))
+    elif kind.endswith("[]"):
+        _pack_list(parts, kind[:-2], value)
+    elif kind == "rooms":
+        _pack_rooms(parts, value)
+    elif kind == "state":
+        _pack_state(parts, value)
+
+
+def _unpack_field(body: memoryview, offset: int, kind: str):
+    if kind in _SIMPLE:
+        value = _SIMPLE[kind].unpack_from(body, offset)
+        return (value[0] if len(value) == 1 else value), offset + _SIMPLE[kind].size
+    if kind == "str":
+        return _unpack_str(body, offset)
+    if kind == "strlist":
+        (count,) = U8.unpack_from(body, offset)
+        offset += U8.size
+        items = []
+        for _ in range(count):
+            item, offset = _unpack_str(body, offset)
+            items.append(item)
+        return items, offset
+    if kind == "positions":
+        return _unpack_positions(body, offset)
+    if kind == "projectiles":
+        return _unpack_projectiles(body, offset)
+    if kind == "indices":
+        (count,) = U16.unpack_from(body, offset)
+        offset += U16.size
+        return list(struct.unpack_from(f'!{count}H', body, offset)), offset + count * U16.size
+    if kind.endswith("[]"):
+        return _unpack_list(body, offset, kind[:-2])
+    if kind == "rooms":
+        return _unpack_rooms(body, offset)
+    if kind == "state":
+        return _unpack_state(body, offset)
+    raise ValueError(f"Unknown field kind {kind}")
+
+
+def encode_message(msg: Dict) -> bytes:
+    """Encode a message dict into a single length-prefixed frame."""
+    type_id, fields = SCHEMAS[msg["command"]]
+    mask = 0
+    parts = [b'']
+    for bit, (name, kind) in enumerate(fields):
+        value = msg.get(name)
+        if value is None:
+            continue
+        mask |= 1 << bit
+        _pack_field(parts, kind, value)
+    if fields:
+        parts[0] = _mask_struct(fields).pack(mask)
+    body = b''.join(parts)
+    return HEADER.pack(type_id, len(body)) + body
+
+
+def decode_body(type_id: int, body: memoryview) -> Dict:
+    """Decode the body of one frame back into a message dict."""
+    command, fields = COMMANDS[type_id]
+    msg = {"command": command}
+    if not fields:
+        return msg
+    mask_struct = _mask_struct(fields)
+    (mask,) = mask_struct.unpack_from(body, 0)
+    offset = mask_struct.size
+    for bit, (name, kind) in enumerate(fields):
+        if mask & (1 << bit):
+            msg[name], offset = _unpack_field(body, offset, kind)
+    if offset != len(body):
+        raise ValueError(f"{command} body has {len(body) - offset} trailing bytes")
+    return msg
+
+
+class MessageDecoder:
+    """Incrementally split a byte stream into decoded messages.
+
+    Bytes can arrive in any chunking; partial frames are kept until the rest
+    of the frame is fed in. Frames whose body fails to decode are skipped and
+    counted in `undecodable`, since the length prefix keeps the stream in sync.
+
+    An invalid frame header loses the stream. feed() still returns the
+    messages before it and sets `error`; it raises only when no message
+    would be lost, that is when the bad header is the first thing left.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.undecodable = 0
+        self.error: Optional[ProtocolError] = None  # Set once the stream is lost
+        self.frame_sizes: List[int] = []  # Frame length of each message the last feed returned
+
+    def feed(self, data: bytes) -> List[Dict]:
+        """Add received bytes and return every message completed by them."""
+        if self.error is not None:
+            raise self.error
+        self.buffer += data
+        messages = []
+        self.frame_sizes = []
+        offset = 0
+        view = memoryview(self.buffer)
+        try:
+            while len(self.buffer) - offset >= HEADER.size:
+                type_id, length = HEADER.unpack_from(self.buffer, offset)
+                if type_id not in COMMANDS or length > MAX_BODY_SIZE:
+                    self.error = ProtocolError(f"Invalid frame header (type {type_id}, length {length})")
+                    if not messages:
+                        raise self.error
+                    break
+                end = offset + HEADER.size + length
+                if end > len(self.buffer):
+                    break
+                try:
+                    messages.append(decode_body(type_id, view[offset + HEADER.size:end]))
+                    self.frame_sizes.append(end - offset)
+                except (struct.error, ValueError, UnicodeDecodeError):
+                    self.undecodable += 1
+                offset = end
+        finally:
+            view.release()
+            del self.buffer[:offset]
+        return messages
@@ -18,7 +18,7 @@ def save_single_player_game(snake, level, score):
         "mode": "single_player",
         "timestamp": datetime.now().isoformat(),
         "snake_data": {
-            "body": [(pos.x, pos.y) for pos in snake.body],
+            "body": list(snake.body),
             "direction": (snake.direction.x, snake.direction.y),
             "color": snake.color,
             "score": score,
@@ -41,27 +41,29 @@ def save_single_player_game(snake, level, score):
 def save_multiplayer_game(game_state):
     """Save multiplayer game state."""
     ensure_save_directory()
+    players = game_state.players
     
     # Create save data
     save_data = {
         "mode": "multiplayer",
         "timestamp": datetime.now().isoformat(),
-        "snake1_data": {
-            "positions": game_state.snake1_pos,
-            "direction": game_state.snake1_direction,
-            "score": game_state.snake1_score,
-            "stunned": game_state.snake1_stunned,
-            "projectiles": game_state.snake1_projectiles
-        },
-        "snake2_data": {
-            "positions": game_state.snake2_pos,
-            "direction": game_state.snake2_direction,
-            "score": game_state.snake2_score,
-            "stunned": game_state.snake2_stunned,
-            "projectiles": game_state.snake2_projectiles
-        },
+        # One entry per player, in player order
+        "players": [
+            {
+                "positions": list(positions),
+                "direction": direction,
+                "score": score,
+                "stunned": stunned,
+                "projectiles": charges,
+                "alive": alive
+            }
+            for positions, direction, score, stunned, charges, alive in zip(
+                players.positions, players.directions, players.scores,
+                players.stunned, players.charges, players.alive)
+        ],
         "food_pos": game_state.food_pos,
-        "projectiles": game_state.projectiles
+        "projectiles": game_state.projectiles,
+        "board_size": game_state.board_size
     }
     
     # Generate filename with timestamp
@@ -1,42 +1,60 @@
+import asyncio
 import socket
-import pickle
+import sys
 import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Optional
 import random
 from collections import deque
 from save_game import save_multiplayer_game, load_game
+from game_state import (AREA_MARGIN, BOARD_SIZE, MAX_BOARD_SIZE, MAX_PLAYERS, MIN_BOARD_SIZE, VIEW_SIZE, GameState,
+                        has_area_of_interest, view_origin)
+from metrics import ServerMetrics, TimedLock
+from occupancy import AREA_CHUNK, OccupancyGrid, chunks_in
+from outbox import MAX_QUEUED_BYTES, Outbox
+from protocol import MessageDecoder, ProtocolError, encode_message
+from simulation import (HASH_INTERVAL, apply_input, build_occupancy, create_game_state, relay_fields, retire_player,
+                        state_hash, step)
+from snapshots import SnapshotTracker
+from tick_scheduler import TickScheduler
 
-@dataclass
-class GameState:
-    snake1_pos: List[Tuple[float, float]]
-    snake2_pos: List[Tuple[float, float]]
-    snake1_direction: Tuple[float, float]
-    snake2_direction: Tuple[float, float]
-    food_pos: Tuple[float, float]
-    snake1_score: int
-    snake2_score: int
-    projectiles: List[Tuple[float, float, float, float]]
-    snake1_stunned: int
-    snake2_stunned: int
-    snake1_projectiles: int
-    snake2_projectiles: int
-    game_over: bool
-    winner: str
-    chat_messages: deque
+MINIMAP_INTERVAL = 10  # Ticks between the chunk maps area states carry
 
 @dataclass
 class Room:
     id: str
     name: str
-    host: socket.socket
-    guest: Optional[socket.socket]
+    # One seat per player, the host's first; None while a seat is free
+    clients: List[Optional[socket.socket]]
     game_state: GameState
-    host_ready: bool
-    guest_ready: bool
+    ready: List[bool]
     in_game: bool
     single_player: bool
+    # Only the tick thread mutates game_state, holding this lock;
+    # handlers queue inputs here for it to apply at the next tick
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # Inputs waiting for a tick, per player, the last seq taken from each and
+    # the last seq a tick applied, which states echo for client prediction
+    pending_inputs: List[deque] = field(init=False)
+    last_input_seq: List[int] = field(init=False)
+    applied_input_seq: List[int] = field(init=False)
+    # Occupancy grid of every snake and the bodies they follow,
+    # rebuilt when game_state's bodies are replaced
+    occupancy: Optional[List[OccupancyGrid]] = None
+    occupancy_bodies: List = field(default_factory=list)
+    # Lockstep rooms send clients the inputs each tick applied, not the state
+    lockstep: bool = False
+    relayed_inputs: List[Tuple[int, Dict]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.pending_inputs = [deque() for _ in self.clients]
+        self.last_input_seq = [0] * len(self.clients)
+        self.applied_input_seq = [0] * len(self.clients)
+
+    @property
+    def host(self) -> socket.socket:
+        return self.clients[0]
 
 class LobbyServer:
     def __init__(self, host='0.0.0.0', start_port=5556):
@@ -65,59 +83,78 @@ class LobbyServer:
             f.write(str(actual_port))
         
         self.server.listen(10)  # Allow more connections for lobby
-        
+        self.init_state()
+
+    def init_state(self):
+        """Set up the room tables and tick scheduler."""
         self.rooms: Dict[str, Room] = {}
         self.client_to_room: Dict[socket.socket, str] = {}
-        self.lock = threading.Lock()
-
-    def create_game_state(self) -> GameState:
-        """Create a fresh game state."""
-        return GameState(
-            [(5, 5), (4, 5), (3, 5)],  # snake1_pos
-            [(20, 20), (19, 20), (18, 20)],  # snake2_pos
-            (1, 0),  # snake1_direction
-            (-1, 0),  # snake2_direction
-            (10, 10),  # food_pos
-            0,  # snake1_score
-            0,  # snake2_score
-            [],  # projectiles
-            0,  # snake1_stunned
-            0,  # snake2_stunned
-            5,  # snake1_projectiles
-            5,  # snake2_projectiles
-            False,  # game_over
-            "",  # winner
-            deque(maxlen=5)  # chat_messages
-        )
+        self.outboxes: Dict[socket.socket, Outbox] = {}
+        self.snapshot_trackers: Dict[socket.socket, SnapshotTracker] = {}
+        self.metrics = ServerMetrics(rooms=lambda: len(self.rooms))
+        self.lock = TimedLock(self.metrics.lock_wait)
+        self.tick_scheduler = TickScheduler()
+        self.reported_tick_counters = (0, 0, 0)
+        self.engine = None  # Optional batch_engine.BatchEngine simulating every room at once
 
-    def create_room(self, host: socket.socket, room_name: str, single_player: bool = False) -> str:
-        """Create a new game room."""
-        room_id = str(random.randint(1000, 9999))
-        while room_id in self.rooms:
-            room_id = str(random.randint(1000, 9999))
-            
+    def create_game_state(self, board_size: Tuple[int, int] = (BOARD_SIZE, BOARD_SIZE),
+                          players: int = 2, seed: Optional[int] = None) -> GameState:
+        """Create a fresh game state (see simulation.create_game_state), seeded at random by default."""
+        if seed is None:
+            seed = random.getrandbits(32)
+        return create_game_state(board_size, players, seed)
+
+    def create_room(self, host: socket.socket, room_name: str, single_player: bool = False,
+                    board_size: Tuple[int, int] = (BOARD_SIZE, BOARD_SIZE), max_players: int = 2,
+                    lockstep: bool = False, seed: Optional[int] = None) -> str:
+        """Create a new game room with seats for max_players (one in single player)."""
+        seats = 1 if single_player else max_players
         room = Room(
-            id=room_id,
+            id="",
             name=room_name,
-            host=host,
-            guest=None,
-            game_state=self.create_game_state(),
-            host_ready=False,
-            guest_ready=False,
+            clients=[host] + [None] * (seats - 1),
+            game_state=self.create_game_state(board_size, seats, seed),
+            ready=[False] * seats,
             in_game=False,
-            single_player=single_player
+            single_player=single_player,
+            lockstep=lockstep
         )
         
         # For single player mode, automatically set as ready and start game
         if single_player:
-            room.host_ready = True
-            room.guest_ready = True
+            room.ready = [True]
             room.in_game = True
-            start_msg = {"command": "start_game", "player_number": 1}
-            room.host.send(pickle.dumps(start_msg))
         
-        self.rooms[room_id] = room
-        self.client_to_room[host] = room_id
+        with self.lock:
+            room_id = self.new_room_id()
+            room.id = room_id
+            self.rooms[room_id] = room
+            self.client_to_room[host] = room_id
+        
+        if single_player:
+            self.send_start(room, 0)
+        return room_id
+
+    def send_start(self, room: Room, player: int):
+        """Tell a player the game has started.
+
+        Lockstep players also get the state to simulate from: sent under the
+        room lock, so the next inputs relayed to them are the next tick's.
+        """
+        msg = {"command": "start_game", "player_number": player + 1}
+        if not room.lockstep:
+            self.send_message(room.clients[player], msg)
+            return
+        with room.lock:
+            state = room.game_state
+            msg.update(state=state, tick=state.tick, seed=state.seed, input_seq=room.applied_input_seq[player])
+            self.send_message(room.clients[player], msg)
+
+    def new_room_id(self) -> str:
+        """Pick an unused room id. Caller holds self.lock."""
+        room_id = str(random.randint(1000, 9999))
+        while room_id in self.rooms:
+            room_id = str(random.randint(1000, 9999))
         return room_id
 
     def get_room_list(self) -> List[Dict]:
@@ -126,262 +163,472 @@ class LobbyServer:
             {
                 "id": room.id,
                 "name": room.name,
-                "players": 2 if room.guest else 1,
+                "players": len(room.clients) - room.clients.count(None),
+                "max_players": len(room.clients),
                 "in_game": room.in_game,
                 "single_player": room.single_player
             }
             for room in self.rooms.values()
-            if not room.in_game and not room.guest and not room.single_player  # Only show multiplayer rooms that can be joined
+            # Only show multiplayer rooms that can be joined
+            if not room.in_game and None in room.clients and not room.single_player
         ]
 
     def join_room(self, client: socket.socket, room_id: str) -> bool:
-        """Try to join a room."""
+        """Try to join a room, taking its first free seat. Call with self.lock held."""
         if room_id in self.rooms:
             room = self.rooms[room_id]
-            if not room.guest and not room.in_game:
-                room.guest = client
+            if None in room.clients and not room.in_game:
+                seat = room.clients.index(None)
+                room.clients[seat] = client
+                # A new client numbers its inputs from 1 again
+                room.last_input_seq[seat] = room.applied_input_seq[seat] = 0
                 self.client_to_room[client] = room_id
                 return True
         return False
 
-    def handle_client(self, client: socket.socket):
-        """Handle client connection in lobby and game."""
+    def open_outbox(self, client: socket.socket):
+        """Start the writer thread that sends a newly connected client its messages."""
+        self.outboxes[client] = Outbox(client)
+
+    def close_outbox(self, client: socket.socket, timeout: float = None):
+        """Stop a client's writer once its queued messages are sent (see Outbox.close)."""
+        outbox = self.outboxes.pop(client, None)
+        if outbox is not None:
+            outbox.close(timeout)
+
+    def send_message(self, client: socket.socket, msg):
+        """Encode a message and queue it for the client's writer thread; never blocks on the socket."""
+        outbox = self.outboxes.get(client)
+        if outbox is None:
+            return  # The client has disconnected
+        frame = encode_message(msg)
+        self.count_sent(msg, frame)
+        if not outbox.put(frame):
+            self.drop_slow_client(client)
+
+    def drop_slow_client(self, client: socket.socket):
+        """Disconnect a client that stopped reading; its handler cleans up as for any disconnect."""
+        self.metrics.dropped.inc(1, ("slow_client",))
+        try:
+            client.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def count_sent(self, msg, frame: bytes):
+        self.metrics.sent.record(msg["command"], len(frame))
+
+    def decode_received(self, decoder: MessageDecoder, raw: bytes) -> List[Dict]:
+        """Feed received bytes to a client's decoder and count what came out."""
+        undecodable = decoder.undecodable
+        messages = decoder.feed(raw)
+        record = self.metrics.received.record
+        for data, size in zip(messages, decoder.frame_sizes):
+            record(data["command"], size)
+        if decoder.undecodable != undecodable:
+            self.metrics.undecodable.inc(decoder.undecodable - undecodable)
+        return messages
+
+    def send_state(self, room: Room):
+        """Send each player the room's state as a delta against its last ack,
+        with the seq of the player's last input it applied."""
+        if has_area_of_interest(room.game_state.board_size):
+            self.send_area_states(room)
+            return
+        for player, client in enumerate(room.clients):
+            if client is None:
+                continue
+            tracker = self.snapshot_trackers.get(client)
+            if tracker is None:
+                tracker = self.snapshot_trackers.setdefault(client, SnapshotTracker())
+            msg = tracker.build_message(room.game_state)
+            msg["input_seq"] = room.applied_input_seq[player]
+            self.send_message(client, msg)
+
+    def send_area_states(self, room: Room):
+        """Send each player an area_state covering its view and AREA_MARGIN around it.
+
+        Segments come from the room's AreaIndex and projectiles are filed by
+        chunk once for every player, so a message costs what its area holds
+        plus the scores and alive flags, whatever the size of the board.
+        """
+        state = room.game_state
+        players = state.players
+        index = self.occupancy(room)[0].area
+        food_x, food_y = state.food_pos
+        shared = {
+            "command": "area_state", "tick": state.tick, "board_size": state.board_size,
+            "scores": players.scores, "alive": players.alive,
+            "chat_messages": list(state.chat_messages), "game_over": state.game_over, "winner": state.winner,
+        }
+        if state.tick % MINIMAP_INTERVAL == 0:
+            shared["minimap"] = index.occupied()
+            shared["heads"] = [body[0] for body in players.positions]
+            shared["food_chunk"] = (int(food_x) // AREA_CHUNK, int(food_y) // AREA_CHUNK)
+        projectiles: Dict[Tuple[int, int], List] = {}
+        for projectile in state.projectiles:
+            key = (int(projectile[0]) // AREA_CHUNK, int(projectile[1]) // AREA_CHUNK)
+            projectiles.setdefault(key, []).append(projectile)
+        for player, client in enumerate(room.clients):
+            if client is None:
+                continue
+            left, top = view_origin(state.board_size, players.positions[player][0])
+            left, top = left - AREA_MARGIN, top - AREA_MARGIN
+            right, bottom = left + VIEW_SIZE + 2 * AREA_MARGIN, top + VIEW_SIZE + 2 * AREA_MARGIN
+            seen = []
+            for key, inside in chunks_in(left, top, right, bottom):
+                for x, y, dx, dy in projectiles.get(key, ()):
+                    if inside or (left <= x < right and top <= y < bottom):
+                        seen.append((x, y, dx, dy))
+            bodies = index.segments(left, top, right, bottom, len(players))
+            shown = [other for other, body in enumerate(bodies) if body]
+            msg = dict(
+                shared, input_seq=room.applied_input_seq[player], projectiles=seen,
+                players=shown, bodies=[bodies[other] for other in shown],
+                direction=players.directions[player], stunned=players.stunned[player],
+                charges=players.charges[player],
+            )
+            if left <= food_x < right and top <= food_y < bottom:
+                msg["food_pos"] = state.food_pos
+            self.send_message(client, msg)
+
+    def tick_inputs_message(self, room: Room) -> Dict:
+        """The inputs of the tick a lockstep room just simulated.
+
+        The message's size depends on the inputs, not on the state, and every
+        HASH_INTERVAL ticks it carries the state's hash for clients to check
+        their copy against.
+        """
+        state = room.game_state
+        msg = {"command": "tick_inputs", "tick": state.tick}
+        msg.update(relay_fields(room.relayed_inputs))
+        if state.tick % HASH_INTERVAL == 0:
+            msg["hash"] = state_hash(state)
+        return msg
+
+    def send_inputs(self, room: Room):
+        """Send each lockstep player the inputs of the tick just simulated."""
+        msg = self.tick_inputs_message(room)
+        for client in room.clients:
+            if client is not None:
+                self.send_message(client, msg)
+
+    def handle_client(self, client: socket.socket, pending: bytes = b''):
+        """Handle client connection in lobby and game.
+
+        `pending` holds bytes already read from the socket elsewhere, e.g. by
+        the front process of a sharded server, and is handled first.
+        """
+        decoder = MessageDecoder()
+        self.metrics.connections.inc()
         try:
+            raw = pending
             while True:
-                try:
-                    data = pickle.loads(client.recv(2048))
-                    if not data:
-                        break
-                    
-                    if "command" not in data:
-                        continue
-                        
-                    command = data["command"]
-                    
-                    if command == "create_room":
-                        room_id = self.create_room(client, data["room_name"], data.get("single_player", False))
-                        room = self.rooms[room_id]
-                        room.host = client
-                        client.send(pickle.dumps({"command": "room_created", "room_id": room_id}))
-                        
-                    elif command == "join_room":
-                        room_id = data["room_id"]
-                        if room_id in self.rooms:
-                            room = self.rooms[room_id]
-                            if not room.guest:
-                                room.guest = client
-                                # Notify both players that game can start
-                                start_msg = {"command": "start_game"}
-                                room.host.send(pickle.dumps(start_msg))
-                                room.guest.send(pickle.dumps(start_msg))
-                            else:
-                                client.send(pickle.dumps({"command": "error", "message": "Room full"}))
-                        else:
-                            client.send(pickle.dumps({"command": "error", "message": "Room not found"}))
-                    
-                    elif command == "save_game":
-                        room = self.get_room_for_client(client)
-                        if room and room.game_state:
-                            save_path = save_multiplayer_game(room.game_state)
-                            msg = {"command": "game_saved", "save_path": save_path}
-                            room.host.send(pickle.dumps(msg))
-                            if room.guest:
-                                room.guest.send(pickle.dumps(msg))
-                    
-                    elif command == "ready":
-                        # Handle player ready
-                        room_id = self.client_to_room.get(client)
-                        if room_id:
-                            room = self.rooms[room_id]
-                            if client == room.host:
-                                room.host_ready = True
-                            elif client == room.guest:
-                                room.guest_ready = True
-                                
-                            # If both ready, start game
-                            if room.host_ready and room.guest_ready:
-                                room.in_game = True
-                                start_msg = {"command": "start_game", "player_number": 1}
-                                room.host.send(pickle.dumps(start_msg))
-                                if not room.single_player:
-                                    start_msg["player_number"] = 2
-                                    room.guest.send(pickle.dumps(start_msg))
-                                
-                    elif command == "game_input":
-                        # Handle game input
-                        room_id = self.client_to_room.get(client)
-                        if room_id:
-                            room = self.rooms[room_id]
-                            if room.in_game:
-                                self.handle_game_input(room, client, data)
-                                
-                except (EOFError, pickle.UnpicklingError):
-                    pass
-                    
+                for data in self.decode_received(decoder, raw):
+                    self.handle_command(client, data)
+                if decoder.error:
+                    raise decoder.error
+                raw = client.recv(65536)
+                if not raw:
+                    break
+        except ProtocolError:
+            self.metrics.dropped.inc(1, ("protocol_error",))
         except (ConnectionResetError, BrokenPipeError):
-            self.handle_disconnect(client)
+            pass
+        self.metrics.connections.dec()
+        self.handle_disconnect(client)
+        self.close_outbox(client)
 
-    def handle_game_input(self, room: Room, client: socket.socket, data: Dict):
-        """Handle game input and update game state."""
-        is_host = client == room.host
-        game_state = room.game_state
+    def handle_command(self, client: socket.socket, data: Dict):
+        """Dispatch a single lobby or game command from a client."""
+        command = data["command"]
         
-        # Handle chat messages
-        if "chat" in data:
-            message = f"Player {1 if is_host else 2}: {data['chat']}"
-            game_state.chat_messages.append(message)
+        if command == "create_room":
+            board_size = tuple(data.get("board_size", (BOARD_SIZE, BOARD_SIZE)))
+            if not all(MIN_BOARD_SIZE <= side <= MAX_BOARD_SIZE for side in board_size):
+                self.send_message(client, {"command": "error", "message":
+                                           f"Board sides must be {MIN_BOARD_SIZE} to {MAX_BOARD_SIZE} cells"})
+                return
+            max_players = data.get("max_players", 2)
+            if not 2 <= max_players <= MAX_PLAYERS:
+                self.send_message(client, {"command": "error", "message":
+                                           f"Rooms hold 2 to {MAX_PLAYERS} players"})
+                return
+            room_id = self.create_room(client, data["room_name"], data.get("single_player", False), board_size,
+                                       max_players, data.get("lockstep", False), data.get("seed"))
+            self.send_message(client, {"command": "room_created", "room_id": room_id})
             
-        # Handle game controls
-        if is_host:
-            if "direction" in data:
-                game_state.snake1_direction = data["direction"]
-            if "shoot" in data and data["shoot"] and game_state.snake1_projectiles > 0:
-                game_state.projectiles.append(
-                    (game_state.snake1_pos[0][0],
-                     game_state.snake1_pos[0][1],
-                     game_state.snake1_direction[0],
-                     game_state.snake1_direction[1])
-                )
-                game_state.snake1_projectiles -= 1
-        else:
-            if "direction" in data:
-                game_state.snake2_direction = data["direction"]
-            if "shoot" in data and data["shoot"] and game_state.snake2_projectiles > 0:
-                game_state.projectiles.append(
-                    (game_state.snake2_pos[0][0],
-                     game_state.snake2_pos[0][1],
-                     game_state.snake2_direction[0],
-                     game_state.snake2_direction[1])
-                )
-                game_state.snake2_projectiles -= 1
+        elif command == "join_room":
+            room_id = data["room_id"]
+            with self.lock:
+                joined = self.join_room(client, room_id)
+                room = self.rooms.get(room_id)
+                full = room is not None and None not in room.clients
+            if joined:
+                if full:
+                    # Notify every player that game can start
+                    start_msg = {"command": "start_game"}
+                    for player in room.clients:
+                        self.send_message(player, start_msg)
+            elif room:
+                message = "Game already started" if room.in_game else "Room full"
+                self.send_message(client, {"command": "error", "message": message})
+            else:
+                self.send_message(client, {"command": "error", "message": "Room not found"})
+        
+        elif command == "list_rooms":
+            with self.lock:
+                rooms = self.get_room_list()
+            self.send_message(client, {"command": "room_list", "rooms": rooms})
+        
+        elif command == "save_game":
+            room = self.get_room_for_client(client)
+            if room and room.game_state:
+                with room.lock:
+                    save_path = save_multiplayer_game(room.game_state)
+                msg = {"command": "game_saved", "save_path": save_path}
+                for player in room.clients:
+                    if player:
+                        self.send_message(player, msg)
+        
+        elif command == "ready":
+            # Handle player ready
+            room = self.get_room_for_client(client)
+            if room and client in room.clients:
+                room.ready[room.clients.index(client)] = True
+                    
+                # If everyone is ready, start game
+                if all(room.ready):
+                    room.in_game = True
+                    for player in range(len(room.clients)):
+                        self.send_start(room, player)
+                    
+        elif command == "ack":
+            tracker = self.snapshot_trackers.get(client)
+            if tracker and "seq" in data:
+                tracker.acknowledge(data["seq"])
                 
-        # Send updated game state to both players
-        state_msg = {"command": "game_state", "state": game_state}
-        room.host.send(pickle.dumps(state_msg))
-        if room.guest:
-            room.guest.send(pickle.dumps(state_msg))
+        elif command == "desync":
+            # A lockstep client's state no longer matches; start it again from the server's
+            room = self.get_room_for_client(client)
+            self.metrics.desyncs.inc()
+            if room and room.in_game and room.lockstep and client in room.clients:
+                self.send_start(room, room.clients.index(client))
+
+        elif command == "game_input":
+            # Handle game input
+            room = self.get_room_for_client(client)
+            if room and room.in_game:
+                self.handle_game_input(room, client, data)
+            else:
+                self.metrics.dropped.inc(1, ("not_in_game",))
+
+    def get_room_for_client(self, client) -> Optional[Room]:
+        """Look up the room a client belongs to."""
+        room_id = self.client_to_room.get(client)
+        return self.rooms.get(room_id) if room_id else None
+
+    def handle_game_input(self, room: Room, client: socket.socket, data: Dict):
+        """Queue game input for the player's next ticks, dropping repeated sequence numbers."""
+        player = room.clients.index(client)
+        seq = data.get("seq")
+        if seq is not None:
+            if seq <= room.last_input_seq[player]:
+                self.metrics.dropped.inc(1, ("stale_input",))
+                return
+            room.last_input_seq[player] = seq
+        room.pending_inputs[player].append(data)
+
+    def take_tick_inputs(self, queue: deque) -> List[Dict]:
+        """Pop one tick's worth of a player's inputs.
+
+        Inputs are taken in order up to the second direction change, so a
+        quick double turn is spread over two ticks instead of the first turn
+        being overwritten. Shots and chat in between are not held back.
+        """
+        inputs = []
+        turned = False
+        while queue:
+            if "direction" in queue[0]:
+                if turned:
+                    break
+                turned = True
+            inputs.append(queue.popleft())
+        return inputs
+
+    def take_player_inputs(self, room: Room, player: int) -> List[Dict]:
+        """Pop a player's inputs for this tick and record the last seq among them."""
+        inputs = self.take_tick_inputs(room.pending_inputs[player])
+        if inputs:
+            room.applied_input_seq[player] = inputs[-1].get("seq", room.applied_input_seq[player])
+        return inputs
+
+    def apply_pending_inputs(self, room: Room) -> List[Tuple[int, Dict]]:
+        """Apply this tick's queued inputs for every player and return them
+        as (player, input) pairs in order. Caller holds room.lock."""
+        applied = []
+        for player in range(len(room.pending_inputs)):
+            for data in self.take_player_inputs(room, player):
+                self.apply_input(room, player, data)
+                applied.append((player, data))
+        return applied
+
+    def apply_input(self, room: Room, player: int, data: Dict):
+        """Apply one player's input to the game state (player 0 is the host)."""
+        apply_input(room.game_state, player, data)
 
     def handle_disconnect(self, client: socket.socket):
         """Handle client disconnection."""
         with self.lock:
             room_id = self.client_to_room.get(client)
             if room_id:
-                room = self.rooms[room_id]
-                if client == room.host:
-                    # Notify guest and close room
-                    if room.guest:
-                        disconnect_msg = {"command": "host_disconnected"}
-                        try:
-                            room.guest.send(pickle.dumps(disconnect_msg))
-                        except:
-                            pass
+                room = self.rooms.get(room_id)
+                if room and client == room.host:
+                    # Notify the other players and close room
+                    disconnect_msg = {"command": "host_disconnected"}
+                    for guest in room.clients[1:]:
+                        if guest:
+                            try:
+                                self.send_message(guest, disconnect_msg)
+                            except:
+                                pass
                     del self.rooms[room_id]
-                elif client == room.guest:
-                    # Notify host
-                    room.guest = None
-                    room.guest_ready = False
-                    room.in_game = False
+                elif room and client in room.clients:
+                    # Free the seat and notify the others
+                    seat = room.clients.index(client)
+                    room.clients[seat] = None
+                    room.ready[seat] = False
+                    if room.in_game:
+                        self.leave_game(room, seat)
                     disconnect_msg = {"command": "guest_disconnected"}
-                    try:
-                        room.host.send(pickle.dumps(disconnect_msg))
-                    except:
-                        pass
+                    for player in room.clients:
+                        if player:
+                            try:
+                                self.send_message(player, disconnect_msg)
+                            except:
+                                pass
+                    if room.in_game and room.lockstep:
+                        # The snake left outside the relayed inputs, so the others restart from the server's state
+                        for player, guest in enumerate(room.clients):
+                            if guest:
+                                self.send_start(room, player)
                 del self.client_to_room[client]
+            self.snapshot_trackers.pop(client, None)
+
+    def leave_game(self, room: Room, seat: int):
+        """Take a departed player out of a running game.
+
+        The others play on without that snake. With fewer than two players
+        left the room goes back to the lobby with a fresh game, so whoever
+        joins next does not land in the old one.
+        """
+        with room.lock:
+            room.pending_inputs[seat].clear()
+            if len(room.clients) - room.clients.count(None) >= 2:
+                retire_player(room.game_state, seat)
+                return
+            room.in_game = False
+            state = room.game_state
+            room.game_state = self.create_game_state(state.board_size, len(room.clients), state.seed)
+            room.occupancy = None
 
     def update_games(self):
-        """Update all active games."""
-        while True:
-            with self.lock:
-                for room in self.rooms.values():
-                    if room.in_game and not room.game_state.game_over:
-                        self.update_game_state(room)
-            time.sleep(0.15)
+        """Update all active games on a fixed timestep."""
+        self.tick_scheduler.run(self.tick_games)
 
-    def update_game_state(self, room: Room):
-        """Update a single game's state."""
-        game_state = room.game_state
-        
-        # Update snake positions
-        if game_state.snake1_stunned <= 0:
-            new_head = (
-                game_state.snake1_pos[0][0] + game_state.snake1_direction[0],
-                game_state.snake1_pos[0][1] + game_state.snake1_direction[1]
-            )
-            game_state.snake1_pos.insert(0, new_head)
-            game_state.snake1_pos.pop()
+    def tick_games(self):
+        """Advance every active game by one tick and broadcast the results."""
+        tick_start = time.perf_counter()
+        rooms = [room for room in list(self.rooms.values())
+                 if room.in_game and not room.game_state.game_over]
+        if self.engine is not None:
+            # The engine simulates two-snake rooms on its own board size; other rooms run one
+            # by one, lockstep rooms too, since their clients run the same step
+            supports = self.engine.supports
+            batched, single = [], []
+            for room in rooms:
+                (single if room.lockstep or not supports(room.game_state) else batched).append(room)
+            self.tick_batch(batched)
+            self.simulate_rooms(single)
         else:
-            game_state.snake1_stunned -= 1
-            
-        # Only update snake2 in multiplayer mode
-        if not room.single_player:
-            if game_state.snake2_stunned <= 0:
-                new_head = (
-                    game_state.snake2_pos[0][0] + game_state.snake2_direction[0],
-                    game_state.snake2_pos[0][1] + game_state.snake2_direction[1]
-                )
-                game_state.snake2_pos.insert(0, new_head)
-                game_state.snake2_pos.pop()
+            self.simulate_rooms(rooms)
+        for room in rooms:
+            if room.lockstep:
+                self.send_inputs(room)
             else:
-                game_state.snake2_stunned -= 1
-        
-        # Update projectiles
-        new_projectiles = []
-        for p in game_state.projectiles:
-            new_x = p[0] + p[2]
-            new_y = p[1] + p[3]
-            
-            # Check if projectile hits snake1
-            if any(abs(new_x - x) < 1 and abs(new_y - y) < 1 
-                  for x, y in game_state.snake1_pos):
-                game_state.snake1_stunned = 30
-                continue
-                
-            # Check if projectile hits snake2 (multiplayer only)
-            if not room.single_player:
-                if any(abs(new_x - x) < 1 and abs(new_y - y) < 1 
-                      for x, y in game_state.snake2_pos):
-                    game_state.snake2_stunned = 30
-                    continue
-                
-            # Keep projectile if it's still in bounds
-            if 0 <= new_x < 25 and 0 <= new_y < 25:
-                new_projectiles.append((new_x, new_y, p[2], p[3]))
-                
-        game_state.projectiles = new_projectiles
-        
-        # Recharge projectiles
-        if game_state.snake1_projectiles < 5:
-            game_state.snake1_projectiles += 1
-        if not room.single_player and game_state.snake2_projectiles < 5:
-            game_state.snake2_projectiles += 1
-        
-        # Check collisions with food
-        if (abs(game_state.snake1_pos[0][0] - game_state.food_pos[0]) < 1 and
-            abs(game_state.snake1_pos[0][1] - game_state.food_pos[1]) < 1):
-            game_state.snake1_score += 1
-            game_state.food_pos = (random.randint(0, 24), random.randint(0, 24))
-            game_state.snake1_pos.append(game_state.snake1_pos[-1])
-            
-        if not room.single_player:
-            if (abs(game_state.snake2_pos[0][0] - game_state.food_pos[0]) < 1 and
-                abs(game_state.snake2_pos[0][1] - game_state.food_pos[1]) < 1):
-                game_state.snake2_score += 1
-                game_state.food_pos = (random.randint(0, 24), random.randint(0, 24))
-                game_state.snake2_pos.append(game_state.snake2_pos[-1])
-        
-        # Check for collisions with walls or self
-        if (not 0 <= game_state.snake1_pos[0][0] < 25 or
-            not 0 <= game_state.snake1_pos[0][1] < 25 or
-            game_state.snake1_pos[0] in game_state.snake1_pos[1:]):
-            game_state.game_over = True
-            game_state.winner = "Game Over!" if room.single_player else "Player 2"
-            
-        if not room.single_player:
-            if (not 0 <= game_state.snake2_pos[0][0] < 25 or
-                not 0 <= game_state.snake2_pos[0][1] < 25 or
-                game_state.snake2_pos[0] in game_state.snake2_pos[1:]):
-                game_state.game_over = True
-                game_state.winner = "Player 1"
+                self.send_state(room)
+        self.metrics.tick_duration.observe(time.perf_counter() - tick_start)
+        self.report_tick_stats()
+
+    def simulate_rooms(self, rooms: List[Room]):
+        """Advance the given rooms one at a time with update_game_state."""
+        durations = []
+        start = time.perf_counter()
+        for room in rooms:
+            with room.lock:
+                inputs = self.apply_pending_inputs(room)
+                self.update_game_state(room)
+                if room.lockstep:
+                    room.relayed_inputs = inputs
+            end = time.perf_counter()
+            durations.append(end - start)
+            start = end
+        self.metrics.room_simulation.observe_many(durations)
+
+    def tick_batch(self, rooms: List[Room]):
+        """Advance the given rooms with one batched engine step."""
+        engine = self.engine
+        active = {room.id for room in rooms}
+        for room_id in [room_id for room_id in engine.slots if room_id not in active]:
+            engine.remove_room(room_id)
+        for room in rooms:
+            with room.lock:
+                slot = engine.slots.get(room.id)
+                if slot is None:
+                    slot = engine.add_room(room.id, room.game_state, room.single_player)
+                for player in range(len(room.pending_inputs)):
+                    for data in self.take_player_inputs(room, player):
+                        if "chat" in data:
+                            room.game_state.chat_messages.append(f"Player {player + 1}: {data['chat']}")
+                        engine.apply_input(slot, player, data)
+        start = time.perf_counter()
+        engine.step()
+        if rooms:
+            # One step covers every room, so record the average once
+            self.metrics.room_simulation.observe((time.perf_counter() - start) / len(rooms))
+        projectiles = engine.projectiles_by_slot()
+        for room in rooms:
+            with room.lock:
+                engine.export(room.id, room.game_state, projectiles.get(engine.slots[room.id], ()))
+
+    def report_tick_stats(self):
+        """Add what the scheduler's overrun counters gained since the last tick to the metrics."""
+        scheduler = self.tick_scheduler
+        counters = (scheduler.overruns, scheduler.late_ticks, scheduler.skipped_ticks)
+        if counters != self.reported_tick_counters:
+            for kind, count, reported in zip(("long", "late", "skipped"), counters, self.reported_tick_counters):
+                if count != reported:
+                    self.metrics.tick_overruns.inc(count - reported, (kind,))
+            self.reported_tick_counters = counters
+
+    def occupancy(self, room: Room) -> List[OccupancyGrid]:
+        """Return the room's occupancy grids, one per snake, rebuilding them for new bodies.
+
+        Every grid keeps the same `free` cells up to date, and on boards with
+        an area of interest the same AreaIndex. List comparison
+        tries identity before equality, so while the bodies are the ones the
+        grids follow the check is a pointer comparison per snake.
+        """
+        game_state = room.game_state
+        positions = game_state.players.positions
+        grids = room.occupancy
+        if grids is None or room.occupancy_bodies != positions:
+            grids = room.occupancy = build_occupancy(game_state, area=has_area_of_interest(game_state.board_size))
+            room.occupancy_bodies = list(positions)
+        return grids
+
+    def update_game_state(self, room: Room):
+        """Update a single game's state by one tick (see simulation.step)."""
+        step(room.game_state, self.occupancy(room), room.single_player)
 
     def start(self):
         """Start the server."""
@@ -395,14 +642,99 @@ class LobbyServer:
                 client, addr = self.server.accept()
                 print(f"New connection from {addr}")
                 player_count += 1
+                self.open_outbox(client)
                 # Send player number immediately
-                client.send(pickle.dumps(player_count))
+                self.send_message(client, {"command": "welcome", "player_number": player_count})
                 # Start client handler thread
                 threading.Thread(target=self.handle_client, args=(client,), daemon=True).start()
             except Exception as e:
                 print(f"Error accepting client: {e}")
                 continue
 
+class AsyncLobbyServer(LobbyServer):
+    """Lobby server running every connection on a single asyncio event loop.
+
+    Accepts the same commands as LobbyServer, but clients are asyncio
+    StreamWriters instead of sockets and no thread is spawned per connection.
+    """
+
+    def send_message(self, client: asyncio.StreamWriter, msg):
+        """Queue a message on the client's transport without blocking."""
+        if not client.is_closing():
+            frame = encode_message(msg)
+            self.count_sent(msg, frame)
+            if client.transport.get_write_buffer_size() + len(frame) > MAX_QUEUED_BYTES:
+                # The client stopped reading; its handler cleans up once the transport is gone
+                self.metrics.dropped.inc(1, ("slow_client",))
+                client.transport.abort()
+                return
+            client.write(frame)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Handle one client connection in lobby and game."""
+        self.player_count += 1
+        self.send_message(writer, {"command": "welcome", "player_number": self.player_count})
+        decoder = MessageDecoder()
+        self.metrics.connections.inc()
+        try:
+            while True:
+                raw = await reader.read(65536)
+                if not raw:
+                    break
+                for data in self.decode_received(decoder, raw):
+                    self.handle_command(writer, data)
+                if decoder.error:
+                    raise decoder.error
+        except ProtocolError:
+            self.metrics.dropped.inc(1, ("protocol_error",))
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            self.metrics.connections.dec()
+            self.handle_disconnect(writer)
+            writer.close()
+
+    async def run_game_loop(self):
+        """Update all active games without blocking the event loop."""
+        await self.tick_scheduler.run_async(self.tick_games)
+
+    async def serve(self):
+        """Accept connections on the already bound listening socket."""
+        self.player_count = 0
+        self.server.setblocking(False)
+        server = await asyncio.start_server(self.handle_connection, sock=self.server, backlog=1024)
+        asyncio.get_running_loop().create_task(self.run_game_loop())
+        async with server:
+            await server.serve_forever()
+
+    def start(self):
+        """Start the server."""
+        print("Server is running (asyncio)...")
+        asyncio.run(self.serve())
+
 if __name__ == "__main__":
-    server = LobbyServer()
-    server.start() 
\ No newline at end of file
+    metrics_port = None
+    if '--metrics-port' in sys.argv:
+        metrics_port = int(sys.argv[sys.argv.index('--metrics-port') + 1])
+    batch = False
+    if '--numpy' in sys.argv:
+        # The engine only runs if it plays long games exactly as simulation.step does
+        from batch_engine import check_parity
+        difference = check_parity()
+        if difference:
+            print(f"Not using the batch engine, it differs from simulation.step at {difference}")
+        batch = difference is None
+    if '--shards' in sys.argv:
+        from sharded_server import ShardedLobbyServer
+        server = ShardedLobbyServer(int(sys.argv[sys.argv.index('--shards') + 1]), batch, metrics_port)
+    elif '--asyncio' in sys.argv:
+        server = AsyncLobbyServer()
+    else:
+        server = LobbyServer()
+    if metrics_port is not None:
+        server.metrics.serve(metrics_port)
+        print(f"Metrics on http://127.0.0.1:{metrics_port}/metrics")
+    if batch and '--shards' not in sys.argv:
+        from batch_engine import BatchEngine
+        server.engine = BatchEngine()
+    server.start()
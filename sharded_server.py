@@ -0,0 +1,220 @@
+import multiprocessing
+import os
+import random
+import socket
+import threading
+from multiprocessing.reduction import recv_handle, send_handle
+from typing import Dict, List
+
+from protocol import MessageDecoder, ProtocolError, encode_message
+from server import LobbyServer
+
+HAND_OFF_TIMEOUT = 1.0  # Seconds the front waits to send what it has queued for a client
+
+
+def shard_of(room_id: str, shards: int):
+    """The shard holding a room, or None for an id no shard can hold."""
+    return int(room_id) % shards if room_id.isdigit() else None
+
+
+class ShardWorker(LobbyServer):
+    """Lobby server running in a worker process on sockets handed over by the front.
+
+    Room ids on shard `index` are always congruent to `index` modulo the shard
+    count, so the front can route join_room without asking the workers.
+    A handed-over client stays on its shard for the rest of its connection,
+    so a later join_room for a room on another shard is refused; the client
+    has to reconnect to join it.
+    """
+
+    def __init__(self, index: int, shards: int, conn):
+        self.index = index
+        self.shards = shards
+        self.conn = conn
+        self.conn_lock = threading.Lock()
+        self.room_directory: List[Dict] = []  # Joinable rooms on every shard
+        self.published = None
+        self.init_state()
+
+    def new_room_id(self) -> str:
+        """Pick an unused room id that routes back to this shard."""
+        first = 1000 + (self.index - 1000) % self.shards
+        room_id = str(random.randrange(first, 10000, self.shards))
+        while room_id in self.rooms:
+            room_id = str(random.randrange(first, 10000, self.shards))
+        return room_id
+
+    def get_room_list(self) -> List[Dict]:
+        """Get list of available rooms across all shards."""
+        return self.room_directory
+
+    def handle_command(self, client: socket.socket, data: Dict):
+        if data["command"] == "join_room" and shard_of(data["room_id"], self.shards) not in (None, self.index):
+            self.send_message(client, {"command": "error", "message": "Room is on another shard; reconnect to join it"})
+            return
+        super().handle_command(client, data)
+
+    def tick_games(self):
+        super().tick_games()
+        self.publish_rooms()
+
+    def publish_rooms(self):
+        """Tell the front about this shard's joinable rooms when they change."""
+        # Client handlers add and delete rooms while the tick runs
+        with self.lock:
+            listing = (LobbyServer.get_room_list(self), len(self.rooms))
+        if listing != self.published:
+            self.published = listing
+            with self.conn_lock:
+                self.conn.send(("rooms",) + listing)
+
+    def receive_from_front(self):
+        """Accept handed-over clients and room directory updates from the front."""
+        while True:
+            try:
+                msg = self.conn.recv()
+            except EOFError:
+                os._exit(0)  # The front process is gone
+            if msg[0] == "client":
+                client = socket.socket(fileno=recv_handle(self.conn))
+                self.open_outbox(client)
+                threading.Thread(target=self.handle_client, args=(client, msg[1]), daemon=True).start()
+            elif msg[0] == "rooms":
+                self.room_directory = msg[1]
+
+    def start(self):
+        """Run the shard until the front process exits."""
+        print(f"Shard {self.index} is running (pid {os.getpid()})")
+        threading.Thread(target=self.receive_from_front, daemon=True).start()
+        self.update_games()
+
+
+def run_shard(index: int, shards: int, conn, batch: bool = False, metrics_port: int = None):
+    worker = ShardWorker(index, shards, conn)
+    if batch:
+        from batch_engine import BatchEngine
+        worker.engine = BatchEngine()
+    if metrics_port is not None:
+        worker.metrics.serve(metrics_port)
+    worker.start()
+
+
+class ShardedLobbyServer(LobbyServer):
+    """Front process that spreads rooms over worker processes.
+
+    Clients connect here and stay in the lobby until they create or join a
+    room. At that point the socket is passed to the shard owning the room,
+    along with any bytes already read from it, and the shard serves the client
+    from then on. Each shard runs its own tick loop in its own process.
+    """
+
+    def __init__(self, shards: int = None, batch: bool = False, metrics_port: int = None):
+        super().__init__()
+        self.shards = shards or os.cpu_count() or 1
+        self.batch = batch  # Shards simulate with batch_engine.BatchEngine
+        self.metrics_port = metrics_port  # Shard i serves its metrics on metrics_port + 1 + i
+        self.workers = []
+        self.worker_conns = []
+        self.worker_locks = []
+        self.shard_rooms: List[List[Dict]] = [[] for _ in range(self.shards)]
+        self.shard_loads = [0] * self.shards
+
+    def start_workers(self):
+        for index in range(self.shards):
+            conn, worker_conn = multiprocessing.Pipe()
+            shard_metrics_port = None if self.metrics_port is None else self.metrics_port + 1 + index
+            worker = multiprocessing.Process(
+                target=run_shard, daemon=True,
+                args=(index, self.shards, worker_conn, self.batch, shard_metrics_port))
+            worker.start()
+            worker_conn.close()
+            self.workers.append(worker)
+            self.worker_conns.append(conn)
+            self.worker_locks.append(threading.Lock())
+        for index in range(self.shards):
+            threading.Thread(target=self.watch_shard, args=(index,), daemon=True).start()
+
+    def watch_shard(self, index: int):
+        """Collect room listings from one shard and share the combined directory."""
+        conn = self.worker_conns[index]
+        while True:
+            try:
+                msg = conn.recv()
+            except EOFError:
+                print(f"Shard {index} exited")
+                return
+            if msg[0] == "rooms":
+                with self.lock:
+                    self.shard_rooms[index] = msg[1]
+                    self.shard_loads[index] = msg[2]
+                    directory = self.get_room_list()
+                for shard in range(self.shards):
+                    with self.worker_locks[shard]:
+                        self.worker_conns[shard].send(("rooms", directory))
+
+    def get_room_list(self) -> List[Dict]:
+        """Get list of available rooms across all shards."""
+        return [room for rooms in self.shard_rooms for room in rooms]
+
+    def pick_shard(self, data: Dict):
+        """Return the shard that should serve `data`, or None if no shard can."""
+        if data["command"] == "create_room":
+            with self.lock:
+                index = min(range(self.shards), key=self.shard_loads.__getitem__)
+                # Count the room now; the shard's next listing corrects the estimate
+                self.shard_loads[index] += 1
+            return index
+        return shard_of(data.get("room_id", ""), self.shards)
+
+    def hand_off(self, client: socket.socket, index: int, pending: bytes):
+        """Pass the client socket and its unread bytes to a shard."""
+        worker = self.workers[index]
+        with self.worker_locks[index]:
+            self.worker_conns[index].send(("client", pending))
+            send_handle(self.worker_conns[index], client.fileno(), worker.pid)
+
+    def handle_client(self, client: socket.socket, pending: bytes = b''):
+        """Serve lobby commands until the client creates or joins a room."""
+        decoder = MessageDecoder()
+        self.metrics.connections.inc()
+        try:
+            raw = pending
+            while True:
+                messages = self.decode_received(decoder, raw)
+                for i, data in enumerate(messages):
+                    command = data["command"]
+                    if command == "list_rooms":
+                        self.send_message(client, {"command": "room_list", "rooms": self.get_room_list()})
+                    elif command in ("create_room", "join_room"):
+                        index = self.pick_shard(data)
+                        if index is None:
+                            self.send_message(client, {"command": "error", "message": "Room not found"})
+                            continue
+                        unread = b''.join(encode_message(msg) for msg in messages[i:])
+                        # Whatever the front still has queued must not interleave with the shard's messages
+                        self.close_outbox(client, HAND_OFF_TIMEOUT)
+                        self.hand_off(client, index, unread + bytes(decoder.buffer))
+                        return
+                if decoder.error:
+                    raise decoder.error
+                raw = client.recv(65536)
+                if not raw:
+                    break
+        except ProtocolError:
+            self.metrics.dropped.inc(1, ("protocol_error",))
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            # The shard holds its own descriptor for handed-over clients
+            self.metrics.connections.dec()
+            self.close_outbox(client, HAND_OFF_TIMEOUT)
+            client.close()
+
+    def update_games(self):
+        """Games are ticked by the shard processes."""
+
+    def start(self):
+        """Start the shard processes and accept lobby connections."""
+        self.start_workers()
+        print(f"Sharded across {self.shards} worker processes")
+        super().start()
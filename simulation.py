@@ -0,0 +1,282 @@
+import random
+import zlib
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+from game_state import BOARD_SIZE, GameState, PlayerTable
+from occupancy import AreaIndex, FreeCells, OccupancyGrid
+from snake_body import SnakeBody
+
+HASH_INTERVAL = 30  # Ticks between state hashes in lockstep rooms
+
+# What a relayed input holds, one bit each in its "flags" entry
+TURNED, SHOT, CHATTED = 1, 2, 4
+
+
+def create_game_state(board_size: Tuple[int, int] = (BOARD_SIZE, BOARD_SIZE), players: int = 2,
+                      seed: int = 0) -> GameState:
+    """Create a fresh game state on a board of the given width and height.
+
+    Every player starts in a row of their own, spread from row 5 to 5 rows
+    from the bottom, or over every row but the edges when that is too few.
+    Players 1, 3, 5, ... start on the left heading right and 2, 4, 6, ...
+    on the right heading left. When there are more players than rows, the
+    rest start in columns of their own, alternately heading down from the
+    top and up from the bottom, and only past that do lanes repeat.
+    """
+    width, height = board_size
+    table = PlayerTable()
+    if players <= height - 9:
+        rows = spread(players, 5, height - 5)
+    else:
+        rows = spread(min(players, height - 2), 1, height - 2)
+    for lane, y in enumerate(rows):
+        if lane % 2 == 0:
+            table.add(SnakeBody([(5, y), (4, y), (3, y)]), (1, 0))
+        else:
+            table.add(SnakeBody([(width - 5, y), (width - 4, y), (width - 3, y)]), (-1, 0))
+    for lane, x in enumerate(spread(min(players - len(rows), width - 2), 1, width - 2)):
+        if lane % 2 == 0:
+            table.add(SnakeBody([(x, 5), (x, 4), (x, 3)]), (0, 1))
+        else:
+            table.add(SnakeBody([(x, height - 5), (x, height - 4), (x, height - 3)]), (0, -1))
+    lanes = len(table)
+    for player in range(lanes, players):
+        # Snakes sharing a lane start on the same cells heading the same way
+        table.add(SnakeBody(table.positions[player % lanes]), table.directions[player % lanes])
+    return GameState(
+        table,  # players
+        (width * 2 // 5, height * 2 // 5),  # food_pos
+        [],  # projectiles
+        False,  # game_over
+        "",  # winner
+        deque(maxlen=5),  # chat_messages
+        board_size=(width, height),
+        seed=seed
+    )
+
+
+def spread(count: int, low: int, high: int) -> List[int]:
+    """`count` evenly spaced values from low to high, distinct while there is room."""
+    if count <= 1:
+        return [low][:count]
+    return [low + i * (high - low) // (count - 1) for i in range(count)]
+
+
+def build_occupancy(game_state: GameState, area: bool = False) -> List[OccupancyGrid]:
+    """One occupancy grid per snake, all keeping the same free cells up to date,
+    and with `area` the same AreaIndex too."""
+    free = FreeCells(*game_state.board_size)
+    index = AreaIndex() if area else None
+    return [OccupancyGrid(body, free, index, player) for player, body in enumerate(game_state.players.positions)]
+
+
+def apply_input(game_state: GameState, player: int, data: Dict):
+    """Apply one player's input to the game state (player 0 is the host)."""
+    players = game_state.players
+
+    # Handle chat messages
+    if "chat" in data:
+        message = f"Player {player + 1}: {data['chat']}"
+        game_state.chat_messages.append(message)
+
+    # Handle game controls
+    if "direction" in data:
+        players.directions[player] = data["direction"]
+    if "shoot" in data and data["shoot"] and players.charges[player] > 0 and players.alive[player]:
+        head = players.positions[player][0]
+        direction = players.directions[player]
+        game_state.projectiles.append((head[0], head[1], direction[0], direction[1]))
+        players.charges[player] -= 1
+
+
+def step(game_state: GameState, grids: List[OccupancyGrid], single_player: bool):
+    """Advance a game by one tick.
+
+    The tick makes two passes over the player table with the projectile
+    update in between, and every check is a lookup in the snakes' grids,
+    so its cost grows linearly with the number of players. The result
+    depends only on the state, so every copy of a state given the same
+    inputs stays identical: food respawns draw from a generator seeded
+    with the room's seed and the tick.
+    """
+    game_state.tick += 1
+    width, height = game_state.board_size
+    free = grids[0].free
+    players = game_state.players
+    positions, directions, stunned, charges, alive = (
+        players.positions, players.directions, players.stunned, players.charges, players.alive)
+    # Crashed snakes stay where they fell and sit out the rest of the game
+    playing = range(len(alive)) if all(alive) else [player for player, live in enumerate(alive) if live]
+
+    # Update snake positions and recharge projectiles
+    moves = players.moves
+    for player in playing:
+        if stunned[player] <= 0:
+            body = positions[player]
+            direction = directions[player]
+            new_head = (body[0][0] + direction[0], body[0][1] + direction[1])
+            grid = grids[player]
+            grid.add(new_head)
+            grid.remove(body.advance(*new_head))
+            moves[player] += 1
+        else:
+            stunned[player] -= 1
+        if charges[player] < 5:
+            charges[player] += 1
+
+    # Update projectiles (positions are whole cells, so a hit is an exact match).
+    # Only a cell some snake covers, or a head that left the board, can be
+    # hit; the first snake found there is stunned.
+    covered = free.owners
+    new_projectiles = []
+    for p in game_state.projectiles:
+        new_x = p[0] + p[2]
+        new_y = p[1] + p[3]
+        on_board = 0 <= new_x < width and 0 <= new_y < height
+
+        if not on_board or new_y * width + new_x in covered:
+            cell = (new_x, new_y)
+            hit = next((player for player, grid in enumerate(grids) if cell in grid.counts), None)
+            if hit is not None:
+                stunned[hit] = 30
+                continue
+
+        # Keep projectile if it's still in bounds
+        if on_board:
+            new_projectiles.append((new_x, new_y, p[2], p[3]))
+
+    game_state.projectiles = new_projectiles
+
+    # Check collisions with food in player order, then with walls or self
+    # (the head's own cell counts once)
+    crashed = []
+    rng = None
+    for player in playing:
+        body = positions[player]
+        head = body[0]
+        if (abs(head[0] - game_state.food_pos[0]) < 1 and
+            abs(head[1] - game_state.food_pos[1]) < 1):
+            players.scores[player] += 1
+            if rng is None:
+                rng = food_rng(game_state)
+            # A full board leaves the food where it was
+            game_state.food_pos = free.sample(rng) or game_state.food_pos
+            body.grow()
+            grids[player].grow(body[-1])
+        if not 0 <= head[0] < width or not 0 <= head[1] < height or grids[player].count(head) > 1:
+            crashed.append(player)
+            alive[player] = False
+    if crashed:
+        survivors = [player for player in playing if alive[player]]
+        if single_player:
+            game_state.game_over = True
+            game_state.winner = "Game Over!"
+        elif len(survivors) <= 1:
+            # Snakes crashing on the same tick leave the win to the lowest player number
+            game_state.game_over = True
+            game_state.winner = f"Player {(survivors or crashed)[0] + 1}"
+
+
+def retire_player(game_state: GameState, player: int):
+    """Take a player who left out of the game: the snake stops as if it had
+    crashed, and with one snake or none left the game ends as step ends it."""
+    alive = game_state.players.alive
+    alive[player] = False
+    survivors = [other for other, live in enumerate(alive) if live]
+    if len(survivors) <= 1 and not game_state.game_over:
+        game_state.game_over = True
+        game_state.winner = f"Player {survivors[0] + 1}" if survivors else "Game Over!"
+
+
+def food_rng(game_state: GameState) -> random.Random:
+    """The generator food respawns on this tick draw from."""
+    return random.Random((game_state.seed << 32) | game_state.tick)
+
+
+def state_hash(game_state: GameState) -> int:
+    """A CRC-32 of everything the next ticks depend on, to compare copies of a state.
+
+    Bodies are summed up by their length and end segments, so the hash
+    costs the same whatever the snakes' length; a body that differs
+    anywhere shows up at its tail within a snake length of ticks.
+    """
+    players = game_state.players
+    bodies = [(len(body), body[0], body[-1]) for body in players.positions]
+    summary = (
+        game_state.tick, game_state.seed, game_state.food_pos, game_state.game_over, game_state.winner,
+        bodies, players.directions, players.scores, players.stunned, players.charges, players.alive,
+        game_state.projectiles, list(game_state.chat_messages),
+    )
+    return zlib.crc32(repr(summary).encode('utf-8'))
+
+
+def relay_fields(inputs: List[Tuple[int, Dict]]) -> Dict:
+    """tick_inputs fields carrying a tick's (player, input) pairs.
+
+    Each pair is a player and a flags entry; directions and chat lines are
+    listed only for the inputs that have them.
+    """
+    if not inputs:
+        return {}
+    players, flags, directions, chat = [], [], [], []
+    for player, data in inputs:
+        entry = 0
+        if "direction" in data:
+            entry |= TURNED
+            directions.append(data["direction"])
+        if data.get("shoot"):
+            entry |= SHOT
+        if "chat" in data:
+            entry |= CHATTED
+            chat.append(data["chat"])
+        players.append(player)
+        flags.append(entry)
+    fields = {"players": players, "flags": flags}
+    if directions:
+        fields["directions"] = directions
+    if chat:
+        fields["chat"] = chat
+    return fields
+
+
+def relayed_inputs(msg: Dict) -> List[Tuple[int, Dict]]:
+    """The (player, input) pairs of a tick_inputs message, as relay_fields took them."""
+    directions = iter(msg.get("directions", ()))
+    chat = iter(msg.get("chat", ()))
+    inputs = []
+    for player, entry in zip(msg.get("players", ()), msg.get("flags", ())):
+        data = {}
+        if entry & TURNED:
+            data["direction"] = next(directions)
+        if entry & SHOT:
+            data["shoot"] = True
+        if entry & CHATTED:
+            data["chat"] = next(chat)
+        inputs.append((player, data))
+    return inputs
+
+
+class Simulation:
+    """A room's game run locally from a starting state and every player's inputs.
+
+    Lockstep clients get the state and seed once, then only the inputs the
+    server applied on each tick, and keep their copy in step with it.
+    """
+
+    def __init__(self, game_state: GameState, single_player: bool = False):
+        self.game_state = game_state
+        self.single_player = single_player
+        # Received bodies are plain lists; the tick needs SnakeBody's advance and grow
+        players = game_state.players
+        players.positions = [SnakeBody(body) for body in players.positions]
+        self.grids = build_occupancy(game_state)
+
+    def tick(self, inputs: Iterable[Tuple[int, Dict]]):
+        """Apply one tick's (player, input) pairs in order and advance the game."""
+        for player, data in inputs:
+            apply_input(self.game_state, player, data)
+        if not self.game_state.game_over:
+            step(self.game_state, self.grids, self.single_player)
+
+    def state_hash(self) -> int:
+        return state_hash(self.game_state)
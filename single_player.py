@@ -1,16 +1,24 @@
+import argparse
 import pygame
 import sys
 import random
 from pygame.math import Vector2
 import math
+import numpy as np
+from itertools import islice
 from save_game import save_single_player_game, load_game
+from occupancy import FreeCells, OccupancyGrid
+from snake_body import SnakeBody
+from game_state import BOARD_SIZE
+from text_cache import blit_text, compose_text, get_font, placed_text, render_text, text_cache
+from dirty_rects import DirtyRenderer
 
 # Initialize Pygame
 pygame.init()
 
 # Constants
 CELL_SIZE = 30
-CELL_NUMBER = 25
+CELL_NUMBER = BOARD_SIZE
 SCREEN_SIZE = CELL_SIZE * CELL_NUMBER
 
 # Colors - Synthwave palette
@@ -38,10 +46,15 @@ PROJECTILE_SPEED = 15
 PROJECTILE_COOLDOWN = 60  # Frames between shots
 STUN_DURATION = 30  # Frames to stay stunned
 MAX_PROJECTILES = 5  # Maximum projectiles
+GLOW_KEY = (255, 0, 255)  # Transparent in glow sprites
+HEAD_OVERHANG = 4  # Pixels the head's cheeks and tongue reach past its cell
+GLITCH_REACH = 16  # Pixels glitch text's offsets, jitter and noise reach past the text
 
 class Snake:
-    def __init__(self, pos, color):
-        self.body = [Vector2(pos[0], pos[1])]
+    def __init__(self, pos, color, free=None):
+        body = [(pos[0], pos[1])]
+        self.free = free  # FreeCells the snake's grid keeps up to date, if any
+        self.occupancy = None
         self.direction = Vector2(1, 0)
         self.color = color
         self.alive = True
@@ -52,16 +65,44 @@ class Snake:
         
         # Add initial body segments
         for i in range(2):
-            self.body.append(Vector2(self.body[0].x - (i + 1), self.body[0].y))
+            body.append((body[0][0] - (i + 1), body[0][1]))
+        self.body = body
+
+    @property
+    def body(self):
+        return self._body
+
+    @body.setter
+    def body(self, segments):
+        # Replacing the whole body (a new game or a loaded save) rebuilds the grid
+        if self.occupancy is not None:
+            self.occupancy.clear()
+        self._body = segments if isinstance(segments, SnakeBody) else SnakeBody(segments)
+        self.occupancy = OccupancyGrid(self._body, self.free)
     
     def draw(self):
         # Draw body segments
-        for segment in self.body[1:]:
-            rect = pygame.Rect(segment.x * CELL_SIZE, segment.y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            pygame.draw.rect(screen, self.color, rect, border_radius=8)
-        
-        # Draw head
-        head_rect = pygame.Rect(self.body[0].x * CELL_SIZE, self.body[0].y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+        for x, y in islice(self.body, 1, None):
+            self.draw_segment(x, y)
+        self.draw_head()
+    
+    def add_to(self, renderer, key):
+        """Add the body segments, then the head, to a DirtyRenderer under `key`."""
+        for x, y in islice(self.body, 1, None):
+            renderer.add((key, x, y), (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE),
+                         self.color, self.draw_segment, x, y)
+        x, y = self.body[0]
+        head_rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+        renderer.add((key, "head"), head_rect.inflate(2 * HEAD_OVERHANG, 2 * HEAD_OVERHANG),
+                     (x, y, tuple(self.direction), self.color), self.draw_head)
+    
+    def draw_segment(self, x, y):
+        rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+        pygame.draw.rect(screen, self.color, rect, border_radius=8)
+    
+    def draw_head(self):
+        head = Vector2(self.body[0])
+        head_rect = pygame.Rect(head.x * CELL_SIZE, head.y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
         pygame.draw.rect(screen, self.color, head_rect, border_radius=8)
         
         # Calculate eye positions based on direction
@@ -73,43 +114,43 @@ class Snake:
         
         # Base eye positions (when facing right)
         left_eye_pos = (
-            self.body[0].x * CELL_SIZE + eye_offset,
-            self.body[0].y * CELL_SIZE + eye_offset
+            head.x * CELL_SIZE + eye_offset,
+            head.y * CELL_SIZE + eye_offset
         )
         right_eye_pos = (
-            self.body[0].x * CELL_SIZE + eye_offset,
-            self.body[0].y * CELL_SIZE + CELL_SIZE - eye_offset
+            head.x * CELL_SIZE + eye_offset,
+            head.y * CELL_SIZE + CELL_SIZE - eye_offset
         )
         
         # Adjust eye positions based on direction
         if self.direction == Vector2(1, 0):  # Right
-            left_eye_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE - eye_offset, 
-                          self.body[0].y * CELL_SIZE + eye_offset)
-            right_eye_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE - eye_offset,
-                           self.body[0].y * CELL_SIZE + CELL_SIZE - eye_offset)
-            cheek_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE - 4, 
-                        self.body[0].y * CELL_SIZE + CELL_SIZE//2)
+            left_eye_pos = (head.x * CELL_SIZE + CELL_SIZE - eye_offset, 
+                          head.y * CELL_SIZE + eye_offset)
+            right_eye_pos = (head.x * CELL_SIZE + CELL_SIZE - eye_offset,
+                           head.y * CELL_SIZE + CELL_SIZE - eye_offset)
+            cheek_pos = (head.x * CELL_SIZE + CELL_SIZE - 4, 
+                        head.y * CELL_SIZE + CELL_SIZE//2)
         elif self.direction == Vector2(-1, 0):  # Left
-            left_eye_pos = (self.body[0].x * CELL_SIZE + eye_offset,
-                          self.body[0].y * CELL_SIZE + eye_offset)
-            right_eye_pos = (self.body[0].x * CELL_SIZE + eye_offset,
-                           self.body[0].y * CELL_SIZE + CELL_SIZE - eye_offset)
-            cheek_pos = (self.body[0].x * CELL_SIZE + 4,
-                        self.body[0].y * CELL_SIZE + CELL_SIZE//2)
+            left_eye_pos = (head.x * CELL_SIZE + eye_offset,
+                          head.y * CELL_SIZE + eye_offset)
+            right_eye_pos = (head.x * CELL_SIZE + eye_offset,
+                           head.y * CELL_SIZE + CELL_SIZE - eye_offset)
+            cheek_pos = (head.x * CELL_SIZE + 4,
+                        head.y * CELL_SIZE + CELL_SIZE//2)
         elif self.direction == Vector2(0, -1):  # Up
-            left_eye_pos = (self.body[0].x * CELL_SIZE + eye_offset,
-                          self.body[0].y * CELL_SIZE + eye_offset)
-            right_eye_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE - eye_offset,
-                           self.body[0].y * CELL_SIZE + eye_offset)
-            cheek_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE//2,
-                        self.body[0].y * CELL_SIZE + 4)
+            left_eye_pos = (head.x * CELL_SIZE + eye_offset,
+                          head.y * CELL_SIZE + eye_offset)
+            right_eye_pos = (head.x * CELL_SIZE + CELL_SIZE - eye_offset,
+                           head.y * CELL_SIZE + eye_offset)
+            cheek_pos = (head.x * CELL_SIZE + CELL_SIZE//2,
+                        head.y * CELL_SIZE + 4)
         else:  # Down
-            left_eye_pos = (self.body[0].x * CELL_SIZE + eye_offset,
-                          self.body[0].y * CELL_SIZE + CELL_SIZE - eye_offset)
-            right_eye_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE - eye_offset,
-                           self.body[0].y * CELL_SIZE + CELL_SIZE - eye_offset)
-            cheek_pos = (self.body[0].x * CELL_SIZE + CELL_SIZE//2,
-                        self.body[0].y * CELL_SIZE + CELL_SIZE - 4)
+            left_eye_pos = (head.x * CELL_SIZE + eye_offset,
+                          head.y * CELL_SIZE + CELL_SIZE - eye_offset)
+            right_eye_pos = (head.x * CELL_SIZE + CELL_SIZE - eye_offset,
+                           head.y * CELL_SIZE + CELL_SIZE - eye_offset)
+            cheek_pos = (head.x * CELL_SIZE + CELL_SIZE//2,
+                        head.y * CELL_SIZE + CELL_SIZE - 4)
         
         # Draw eyes with shine
         pygame.draw.circle(screen, eye_color, left_eye_pos, eye_size)
@@ -131,8 +172,8 @@ class Snake:
         # Draw tongue (more playful, curvy tongue)
         tongue_color = (255, 105, 180)  # Brighter pink tongue
         tongue_start = (
-            self.body[0].x * CELL_SIZE + CELL_SIZE/2,
-            self.body[0].y * CELL_SIZE + CELL_SIZE/2
+            head.x * CELL_SIZE + CELL_SIZE/2,
+            head.y * CELL_SIZE + CELL_SIZE/2
         )
         
         # Calculate tongue end position based on direction
@@ -171,16 +212,17 @@ class Snake:
     
     def move(self):
         if self.alive and self.stunned <= 0:
-            body_copy = self.body[:-1]
-            new_head = Vector2(
-                (self.body[0].x + self.direction.x) % CELL_NUMBER,
-                (self.body[0].y + self.direction.y) % CELL_NUMBER
+            head = self.body[0]
+            new_head = (
+                int((head[0] + self.direction.x) % CELL_NUMBER),
+                int((head[1] + self.direction.y) % CELL_NUMBER)
             )
-            body_copy.insert(0, new_head)
-            self.body = body_copy[:]
+            self.occupancy.add(new_head)
+            self.occupancy.remove(self.body.advance(*new_head))
     
     def grow(self):
-        self.body.append(self.body[-1])
+        self.body.grow()
+        self.occupancy.grow(self.body[-1])
         self.score += 1
     
     def shoot_projectile(self):
@@ -191,8 +233,10 @@ class Snake:
         return None
 
 class Food:
-    def __init__(self):
+    def __init__(self, game=None):
         self.pos = None
+        if game is not None:
+            self.game = game
         self.randomize()
     
     def randomize(self):
@@ -201,21 +245,15 @@ class Food:
             self.pos = Vector2(random.randint(0, CELL_NUMBER-1), random.randint(0, CELL_NUMBER-1))
             return
             
-        # Get list of all occupied positions (snake body)
-        occupied_positions = [Vector2(segment.x, segment.y) for segment in self.game.snake.body]
+        # Cells the snake leaves free
+        rng = self.game.rng
+        cell = self.game.free_cells.sample(rng)
         
-        # Generate all possible positions
-        all_positions = [Vector2(x, y) for x in range(CELL_NUMBER) for y in range(CELL_NUMBER)]
-        
-        # Remove occupied positions
-        available_positions = [pos for pos in all_positions if pos not in occupied_positions]
-        
-        if available_positions:
-            # Choose random available position
-            self.pos = random.choice(available_positions)
+        if cell is not None:
+            self.pos = Vector2(cell)
         else:
             # Fallback if no positions available (shouldn't happen in normal gameplay)
-            self.pos = Vector2(random.randint(0, CELL_NUMBER-1), random.randint(0, CELL_NUMBER-1))
+            self.pos = Vector2(rng.randint(0, CELL_NUMBER-1), rng.randint(0, CELL_NUMBER-1))
     
     def draw(self):
         if self.pos is not None:  # Only draw if position is set
@@ -236,9 +274,111 @@ class Projectile:
                int(self.pos.y * CELL_SIZE + CELL_SIZE/2))
         pygame.draw.circle(screen, PROJECTILE_COLOR, pos, 5)
 
+class GlowSheet:
+    """A pulsing glow baked once, one sprite per glow size the pulse takes.
+
+    Each sprite holds the glow's circles as drawing them on the screen
+    leaves them: the screen has no alpha channel, so they are opaque, and
+    the sprites are colorkeyed around them.
+    """
+
+    def __init__(self, color, min_glow, max_glow, fade):
+        self.span = max_glow - min_glow
+        self.sprites = []
+        for glow_size in range(min_glow, max_glow + 1):
+            radius = 5 + glow_size
+            sprite = pygame.Surface((2 * radius, 2 * radius))
+            sprite.fill(GLOW_KEY)
+            sprite.set_colorkey(GLOW_KEY, pygame.RLEACCEL)
+            for i in range(glow_size, 0, -1):
+                alpha = int((1 - i/glow_size) * fade)
+                pygame.draw.circle(sprite, (*color, alpha), (radius, radius), 5 + i)
+            self.sprites.append(sprite)
+
+    def rect(self, center, phase):
+        """The rect draw() covers for this pulse phase and center."""
+        return self.sprites[int(abs(math.sin(phase)) * self.span)].get_rect(center=center)
+
+    def draw(self, center, phase):
+        """Draw the glow for pulse phase `phase`, sized by abs(sin(phase)), centered on `center`."""
+        sprite = self.sprites[int(abs(math.sin(phase)) * self.span)]
+        radius = sprite.get_width() // 2
+        screen.blit(sprite, (center[0] - radius, center[1] - radius))
+
+class Grid:
+    """The background and its pulsing grid, written into the screen in one numpy pass.
+
+    Each line is 2 pixels wide, drawn in GRID_COLOR at an alpha of
+    abs(sin(phase + position * 0.01)) * 30 + 20, the vertical lines first.
+    The colors those alphas blend to, on the background and where lines
+    cross, are taken once from pygame's own blits. A frame then writes
+    every row as the background crossed by the vertical lines, and the
+    horizontal lines' rows over them, with no Python work per line.
+    """
+
+    def __init__(self, size, spacing):
+        self.positions = np.arange(0, size, spacing)
+        # The first column of each line, then its second where it fits, and which line each is
+        second = self.positions + 1 < size
+        self.lines = np.concatenate([self.positions, self.positions[second] + 1])
+        self.index = np.concatenate([np.arange(len(self.positions)), np.arange(len(self.positions))[second]])
+        self.colors = self.blend_table()
+        self.row = np.full(size, screen.map_rgb(BACKGROUND_COLOR), dtype=self.colors.dtype)  # A row between horizontal lines
+        self.over = np.zeros(size, dtype=np.intp)  # Per column: 0, or 1 + the alpha level of its line
+
+    def blend_table(self):
+        """colors[i, a]: GRID_COLOR at alpha 20 + a over the background (i = 0) or over the line of alpha 19 + i.
+
+        The colors are mapped to the screen's pixel format.
+        """
+        levels = 30
+        lines = pygame.Surface((levels, 1))
+        lines.fill(BACKGROUND_COLOR)
+        glow = pygame.Surface((levels, 1), pygame.SRCALPHA)
+        glow.fill(GRID_COLOR)
+        pygame.surfarray.pixels_alpha(glow)[:] = np.arange(20, 20 + levels)[:, None]
+        lines.blit(glow, (0, 0))
+        crossings = pygame.Surface((levels + 1, levels), 0, screen)
+        crossings.fill(BACKGROUND_COLOR)
+        crossings.blit(pygame.transform.scale(lines, (levels, levels)), (1, 0))
+        glow = pygame.Surface((levels + 1, levels), pygame.SRCALPHA)
+        glow.fill(GRID_COLOR)
+        pygame.surfarray.pixels_alpha(glow)[:] = np.arange(20, 20 + levels)[None, :]
+        crossings.blit(glow, (0, 0))
+        return pygame.surfarray.array2d(crossings)
+
+    def draw(self, phase, surface=None):
+        """Write the grid at pulse phase `phase` over all of `surface`, the screen by default."""
+        alphas = (np.abs(np.sin(phase + self.positions * 0.01)) * 30 + 20).astype(np.intp) - 20
+        line_alphas = alphas[self.index]
+        self.row[self.lines] = self.colors[0, line_alphas]
+        self.over[self.lines] = line_alphas + 1
+        rows = pygame.surfarray.pixels2d(screen if surface is None else surface).T  # Indexed [y, x], each row contiguous
+        rows[:] = self.row
+        rows[self.lines] = self.colors.T[line_alphas][:, self.over]
+        del rows
+
+PROJECTILE_GLOW = GlowSheet(PROJECTILE_COLOR, 5, 13, 100)
+CHARGE_GLOW = GlowSheet(PROJECTILE_COLOR, 3, 7, 150)
+
+def hud_text_layers(color):
+    """The (color, offsets) layers of HUD text, outermost glow first."""
+    layers = []
+    # Stronger outer glow, offset in all directions
+    for glow_size in range(8, 0, -2):
+        layers.append(((*color, 40), [(dx * glow_size, dy * glow_size) for dx, dy in
+                                      [(-1,0), (1,0), (0,-1), (0,1), (-1,-1), (-1,1), (1,-1), (1,1)]]))
+    # Medium glow layer
+    for glow_size in range(4, 0, -1):
+        layers.append(((*color, 60), [(dx * glow_size, dy * glow_size) for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]]))
+    # Inner glow
+    layers.append(((*color, 120), [(-1, -1), (1, 1)]))
+    # Main text
+    layers.append(((255, 255, 255), [(0, 0)]))  # White core
+    return layers
+
 def color_selection_screen():
     """Let player choose their snake color."""
-    font = pygame.font.Font(None, 48)
     button_size = 80
     gap = 20
     colors_per_row = 4
@@ -247,7 +387,7 @@ def color_selection_screen():
         screen.fill(BACKGROUND_COLOR)
         
         # Draw title
-        title = font.render("Select Your Snake Color", True, TEXT_COLOR)
+        title = render_text("Select Your Snake Color", TEXT_COLOR, 48)
         title_rect = title.get_rect(center=(SCREEN_SIZE/2, 50))
         screen.blit(title, title_rect)
         
@@ -262,8 +402,7 @@ def color_selection_screen():
             pygame.draw.rect(screen, color_value, rect)
             
             # Draw color name
-            name_font = pygame.font.Font(None, 24)
-            text = name_font.render(color_name, True, TEXT_COLOR)
+            text = render_text(color_name, TEXT_COLOR, 24)
             text_rect = text.get_rect(center=rect.center)
             screen.blit(text, text_rect)
             
@@ -284,19 +423,31 @@ def color_selection_screen():
         clock.tick(60)
 
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None, dirty=False):
         # Let player choose color before starting
         snake_color = color_selection_screen()
-        self.snake = Snake((5, 5), snake_color)
-        self.food = Food()
-        self.food.game = self  # Give food reference to game instance
+        # Food and recharges draw from here, so a seed replays the same game;
+        # the screen effects keep using the random module
+        if seed is None:
+            seed = random.getrandbits(32)
+            print(f"Game seed: {seed} (replay it with --seed {seed})")
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.free_cells = FreeCells(CELL_NUMBER, CELL_NUMBER)
+        self.snake = Snake((5, 5), snake_color, self.free_cells)
+        self.food = Food(self)  # Give food reference to game instance
         self.projectiles = []
-        self.font = pygame.font.Font(None, 40)
+        self.font = get_font(40)
         self.game_over = False
         self.level = 1
         self.base_speed = 2  # Reduced from 4 to 2 for slower initial speed
         self.points_to_next_level = 5
         self.glow_effect = 0  # For pulsing effects
+        self.grid = Grid(SCREEN_SIZE, GRID_SPACING)
+        self.renderer = DirtyRenderer(screen, None, dirty)  # The grid covers the screen
+        if self.renderer.dirty:
+            self.renderer.background = pygame.Surface((SCREEN_SIZE, SCREEN_SIZE), 0, screen)
+            self.grid.draw(self.glow_effect, self.renderer.background)
         
     def get_current_speed(self):
         """Calculate game speed based on current level"""
@@ -326,7 +477,7 @@ class Game:
             # Update projectiles
             if self.snake.projectile_cooldown > 0:
                 self.snake.projectile_cooldown -= 1
-            if self.snake.projectiles < MAX_PROJECTILES and random.random() < 0.01:
+            if self.snake.projectiles < MAX_PROJECTILES and self.rng.random() < 0.01:
                 self.snake.projectiles += 1
             
             for proj in self.projectiles[:]:
@@ -343,36 +494,17 @@ class Game:
         if self.snake.body[0] == self.food.pos:
             self.snake.grow()
             self.food.randomize()
-            # Verify food isn't on snake after randomizing
-            while self.food.pos in self.snake.body:
-                self.food.randomize()
         
-        # Self collision
-        if self.snake.body[0] in self.snake.body[1:]:
+        # Self collision (the head's own cell counts once)
+        if self.snake.occupancy.count(self.snake.body[0]) > 1:
             self.game_over = True
     
     def draw_grid(self):
-        """Draw a subtle grid background."""
-        for x in range(0, SCREEN_SIZE, GRID_SPACING):
-            alpha = abs(math.sin(self.glow_effect + x * 0.01)) * 30 + 20
-            grid_surface = pygame.Surface((2, SCREEN_SIZE), pygame.SRCALPHA)
-            grid_surface.fill((GRID_COLOR[0], GRID_COLOR[1], GRID_COLOR[2], int(alpha)))
-            screen.blit(grid_surface, (x, 0))
-            
-        for y in range(0, SCREEN_SIZE, GRID_SPACING):
-            alpha = abs(math.sin(self.glow_effect + y * 0.01)) * 30 + 20
-            grid_surface = pygame.Surface((SCREEN_SIZE, 2), pygame.SRCALPHA)
-            grid_surface.fill((GRID_COLOR[0], GRID_COLOR[1], GRID_COLOR[2], int(alpha)))
-            screen.blit(grid_surface, (0, y))
+        """Draw the background with a subtle grid."""
+        self.grid.draw(self.glow_effect)
     
     def draw_neon_text(self, text, color, position, size=40, is_hud=False):
         """Draw text with a neon glow effect. HUD elements have reduced glow."""
-        font = pygame.font.Font(None, size)
-        
-        # Base text
-        text_surface = font.render(text, True, color)
-        text_rect = text_surface.get_rect(center=position)
-        
         # Glow effect - reduced for HUD elements
         if is_hud:
             glow_size = int(abs(math.sin(self.glow_effect * 2)) * 8) + 5  # Reduced glow size
@@ -381,18 +513,21 @@ class Game:
             glow_size = int(abs(math.sin(self.glow_effect * 2)) * 15) + 10
             glow_steps = 5
         
-        for i in range(glow_size, 0, -glow_size//glow_steps):
-            alpha = int((1 - i/glow_size) * (80 if is_hud else 100))
-            glow = font.render(text, True, (*color[:3], alpha))
-            glow_rect = glow.get_rect(center=position)
-            screen.blit(glow, (glow_rect.x - i//2, glow_rect.y - i//2))
-        
-        # Draw the sharp text on top
-        screen.blit(text_surface, text_rect)
+        def compose():
+            layers = []
+            for i in range(glow_size, 0, -glow_size//glow_steps):
+                alpha = int((1 - i/glow_size) * (80 if is_hud else 100))
+                layers.append(((*color[:3], alpha), [(-(i//2), -(i//2))]))
+            # The sharp text on top
+            layers.append((color, [(0, 0)]))
+            return compose_text(get_font(size), text, layers)
+        
+        # The pulse takes a handful of glow sizes, each composed once
+        blit_text(screen, text_cache.get((text, color, size, "neon", glow_size, is_hud), compose), position)
     
     def draw_glitch_text(self, text, color, position, size=64, scramble=False):
         """Draw text with a glitch effect."""
-        font = pygame.font.Font(None, size)
+        font = get_font(size)
         
         # Create stronger offset for chromatic aberration
         offset = math.sin(self.glow_effect * 3) * 6  # Increased from 4 to 6
@@ -429,7 +564,10 @@ class Game:
         for color, (x_offset, y_offset) in zip(glitch_colors, offsets):
             display_text = scrambled_text if scramble and random.random() < 0.3 else text
             
-            text_surface = font.render(display_text, True, color)
+            if display_text == text:
+                text_surface = render_text(text, color, size)
+            else:
+                text_surface = font.render(display_text, True, color)  # Scrambled text is seldom drawn twice
             text_rect = text_surface.get_rect(center=position)
             text_rect.x += x_offset + glitch_x
             text_rect.y += y_offset + glitch_y
@@ -443,116 +581,109 @@ class Game:
                 noise_y = text_rect.y + random.randint(0, text_rect.height)
                 screen.blit(noise_surface, (text_rect.x, noise_y))
 
+    def hud_text(self, text, color, size=36):
+        """HUD text's layers composed once per label and kept in the text cache."""
+        return text_cache.get((text, color, size, "hud"), lambda: compose_text(
+            get_font(size), text, hud_text_layers(color)))
+
     def draw_hud_text(self, text, color, position, size=36):
-        """Draw HUD text with a bubbly/rounded style and stronger glow effect."""
-        # Create multiple layers of glow with increasing size
-        base_font = pygame.font.Font(None, size)
-        
-        # Stronger outer glow
-        for glow_size in range(8, 0, -2):
-            glow_color = (*color, 40)  # Lower alpha for outer glow
-            glow_surface = base_font.render(text, True, glow_color)
-            glow_rect = glow_surface.get_rect(center=position)
-            # Apply offset in all directions
-            for dx, dy in [(-1,0), (1,0), (0,-1), (0,1), (-1,-1), (-1,1), (1,-1), (1,1)]:
-                offset_pos = (glow_rect.x + dx * glow_size, glow_rect.y + dy * glow_size)
-                screen.blit(glow_surface, offset_pos)
-        
-        # Medium glow layer
-        for glow_size in range(4, 0, -1):
-            glow_color = (*color, 60)
-            glow_surface = base_font.render(text, True, glow_color)
-            glow_rect = glow_surface.get_rect(center=position)
-            for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                offset_pos = (glow_rect.x + dx * glow_size, glow_rect.y + dy * glow_size)
-                screen.blit(glow_surface, offset_pos)
-        
-        # Inner glow
-        glow_color = (*color, 120)
-        glow_surface = base_font.render(text, True, glow_color)
-        glow_rect = glow_surface.get_rect(center=position)
-        screen.blit(glow_surface, (glow_rect.x - 1, glow_rect.y - 1))
-        screen.blit(glow_surface, (glow_rect.x + 1, glow_rect.y + 1))
-        
-        # Main text
-        text_surface = base_font.render(text, True, (255, 255, 255))  # White core
-        text_rect = text_surface.get_rect(center=position)
-        screen.blit(text_surface, text_rect)
+        """Draw HUD text with a bubbly/rounded style and stronger glow effect.
+
+        The layers are composed once per label and kept in the text cache,
+        so drawing a label is a single blit until its text changes.
+        """
+        blit_text(screen, self.hud_text(text, color, size), position)
+
+    def add_hud_text(self, renderer, key, text, color, position, size=36):
+        """Show HUD text through `renderer`, repainted when the text changes."""
+        renderer.add(key, placed_text(self.hud_text(text, color, size), position), (text, color, size),
+                     self.draw_hud_text, text, color, position, size)
 
+    def add_glitch_text(self, renderer, key, text, color, position, size=64):
+        """Show glitch text through `renderer`; it shakes, so it is redrawn every frame."""
+        rect = pygame.Rect((0, 0), get_font(size).size(text))
+        rect.center = position
+        renderer.add(key, rect.inflate(2 * GLITCH_REACH, 2 * GLITCH_REACH), None,
+                     self.draw_glitch_text, text, color, position, size)
+
+    def add_projectiles(self, renderer):
+        """Show projectiles with glow; the glow covers the projectile's own circle."""
+        phase = self.glow_effect * 3
+        for i, proj in enumerate(self.projectiles):
+            center = (int(proj.pos.x * CELL_SIZE + CELL_SIZE/2), int(proj.pos.y * CELL_SIZE + CELL_SIZE/2))
+            renderer.add(("projectile", i), PROJECTILE_GLOW.rect(center, phase), None,
+                         PROJECTILE_GLOW.draw, center, phase)
+    
+    def add_charges(self, renderer):
+        """Show projectile charges with glow, each pulsing a little behind the one before."""
+        for i in range(self.snake.projectiles):
+            center, phase = (20 + i * 20, SCREEN_SIZE - 30), self.glow_effect + i * 0.5
+            renderer.add(("charge", i), CHARGE_GLOW.rect(center, phase), None, CHARGE_GLOW.draw, center, phase)
+    
     def draw(self):
-        screen.fill(BACKGROUND_COLOR)
         self.glow_effect += 0.05
+        renderer = self.renderer
         
-        # Draw animated grid
-        self.draw_grid()
+        # Draw background and animated grid; it changes every pixel, so dirty rects keep it still
+        if not renderer.dirty:
+            renderer.add("grid", screen.get_rect(), None, self.draw_grid)
         
         # Draw game elements
-        self.food.draw()
-        self.snake.draw()
-        
-        # Draw projectiles with glow
-        for proj in self.projectiles:
-            proj.draw()
-            # Add glow effect to projectiles
-            glow_size = int(abs(math.sin(self.glow_effect * 3)) * 8) + 5
-            for i in range(glow_size, 0, -1):
-                alpha = int((1 - i/glow_size) * 100)
-                pygame.draw.circle(screen, (*PROJECTILE_COLOR, alpha),
-                                 (int(proj.pos.x * CELL_SIZE + CELL_SIZE/2),
-                                  int(proj.pos.y * CELL_SIZE + CELL_SIZE/2)), 5 + i)
+        if self.food.pos is not None:
+            renderer.add("food", (self.food.pos.x * CELL_SIZE, self.food.pos.y * CELL_SIZE, CELL_SIZE, CELL_SIZE),
+                         tuple(self.food.pos), self.food.draw)
+        self.snake.add_to(renderer, "snake")
+        
+        self.add_projectiles(renderer)
         
         # Draw HUD with enhanced bubbly style
         hud_color = (0, 231, 255)  # Adjusted cyan color to match screenshot
-        self.draw_hud_text(f'Score: {self.snake.score}', hud_color, (100, 30), 42)
-        self.draw_hud_text(f'Level: {self.level}', hud_color, (SCREEN_SIZE - 100, 30), 42)
+        self.add_hud_text(renderer, "score", f'Score: {self.snake.score}', hud_color, (100, 30), 42)
+        self.add_hud_text(renderer, "level", f'Level: {self.level}', hud_color, (SCREEN_SIZE - 100, 30), 42)
         
         # Draw progress to next level
         points_needed = (self.level * self.points_to_next_level) - self.snake.score
         if points_needed > 0:
-            self.draw_hud_text(f'Next Level: {points_needed}', hud_color, (SCREEN_SIZE // 2, 30), 42)
+            self.add_hud_text(renderer, "next level", f'Next Level: {points_needed}', hud_color, (SCREEN_SIZE // 2, 30), 42)
         
-        # Draw projectile charges with glow
-        charge_color = PROJECTILE_COLOR
-        for i in range(self.snake.projectiles):
-            glow_size = int(abs(math.sin(self.glow_effect + i * 0.5)) * 4) + 3
-            for j in range(glow_size, 0, -1):
-                alpha = int((1 - j/glow_size) * 150)
-                pygame.draw.circle(screen, (*charge_color, alpha),
-                                 (20 + i * 20, SCREEN_SIZE - 30), 5 + j)
+        self.add_charges(renderer)
         
         # Draw stun indicator
         if self.snake.stunned > 0:
-            self.draw_glitch_text('STUNNED!', (255, 0, 0), (SCREEN_SIZE/2, 50))
+            self.add_glitch_text(renderer, "stunned", 'STUNNED!', (255, 0, 0), (SCREEN_SIZE/2, 50))
         
         # Draw game over
         if self.game_over:
-            self.draw_game_over()
+            self.add_game_over(renderer)
         
-        pygame.display.flip()
+        renderer.present()
     
-    def draw_game_over(self):
+    def draw_overlay(self):
         # Semi-transparent overlay
         overlay = pygame.Surface((SCREEN_SIZE, SCREEN_SIZE))
         overlay.fill(BACKGROUND_COLOR)
         overlay.set_alpha(200)
         screen.blit(overlay, (0, 0))
+    
+    def add_game_over(self, renderer):
+        renderer.add("overlay", screen.get_rect(), True, self.draw_overlay)
         
         # Draw game over text with enhanced glitch effect
-        self.draw_glitch_text('GAME OVER', (255, 255, 255), 
-                            (SCREEN_SIZE/2, SCREEN_SIZE/2 - 80), 82)
+        self.add_glitch_text(renderer, "game over", 'GAME OVER', (255, 255, 255),
+                             (SCREEN_SIZE/2, SCREEN_SIZE/2 - 80), 82)
         
         # Stats with HUD style - using the same bubbly glow effect as the HUD
         hud_color = (0, 231, 255)  # Same cyan color as HUD
-        self.draw_hud_text(f'Final Score: {self.snake.score}', hud_color,
+        self.add_hud_text(renderer, "final score", f'Final Score: {self.snake.score}', hud_color,
                           (SCREEN_SIZE/2, SCREEN_SIZE/2), 48)
-        self.draw_hud_text(f'Level Reached: {self.level}', hud_color,
+        self.add_hud_text(renderer, "level reached", f'Level Reached: {self.level}', hud_color,
                           (SCREEN_SIZE/2, SCREEN_SIZE/2 + 50), 48)
         
         # Restart text with glitch effect
-        self.draw_glitch_text('Press SPACE to restart', (255, 255, 255), 
-                            (SCREEN_SIZE/2, SCREEN_SIZE/2 + 120), 36)
-        self.draw_glitch_text('Press S to save game', (255, 255, 255),
-                            (SCREEN_SIZE/2, SCREEN_SIZE/2 + 160), 36)
+        self.add_glitch_text(renderer, "restart", 'Press SPACE to restart', (255, 255, 255),
+                             (SCREEN_SIZE/2, SCREEN_SIZE/2 + 120), 36)
+        self.add_glitch_text(renderer, "save", 'Press S to save game', (255, 255, 255),
+                             (SCREEN_SIZE/2, SCREEN_SIZE/2 + 160), 36)
 
 # Setup display
 screen = pygame.display.set_mode((SCREEN_SIZE, SCREEN_SIZE))
@@ -561,8 +692,8 @@ clock = pygame.time.Clock()
 
 def mode_selection_screen():
     """Let player choose between single player and multiplayer modes."""
-    font = pygame.font.Font(None, 64)
-    button_font = pygame.font.Font(None, 48)
+    title_layers = [((0, 255, 255, int(255 * (1 - i/20))), [(-(i//2), -(i//2))]) for i in range(20, 0, -4)]
+    title_layers.append(((0, 255, 255), [(0, 0)]))
     
     # Button dimensions and positions
     button_width = 300
@@ -586,16 +717,10 @@ def mode_selection_screen():
     while True:
         screen.fill(BACKGROUND_COLOR)
         
-        # Draw title with neon effect
-        title = font.render("Snake Game", True, (0, 255, 255))
-        title_rect = title.get_rect(center=(SCREEN_SIZE/2, 100))
-        
-        # Add glow to title
-        for i in range(20, 0, -4):
-            glow = font.render("Snake Game", True, (0, 255, 255, int(255 * (1 - i/20))))
-            glow_rect = glow.get_rect(center=(SCREEN_SIZE/2, 100))
-            screen.blit(glow, (glow_rect.x - i//2, glow_rect.y - i//2))
-        screen.blit(title, title_rect)
+        # Draw title with neon effect and glow
+        blit_text(screen, text_cache.get(("Snake Game", (0, 255, 255), 64, "title"),
+                                         lambda: compose_text(get_font(64), "Snake Game", title_layers)),
+                  (SCREEN_SIZE/2, 100))
         
         # Draw buttons with hover effect
         mouse_pos = pygame.mouse.get_pos()
@@ -604,7 +729,7 @@ def mode_selection_screen():
         hover_sp = single_player_rect.collidepoint(mouse_pos)
         sp_color = (0, 255, 255) if hover_sp else (0, 200, 200)
         pygame.draw.rect(screen, sp_color, single_player_rect, border_radius=15)
-        sp_text = button_font.render("Single Player", True, (255, 255, 255))
+        sp_text = render_text("Single Player", (255, 255, 255), 48)
         sp_text_rect = sp_text.get_rect(center=single_player_rect.center)
         screen.blit(sp_text, sp_text_rect)
         
@@ -612,7 +737,7 @@ def mode_selection_screen():
         hover_mp = multiplayer_rect.collidepoint(mouse_pos)
         mp_color = (0, 255, 255) if hover_mp else (0, 200, 200)
         pygame.draw.rect(screen, mp_color, multiplayer_rect, border_radius=15)
-        mp_text = button_font.render("Multiplayer", True, (255, 255, 255))
+        mp_text = render_text("Multiplayer", (255, 255, 255), 48)
         mp_text_rect = mp_text.get_rect(center=multiplayer_rect.center)
         screen.blit(mp_text, mp_text_rect)
         
@@ -630,13 +755,15 @@ def mode_selection_screen():
         
         clock.tick(60)
 
-def main():
+def main(seed=None, dirty=False):
+    """Run the mode selection screen and its games; `seed` replays the single
+    player game it was printed for and `dirty` draws with dirty rects."""
     while True:
         # Show mode selection screen
         mode = mode_selection_screen()
         
         if mode == "single":
-            game = Game()
+            game = Game(seed, dirty)
             SCREEN_UPDATE = pygame.USEREVENT
             pygame.time.set_timer(SCREEN_UPDATE, 150)
 
@@ -651,7 +778,7 @@ def main():
                     if event.type == pygame.KEYDOWN:
                         if game.game_over:
                             if event.key == pygame.K_SPACE:
-                                game = Game()  # Reset game
+                                game = Game(seed, dirty)  # Reset game
                             elif event.key == pygame.K_s:
                                 save_path = save_single_player_game(game.snake, game.level, game.snake.score)
                                 print(f"Game saved to: {save_path}")
@@ -681,19 +808,19 @@ def main():
         else:
             # Import and run multiplayer game
             from multiplayer import run_multiplayer_game
-            run_multiplayer_game()
+            run_multiplayer_game(dirty)
 
-def load_saved_game(save_data):
-    """Load a saved single player game."""
+def load_saved_game(save_data, seed=None, dirty=False):
+    """Load a saved single player game; a restart plays the game `seed` picks."""
     if save_data['mode'] != 'single_player':
         print("Error: Not a single player save file")
         return
         
-    game = Game()
+    game = Game(dirty=dirty)
     snake_data = save_data['snake_data']
     
     # Restore snake state
-    game.snake.body = [Vector2(x, y) for x, y in snake_data['body']]
+    game.snake.body = snake_data['body']
     game.snake.direction = Vector2(snake_data['direction'][0], snake_data['direction'][1])
     game.snake.color = snake_data['color']
     game.snake.score = snake_data['score']
@@ -717,7 +844,7 @@ def load_saved_game(save_data):
             if event.type == pygame.KEYDOWN:
                 if game.game_over:
                     if event.key == pygame.K_SPACE:
-                        game = Game()
+                        game = Game(seed, dirty)
                     elif event.key == pygame.K_s:
                         save_path = save_single_player_game(game.snake, game.level, game.snake.score)
                         print(f"Game saved to: {save_path}")
@@ -742,4 +869,8 @@ def load_saved_game(save_data):
         clock.tick(game.get_current_speed())
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, help="replay the game this seed was printed for")
+    parser.add_argument("--dirty-rects", action="store_true", help="repaint and push only what changed since the last frame")
+    args = parser.parse_args()
+    main(args.seed, args.dirty_rects) 
\ No newline at end of file
@@ -0,0 +1,47 @@
+from collections import deque
+from typing import Tuple
+
+Cell = Tuple[int, int]
+
+
+class SnakeBody(deque):
+    """Snake segments as (x, y) tuples, head first.
+
+    deque is a ring buffer of fixed-size blocks, so a move (new head in
+    front, tail retired) and growth touch only the ends whatever the length,
+    where a list shifts or copies every segment. Indexing near either end and
+    iteration run at C speed. A body compares equal to any sequence holding
+    the same cells, such as the lists the protocol decodes.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, segments=()):
+        # Saves hold JSON lists, older ones float coordinates
+        super().__init__((int(x), int(y)) for x, y in segments)
+
+    def advance(self, x: int, y: int) -> Cell:
+        """Move: add a head at (x, y) and drop the tail, which is returned."""
+        self.appendleft((x, y))
+        return self.pop()
+
+    def push(self, x: int, y: int):
+        """Add a head at (x, y) and keep the tail."""
+        self.appendleft((x, y))
+
+    def grow(self):
+        """Duplicate the tail segment."""
+        self.append(self[-1])
+
+    def __eq__(self, other) -> bool:
+        try:
+            if len(other) != len(self):
+                return False
+        except TypeError:
+            return NotImplemented
+        return all(a[0] == b[0] and a[1] == b[1] for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SnakeBody({list(self)!r})"
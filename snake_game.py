@@ -1,15 +1,20 @@
+import argparse
 import pygame
 import random
 import sys
 from pygame.math import Vector2
-import math
+from occupancy import FreeCells, OccupancyGrid
+from snake_body import SnakeBody
+from game_state import BOARD_SIZE
+from text_cache import get_font, render_text
+from dirty_rects import DirtyRenderer
 
 # Initialize Pygame
 pygame.init()
 
 # Constants
 CELL_SIZE = 30
-CELL_NUMBER = 25
+CELL_NUMBER = BOARD_SIZE
 SCREEN_SIZE = CELL_SIZE * CELL_NUMBER
 
 # Colors
@@ -46,14 +51,12 @@ def draw_color_button(color_name, color_value, rect, selected=False):
     pygame.draw.rect(screen, color_value, rect)
     if selected:
         pygame.draw.rect(screen, TEXT_COLOR, rect, 3)  # Highlight selected color
-    font = pygame.font.Font(None, 24)
-    text = font.render(color_name, True, TEXT_COLOR)
+    text = render_text(color_name, TEXT_COLOR, 24)
     text_rect = text.get_rect(center=rect.center)
     screen.blit(text, text_rect)
     return rect
 
 def color_selection_screen():
-    font = pygame.font.Font(None, 48)
     button_size = 80
     gap = 20
     colors_per_row = 4
@@ -66,7 +69,7 @@ def color_selection_screen():
         screen.fill(BACKGROUND_COLOR)
         
         # Draw title
-        title = font.render(f"Select color for Player {'1' if selecting_player1 else '2'}", True, TEXT_COLOR)
+        title = render_text(f"Select color for Player {'1' if selecting_player1 else '2'}", TEXT_COLOR, 48)
         title_rect = title.get_rect(center=(SCREEN_SIZE/2, 50))
         screen.blit(title, title_rect)
         
@@ -108,33 +111,33 @@ def color_selection_screen():
 class Projectile:
     def __init__(self, pos, direction, owner):
         self.pos = Vector2(pos)
+        self.last_pos = Vector2(pos)  # Where the latest move started
         self.direction = Vector2(direction).normalize()
         self.owner = owner
         self.radius = 5
         
     def move(self):
+        self.last_pos = Vector2(self.pos)
         self.pos += self.direction * PROJECTILE_SPEED
         
+    def center(self):
+        return (int(self.pos.x * CELL_SIZE), int(self.pos.y * CELL_SIZE))
+        
     def draw(self):
-        pygame.draw.circle(screen, PROJECTILE_COLOR, 
-                         (int(self.pos.x * CELL_SIZE), int(self.pos.y * CELL_SIZE)), 
-                         self.radius)
+        pygame.draw.circle(screen, PROJECTILE_COLOR, self.center(), self.radius)
         
     def check_collision(self, snake):
-        for block in snake.body:
-            distance = math.hypot(
-                self.pos.x - block.x,
-                self.pos.y - block.y
-            )
-            if distance < 1:  # Hit within one cell
-                return True
-        return False
+        # Hit within one cell of any block anywhere along the latest move, so a
+        # projectile covering several cells a tick cannot pass through a snake
+        return snake.occupancy.near_path(self.last_pos.x, self.last_pos.y, self.pos.x, self.pos.y)
 
 class Snake:
-    def __init__(self, start_pos, color):
-        self.body = [Vector2(start_pos[0], start_pos[1]), 
-                    Vector2(start_pos[0]-1, start_pos[1]), 
-                    Vector2(start_pos[0]-2, start_pos[1])]
+    def __init__(self, start_pos, color, free=None):
+        self.free = free  # FreeCells the snake's grid keeps up to date, if any
+        self.occupancy = None
+        self.body = [(start_pos[0], start_pos[1]), 
+                    (start_pos[0]-1, start_pos[1]), 
+                    (start_pos[0]-2, start_pos[1])]
         self.direction = Vector2(1, 0)
         self.new_block = False
         self.color = color
@@ -143,32 +146,55 @@ class Snake:
         self.projectile_cooldown = 0
         self.projectiles_available = MAX_PROJECTILES
         self.stunned = 0  # Frames remaining being stunned
+
+    @property
+    def body(self):
+        return self._body
+
+    @body.setter
+    def body(self, segments):
+        # Replacing the whole body (a new game or a loaded save) rebuilds the grid
+        if self.occupancy is not None:
+            self.occupancy.clear()
+        self._body = segments if isinstance(segments, SnakeBody) else SnakeBody(segments)
+        self.occupancy = OccupancyGrid(self._body, self.free)
         
     def draw(self):
-        for block in self.body:
-            block_rect = pygame.Rect(block.x * CELL_SIZE, block.y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            pygame.draw.rect(screen, self.color, block_rect, border_radius=8)
+        for x, y in self.body:
+            self.draw_block(x, y)
             
         # Draw projectile charges
         for i in range(self.projectiles_available):
-            pygame.draw.circle(screen, PROJECTILE_COLOR,
-                             (20 + i * 20, SCREEN_SIZE - 20),
-                             5)
+            self.draw_charge(i)
+            
+    def add_to(self, renderer, key):
+        """Add what draw() draws to a DirtyRenderer under `key`, blocks keyed by cell."""
+        for x, y in self.body:
+            renderer.add((key, x, y), (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE),
+                         self.color, self.draw_block, x, y)
+        for i in range(self.projectiles_available):
+            renderer.add((key, "charge", i), (15 + i * 20, SCREEN_SIZE - 25, 10, 10), True, self.draw_charge, i)
+            
+    def draw_block(self, x, y):
+        block_rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+        pygame.draw.rect(screen, self.color, block_rect, border_radius=8)
+        
+    def draw_charge(self, i):
+        pygame.draw.circle(screen, PROJECTILE_COLOR, (20 + i * 20, SCREEN_SIZE - 20), 5)
             
     def move(self):
         if not self.alive or self.stunned > 0:
             self.stunned = max(0, self.stunned - 1)
             return
             
+        head = self.body[0]
+        new_head = (int(head[0] + self.direction.x), int(head[1] + self.direction.y))
+        self.occupancy.add(new_head)
         if self.new_block:
-            body_copy = self.body[:]
-            body_copy.insert(0, body_copy[0] + self.direction)
-            self.body = body_copy
+            self.body.push(*new_head)
             self.new_block = False
         else:
-            body_copy = self.body[:-1]
-            body_copy.insert(0, body_copy[0] + self.direction)
-            self.body = body_copy
+            self.occupancy.remove(self.body.advance(*new_head))
             
     def grow(self):
         self.new_block = True
@@ -191,7 +217,8 @@ class Snake:
             self.projectile_cooldown = PROJECTILE_COOLDOWN
 
 class Food:
-    def __init__(self):
+    def __init__(self, free=None):
+        self.free = free  # Cells no snake covers; without it food may land anywhere
         self.randomize()
         
     def draw(self):
@@ -199,17 +226,21 @@ class Food:
         pygame.draw.rect(screen, FOOD_COLOR, food_rect, border_radius=10)
         
     def randomize(self):
-        self.x = random.randint(0, CELL_NUMBER - 1)
-        self.y = random.randint(0, CELL_NUMBER - 1)
+        cell = self.free.sample() if self.free is not None else None
+        if cell is None:
+            cell = (random.randint(0, CELL_NUMBER - 1), random.randint(0, CELL_NUMBER - 1))
+        self.x, self.y = cell
         self.pos = Vector2(self.x, self.y)
 
 class Game:
-    def __init__(self, player1_color, player2_color):
-        self.snake1 = Snake((5, 5), player1_color)
-        self.snake2 = Snake((CELL_NUMBER-5, CELL_NUMBER-5), player2_color)
-        self.food = Food()
-        self.font = pygame.font.Font(None, 40)
+    def __init__(self, player1_color, player2_color, dirty=False):
+        self.free_cells = FreeCells(CELL_NUMBER, CELL_NUMBER)
+        self.snake1 = Snake((5, 5), player1_color, self.free_cells)
+        self.snake2 = Snake((CELL_NUMBER-5, CELL_NUMBER-5), player2_color, self.free_cells)
+        self.food = Food(self.free_cells)
+        self.font = get_font(40)
         self.projectiles = []
+        self.renderer = DirtyRenderer(screen, BACKGROUND_COLOR, dirty)
         
     def update(self):
         self.snake1.update()
@@ -233,30 +264,37 @@ class Game:
                 self.projectiles.remove(proj)
         
     def draw(self):
-        screen.fill(BACKGROUND_COLOR)
-        self.food.draw()
-        self.snake1.draw()
-        self.snake2.draw()
+        renderer = self.renderer
+        renderer.add("food", (self.food.pos.x * CELL_SIZE, self.food.pos.y * CELL_SIZE, CELL_SIZE, CELL_SIZE),
+                     tuple(self.food.pos), self.food.draw)
+        self.snake1.add_to(renderer, "snake1")
+        self.snake2.add_to(renderer, "snake2")
         
         # Draw projectiles
-        for proj in self.projectiles:
-            proj.draw()
+        for i, proj in enumerate(self.projectiles):
+            center = proj.center()
+            renderer.add(("projectile", i), (center[0] - proj.radius, center[1] - proj.radius,
+                                             2 * proj.radius, 2 * proj.radius), center, proj.draw)
             
-        self.draw_scores()
+        self.add_scores()
         
         # Draw stun indicators
         if self.snake1.stunned > 0:
-            self.draw_stun_indicator(self.snake1)
+            self.add_stun_indicator(self.snake1)
         if self.snake2.stunned > 0:
-            self.draw_stun_indicator(self.snake2)
+            self.add_stun_indicator(self.snake2)
             
-        pygame.display.update()
+        renderer.present()
         
-    def draw_stun_indicator(self, snake):
-        text = self.font.render("STUNNED!", True, snake.color)
+    def add_text(self, key, text, color, **anchor):
+        """Show `text` through the renderer, placed by a get_rect anchor such as center=(x, y)."""
+        surface = render_text(text, color, 40)
+        text_rect = surface.get_rect(**anchor)
+        self.renderer.add(key, text_rect, (text, color), screen.blit, surface, text_rect)
+        
+    def add_stun_indicator(self, snake):
         pos = (SCREEN_SIZE//4 if snake == self.snake1 else 3*SCREEN_SIZE//4, 50)
-        text_rect = text.get_rect(center=pos)
-        screen.blit(text, text_rect)
+        self.add_text(("stunned", pos), "STUNNED!", snake.color, center=pos)
         
     def check_collision(self):
         # Check food collision for both snakes
@@ -273,19 +311,18 @@ class Game:
             if not snake.alive:
                 continue
                 
-            if not 0 <= snake.body[0].x < CELL_NUMBER or not 0 <= snake.body[0].y < CELL_NUMBER:
+            head = snake.body[0]
+            if not 0 <= head[0] < CELL_NUMBER or not 0 <= head[1] < CELL_NUMBER:
                 snake.alive = False
                 
-            # Check self collision
-            for block in snake.body[1:]:
-                if block == snake.body[0]:
-                    snake.alive = False
+            # Check self collision (the head's own cell counts once)
+            if snake.occupancy.count(head) > 1:
+                snake.alive = False
                     
             # Check collision with other snake
             other_snake = self.snake2 if snake == self.snake1 else self.snake1
-            for block in other_snake.body:
-                if block == snake.body[0]:
-                    snake.alive = False
+            if head in other_snake.occupancy:
+                snake.alive = False
                     
         # Check if game is over (both snakes dead)
         if not self.snake1.alive and not self.snake2.alive:
@@ -309,41 +346,31 @@ class Game:
         pygame.quit()
         sys.exit()
         
-    def draw_scores(self):
+    def add_scores(self):
         # Player 1 score (top left)
-        score1_text = self.font.render(f'P1: {self.snake1.score}', True, self.snake1.color)
-        score1_rect = score1_text.get_rect(topleft=(20, 20))
-        screen.blit(score1_text, score1_rect)
+        self.add_text("score1", f'P1: {self.snake1.score}', self.snake1.color, topleft=(20, 20))
         
         # Player 2 score (top right)
-        score2_text = self.font.render(f'P2: {self.snake2.score}', True, self.snake2.color)
-        score2_rect = score2_text.get_rect(topright=(SCREEN_SIZE-20, 20))
-        screen.blit(score2_text, score2_rect)
+        self.add_text("score2", f'P2: {self.snake2.score}', self.snake2.color, topright=(SCREEN_SIZE-20, 20))
 
-def load_saved_game(save_data):
+def load_saved_game(save_data, dirty=False):
     """Load a saved multiplayer game."""
     if save_data['mode'] != 'multiplayer':
         print("Error: Not a multiplayer save file")
         return
     
     # Create game instance with saved snake colors
-    game = Game(SNAKE_COLORS["Sky Blue"], SNAKE_COLORS["Pink"])  # Default colors for now
-    
-    # Restore snake1 state
-    snake1_data = save_data['snake1_data']
-    game.snake1.body = [Vector2(x, y) for x, y in snake1_data['positions']]
-    game.snake1.direction = Vector2(snake1_data['direction'][0], snake1_data['direction'][1])
-    game.snake1.score = snake1_data['score']
-    game.snake1.stunned = snake1_data['stunned']
-    game.snake1.projectiles_available = snake1_data['projectiles']
+    game = Game(SNAKE_COLORS["Sky Blue"], SNAKE_COLORS["Pink"], dirty)  # Default colors for now
     
-    # Restore snake2 state
-    snake2_data = save_data['snake2_data']
-    game.snake2.body = [Vector2(x, y) for x, y in snake2_data['positions']]
-    game.snake2.direction = Vector2(snake2_data['direction'][0], snake2_data['direction'][1])
-    game.snake2.score = snake2_data['score']
-    game.snake2.stunned = snake2_data['stunned']
-    game.snake2.projectiles_available = snake2_data['projectiles']
+    # Older saves hold exactly two snakes under their own keys; the local
+    # game plays the first two of a larger room
+    players = save_data.get('players') or [save_data['snake1_data'], save_data['snake2_data']]
+    for snake, snake_data in zip((game.snake1, game.snake2), players):
+        snake.body = snake_data['positions']
+        snake.direction = Vector2(snake_data['direction'][0], snake_data['direction'][1])
+        snake.score = snake_data['score']
+        snake.stunned = snake_data['stunned']
+        snake.projectiles_available = snake_data['projectiles']
     
     # Restore food position
     game.food.pos = Vector2(save_data['food_pos'][0], save_data['food_pos'][1])
@@ -396,12 +423,12 @@ def load_saved_game(save_data):
         clock.tick(60)
 
 # Main game
-def main():
+def main(dirty=False):
     # Get player color choices
     player1_color, player2_color = color_selection_screen()
     
     # Start the game with selected colors
-    game = Game(player1_color, player2_color)
+    game = Game(player1_color, player2_color, dirty)
     SCREEN_UPDATE = pygame.USEREVENT
     pygame.time.set_timer(SCREEN_UPDATE, 150)
 
@@ -447,5 +474,7 @@ def main():
         clock.tick(60)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dirty-rects", action="store_true", help="repaint and push only what changed since the last frame")
+    main(parser.parse_args().dirty_rects)
     
\ No newline at end of file
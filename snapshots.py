@@ -0,0 +1,188 @@
+import threading
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Optional, Tuple
+from game_state import GameState, PlayerTable
+
+# Scalar GameState fields carried by a delta only when they changed
+SCALAR_FIELDS = ("food_pos", "game_over", "winner")
+# PlayerTable columns carried whole by a delta when any player's entry changed
+PLAYER_COLUMNS = ("directions", "scores", "stunned", "charges", "alive")
+
+SNAPSHOT_HISTORY = 32  # Sent snapshots remembered per client
+MAX_DELTA_GAP = 30  # Send a keyframe when the last ack is this many snapshots behind
+
+
+@dataclass
+class Snapshot:
+    """What a client will hold after applying one sent state.
+
+    Snake bodies are not copied: a body only ever gains heads at the front and
+    loses or duplicates tail segments, so any later body is its new heads, a
+    prefix of this one, and copies of that prefix's last segment.
+    """
+    seq: int
+    tick: int
+    moves: Tuple  # Per player, like the lengths
+    lengths: Tuple
+    scalars: Tuple
+    columns: Tuple  # One tuple per PLAYER_COLUMNS entry
+    projectiles: Tuple
+    chat_messages: Tuple
+
+
+def advance_projectile(projectile, ticks: int):
+    x, y, dx, dy = projectile
+    return (x + dx * ticks, y + dy * ticks, dx, dy)
+
+
+class SnapshotTracker:
+    """Per-client history of sent snapshots used to build delta messages."""
+
+    def __init__(self, history: int = SNAPSHOT_HISTORY):
+        self.history: "OrderedDict[int, Snapshot]" = OrderedDict()
+        self.max_history = history
+        self.next_seq = 1
+        self.acked: Optional[Snapshot] = None
+        self.keyframes = 0
+        self.deltas = 0
+        self.lock = threading.Lock()
+
+    def acknowledge(self, seq: int):
+        """Record that the client has applied snapshot `seq`."""
+        with self.lock:
+            snapshot = self.history.get(seq)
+            if snapshot and (self.acked is None or seq > self.acked.seq):
+                self.acked = snapshot
+                # Older snapshots can never be used as a base again
+                while next(iter(self.history)) != seq:
+                    self.history.popitem(last=False)
+
+    def build_message(self, state: GameState) -> Dict:
+        """Return a delta against the last acked snapshot, or a keyframe."""
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            base = self.acked
+            if base is not None and seq - base.seq > MAX_DELTA_GAP:
+                base = None
+            players = state.players
+            columns = tuple(tuple(getattr(players, name)) for name in PLAYER_COLUMNS)
+            msg = self._delta(state, columns, base, seq) if base is not None else None
+            if msg is None:
+                msg = {"command": "game_state", "state": state, "seq": seq, "tick": state.tick}
+                projectiles = tuple(state.projectiles)
+                self.keyframes += 1
+            else:
+                projectiles = msg.pop("_projectiles")
+                self.deltas += 1
+            self.history[seq] = Snapshot(
+                seq, state.tick,
+                tuple(players.moves), tuple(map(len, players.positions)),
+                tuple(getattr(state, name) for name in SCALAR_FIELDS), columns,
+                projectiles, tuple(state.chat_messages),
+            )
+            while len(self.history) > self.max_history:
+                evicted_seq, _ = self.history.popitem(last=False)
+                if self.acked is not None and evicted_seq == self.acked.seq:
+                    self.acked = None
+            return msg
+
+    def _delta(self, state: GameState, columns: Tuple, base: Snapshot, seq: int) -> Optional[Dict]:
+        ticks = state.tick - base.tick
+        positions = state.players.positions
+        if ticks < 0 or len(positions) != len(base.lengths):
+            return None
+        heads = [moves - base_moves for moves, base_moves in zip(state.players.moves, base.moves)]
+        keep = []
+        for body, count, base_length in zip(positions, heads, base.lengths):
+            kept = _kept_segments(body, count)
+            if kept is None or kept > base_length:
+                return None
+            keep.append(kept)
+        msg = {
+            "command": "state_delta", "seq": seq, "base": base.seq, "ticks": ticks,
+            "heads": [list(islice(body, count)) for body, count in zip(positions, heads)],
+            "keep": keep, "lengths": [len(body) for body in positions],
+        }
+        for name, old in zip(SCALAR_FIELDS, base.scalars):
+            value = getattr(state, name)
+            if value != old:
+                msg[name] = value
+        for name, column, old in zip(PLAYER_COLUMNS, columns, base.columns):
+            if column != old:
+                msg[name] = list(column)
+
+        # Base projectiles keep flying between snapshots, so compare against
+        # where they would be now; whatever is left over was spawned since.
+        remaining = Counter(state.projectiles)
+        kept, removed = [], []
+        for i, projectile in enumerate(base.projectiles):
+            moved = advance_projectile(projectile, ticks)
+            if remaining[moved] > 0:
+                remaining[moved] -= 1
+                kept.append(moved)
+            else:
+                removed.append(i)
+        added = list(remaining.elements())
+        if removed:
+            msg["removed_projectiles"] = removed
+        if added:
+            msg["added_projectiles"] = added
+        msg["_projectiles"] = tuple(kept + added)
+
+        chat = tuple(state.chat_messages)
+        if chat != base.chat_messages:
+            msg["chat_messages"] = list(chat)
+        return msg
+
+
+def _kept_segments(body, heads: int) -> Optional[int]:
+    """Count the base segments kept behind `heads` new heads, excluding growth copies."""
+    if heads > len(body):
+        return None
+    end = len(body) - 1
+    while end > heads and body[end] == body[end - 1]:
+        end -= 1
+    return end + 1 - heads
+
+
+def _apply_body(base_body, heads, keep, length):
+    body = list(heads) + list(islice(base_body, keep))
+    if len(body) < length:
+        # Growth duplicates the tail segment
+        body.extend([body[-1]] * (length - len(body)))
+    return body
+
+
+def apply_delta(base: GameState, delta: Dict) -> GameState:
+    """Build the state described by `delta` from the acknowledged `base` state."""
+    ticks = delta.get("ticks", 0)
+    removed = set(delta.get("removed_projectiles", ()))
+    projectiles = [
+        advance_projectile(p, ticks) for i, p in enumerate(base.projectiles) if i not in removed
+    ]
+    projectiles.extend(tuple(p) for p in delta.get("added_projectiles", ()))
+    if "chat_messages" in delta:
+        chat_messages = deque(delta["chat_messages"], maxlen=5)
+    else:
+        chat_messages = deque(base.chat_messages, maxlen=5)
+    scalars = {name: delta.get(name, getattr(base, name)) for name in SCALAR_FIELDS}
+    players = base.players
+    heads = delta.get("heads") or [()] * len(players)
+    table = PlayerTable(
+        positions=[_apply_body(body, body_heads, keep, length) for body, body_heads, keep, length
+                   in zip(players.positions, heads, delta["keep"], delta["lengths"])],
+        moves=list(players.moves),
+        **{name: list(delta.get(name, getattr(players, name))) for name in PLAYER_COLUMNS},
+    )
+    return GameState(
+        players=table,
+        projectiles=projectiles,
+        chat_messages=chat_messages,
+        tick=base.tick + ticks,
+        board_size=base.board_size,  # Fixed for the room, so deltas leave it out
+        seed=base.seed,
+        **scalars,
+    )
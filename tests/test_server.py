@@ -0,0 +1,72 @@
+from protocol import MessageDecoder
+from server import LobbyServer
+
+
+class Sink:
+    """Stands in for a client socket and its outbox, keeping the frames sent to it."""
+
+    def __init__(self):
+        self.frames = []
+
+    def put(self, frame):
+        self.frames.append(frame)
+        return True
+
+    def messages(self):
+        return MessageDecoder().feed(b''.join(self.frames))
+
+
+def make_server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The server writes server_port.txt
+    server = LobbyServer()
+    server.server.close()
+    return server
+
+
+def start_room(server, players):
+    """Seat `players` clients in a new room and start its game."""
+    clients = [Sink() for _ in range(players)]
+    for client in clients:
+        server.outboxes[client] = client
+    server.handle_command(clients[0], {"command": "create_room", "room_name": "test", "max_players": players})
+    room_id = clients[0].messages()[-1]["room_id"]
+    for client in clients[1:]:
+        server.handle_command(client, {"command": "join_room", "room_id": room_id})
+    for client in clients:
+        server.handle_command(client, {"command": "ready"})
+    return server.rooms[room_id], clients
+
+
+def test_game_continues_when_a_guest_leaves(tmp_path, monkeypatch):
+    server = make_server(tmp_path, monkeypatch)
+    room, clients = start_room(server, 3)
+    server.tick_games()
+    server.handle_disconnect(clients[2])
+
+    assert room.in_game
+    assert room.clients[2] is None
+    assert room.game_state.players.alive == [True, True, False]
+    assert not room.game_state.game_over
+    tick = room.game_state.tick
+    server.tick_games()
+    assert room.game_state.tick == tick + 1
+    assert {"command": "guest_disconnected"} in clients[0].messages()
+
+    # The freed seat stays empty while the game runs
+    newcomer = Sink()
+    server.outboxes[newcomer] = newcomer
+    server.handle_command(newcomer, {"command": "join_room", "room_id": room.id})
+    assert newcomer.messages() == [{"command": "error", "message": "Game already started"}]
+
+
+def test_last_guest_leaving_returns_room_to_lobby(tmp_path, monkeypatch):
+    server = make_server(tmp_path, monkeypatch)
+    room, clients = start_room(server, 2)
+    for _ in range(3):
+        server.tick_games()
+    server.handle_disconnect(clients[1])
+
+    assert not room.in_game
+    assert room.game_state.tick == 0
+    assert room.game_state.players.alive == [True, True]
+    assert room.id in [listing["id"] for listing in server.get_room_list()]
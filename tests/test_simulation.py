@@ -0,0 +1,17 @@
+import pytest
+
+from simulation import create_game_state
+
+
+@pytest.mark.parametrize("board,players", [(25, 2), (25, 3), (25, 4), (25, 16), (25, 23), (10, 2), (10, 8)])
+def test_players_start_in_rows_of_their_own(board, players):
+    table = create_game_state((board, board), players).players
+    rows = [body[0][1] for body in table.positions]
+    assert len(set(rows)) == players
+    assert all(direction in ((1, 0), (-1, 0)) for direction in table.directions)
+
+
+def test_two_player_layout():
+    table = create_game_state((25, 25), 2).players
+    assert [list(body) for body in table.positions] == [[(5, 5), (4, 5), (3, 5)], [(20, 20), (21, 20), (22, 20)]]
+    assert table.directions == [(1, 0), (-1, 0)]
@@ -0,0 +1,89 @@
+import pygame
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+TEXT_CACHE_SIZE = 256  # Composed text surfaces kept, least recently drawn dropped first
+
+_fonts: Dict[Tuple[Optional[str], int], pygame.font.Font] = {}
+
+
+def get_font(size: int, name: Optional[str] = None) -> pygame.font.Font:
+    """The font for this file and size, loaded once per process."""
+    font = _fonts.get((name, size))
+    if font is None:
+        font = _fonts[(name, size)] = pygame.font.Font(name, size)
+    return font
+
+
+class TextCache:
+    """Least recently used cache of text surfaces, counting hits and misses.
+
+    Keys are (text, color, size, effect) plus whatever else the effect
+    depends on; values are whatever `compose` built for them.
+    """
+
+    def __init__(self, max_size: int = TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, compose: Callable):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = compose()
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses, "size": len(self.surfaces),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+text_cache = TextCache()
+
+
+def render_text(text: str, color, size: int) -> pygame.Surface:
+    """`text` in the default font, antialiased, as cached by text_cache."""
+    return text_cache.get((text, color, size, "plain"), lambda: get_font(size).render(text, True, color))
+
+
+def compose_text(font: pygame.font.Font, text: str,
+                 layers: List[Tuple[Tuple, Sequence[Tuple[int, int]]]]) -> Tuple[pygame.Surface, pygame.Rect]:
+    """Render `text` once per layer and blit it at each of the layer's offsets, in order.
+
+    layers is a list of (color, offsets). Returns the composed surface and
+    where the unshifted text lies in it, for blit_text to place.
+    """
+    offsets = [offset for _, layer_offsets in layers for offset in layer_offsets]
+    left = min(dx for dx, _ in offsets)
+    top = min(dy for _, dy in offsets)
+    width, height = font.size(text)
+    surface = pygame.Surface((width + max(dx for dx, _ in offsets) - left,
+                              height + max(dy for _, dy in offsets) - top), pygame.SRCALPHA)
+    for color, layer_offsets in layers:
+        rendered = font.render(text, True, color)
+        for dx, dy in layer_offsets:
+            surface.blit(rendered, (dx - left, dy - top))
+    return surface, pygame.Rect(-left, -top, width, height)
+
+
+def placed_text(composed: Tuple[pygame.Surface, pygame.Rect], center) -> pygame.Rect:
+    """Where blit_text draws a compose_text result centered on `center`."""
+    surface, text_rect = composed
+    target = text_rect.copy()
+    target.center = center
+    return surface.get_rect(topleft=(target.x - text_rect.x, target.y - text_rect.y))
+
+
+def blit_text(screen: pygame.Surface, composed: Tuple[pygame.Surface, pygame.Rect], center) -> pygame.Rect:
+    """Draw a compose_text result with its unshifted text centered on `center`."""
+    return screen.blit(composed[0], placed_text(composed, center))
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+TICK_INTERVAL = 0.15  # Seconds between simulation ticks
+MAX_CATCH_UP_TICKS = 5  # Ticks run back to back before the backlog is dropped
+
+
+class TickScheduler:
+    """Fixed-timestep scheduler driven by the monotonic clock.
+
+    Deadlines advance by exactly one interval per tick, so processing time
+    never stretches the period. When the loop falls behind, up to
+    `max_catch_up` missed ticks run back to back; anything older is skipped.
+    """
+
+    def __init__(self, interval=TICK_INTERVAL, max_catch_up=MAX_CATCH_UP_TICKS, clock=time.monotonic):
+        self.interval = interval
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.next_tick = None
+        self.ticks = 0
+        self.overruns = 0  # Ticks that took longer than one interval
+        self.late_ticks = 0  # Ticks run late to catch up
+        self.skipped_ticks = 0  # Ticks dropped because the backlog was too long
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+
+    def due_ticks(self) -> int:
+        """Return how many ticks should run now and advance the deadline past them."""
+        now = self.clock()
+        if self.next_tick is None:
+            self.next_tick = now
+        due = 0
+        while now >= self.next_tick and due < self.max_catch_up:
+            due += 1
+            self.next_tick += self.interval
+        if now >= self.next_tick:
+            missed = int((now - self.next_tick) // self.interval) + 1
+            self.skipped_ticks += missed
+            self.next_tick += missed * self.interval
+        if due > 1:
+            self.late_ticks += due - 1
+        return due
+
+    def time_until_next(self) -> float:
+        return max(0.0, self.next_tick - self.clock())
+
+    def run_tick(self, tick):
+        start = self.clock()
+        tick()
+        self.last_duration = self.clock() - start
+        self.max_duration = max(self.max_duration, self.last_duration)
+        self.ticks += 1
+        if self.last_duration > self.interval:
+            self.overruns += 1
+
+    def stats(self):
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "late_ticks": self.late_ticks,
+            "skipped_ticks": self.skipped_ticks,
+            "last_duration": self.last_duration,
+            "max_duration": self.max_duration,
+        }
+
+    def run(self, tick):
+        """Call `tick` on schedule forever, blocking the calling thread."""
+        while True:
+            for _ in range(self.due_ticks()):
+                self.run_tick(tick)
+            time.sleep(self.time_until_next())
+
+    async def run_async(self, tick):
+        """Call `tick` on schedule forever without blocking the event loop."""
+        while True:
+            for _ in range(self.due_ticks()):
+                self.run_tick(tick)
+            await asyncio.sleep(self.time_until_next())